@@ -1,7 +1,6 @@
 import json
-import os
-import psycopg2
 from typing import Dict, Any
+from db import get_connection
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
@@ -70,8 +69,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'body': json.dumps({'error': 'user_id is required'})
         }
     
-    dsn = os.environ.get('DATABASE_URL')
-    conn = psycopg2.connect(dsn)
+    conn = get_connection()
     conn.autocommit = True
     cursor = conn.cursor()
     
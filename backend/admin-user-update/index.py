@@ -1,8 +1,7 @@
 import json
-import psycopg2
-import os
 import hashlib
 from typing import Dict, Any
+from db import get_connection
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
@@ -45,8 +44,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'isBase64Encoded': False
         }
     
-    dsn = os.environ.get('DATABASE_URL')
-    conn = psycopg2.connect(dsn)
+    conn = get_connection()
     conn.autocommit = True
     cursor = conn.cursor()
     
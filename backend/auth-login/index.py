@@ -14,6 +14,7 @@ from typing import Dict, Any
 try:
     import psycopg2
     from psycopg2.extras import RealDictCursor
+    from db import get_connection
 except ImportError:
     psycopg2 = None
 
@@ -88,7 +89,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'isBase64Encoded': False
             }
         
-        conn = psycopg2.connect(database_url)
+        conn = get_connection()
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
         password_hash = hashlib.sha256(password.encode()).hexdigest()
@@ -126,7 +127,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         
         token = create_simple_jwt(user['id'], user['email'], jwt_secret)
         
-        conn = psycopg2.connect(database_url)
+        conn = get_connection()
         conn.autocommit = True
         cur = conn.cursor()
         
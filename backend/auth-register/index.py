@@ -17,6 +17,7 @@ from email.mime.multipart import MIMEMultipart
 try:
     import psycopg2
     from psycopg2.extras import RealDictCursor
+    from db import get_connection
 except ImportError:
     psycopg2 = None
 
@@ -83,7 +84,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'isBase64Encoded': False
             }
         
-        conn = psycopg2.connect(database_url)
+        conn = get_connection()
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
         cur.execute(
@@ -7,9 +7,11 @@ Returns: HTTP response with game state and move synchronization
 
 import json
 import os
-import psycopg2
 from typing import Dict, Any
 from datetime import datetime
+from db import get_connection
+
+FINISHED_STATUSES_SQL = "('checkmate', 'stalemate', 'draw', 'resignation', 'timeout', 'finished')"
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
@@ -34,7 +36,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'body': json.dumps({'error': 'Database not configured'})
         }
     
-    conn = psycopg2.connect(database_url)
+    conn = get_connection()
     cur = conn.cursor()
     
     try:
@@ -49,10 +51,13 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     'body': json.dumps({'error': 'game_id required'})
                 }
             
-            cur.execute('''
-                SELECT id, white_player_id, black_player_id, fen, pgn, status, result
-                FROM t_p91748136_chess_support_world.games
-                WHERE id = %s
+            cur.execute(f'''
+                SELECT g.id, g.white_player_id, g.black_player_id, g.fen,
+                       CASE WHEN g.status IN {FINISHED_STATUSES_SQL} THEN g.pgn
+                            ELSE t_p91748136_chess_support_world.game_pgn(g.id, g.pgn) END,
+                       g.status, g.result
+                FROM t_p91748136_chess_support_world.games g
+                WHERE g.id = %s
             ''', (game_id,))
             
             row = cur.fetchone()
@@ -84,21 +89,81 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             body_data = json.loads(event.get('body', '{}'))
             game_id = body_data.get('game_id')
             move = body_data.get('move')
-            fen = body_data.get('fen')
-            pgn = body_data.get('pgn', '')
             
-            if not game_id or not move or not fen:
+            if not game_id or not move:
                 return {
                     'statusCode': 400,
                     'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                    'body': json.dumps({'error': 'game_id, move, and fen required'})
+                    'body': json.dumps({'error': 'game_id and move required'})
                 }
             
+            cur.execute('''
+                SELECT fen, ply FROM t_p91748136_chess_support_world.games
+                WHERE id = %s AND status IN ('active', 'waiting')
+            ''', (game_id,))
+            game_row = cur.fetchone()
+            
+            if not game_row:
+                return {
+                    'statusCode': 404,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': 'Active game not found'})
+                }
+            
+            # Ход проверяется python-chess так же, как в game-move; позицию считает сервер
+            import chess
+            try:
+                board = chess.Board(game_row[0] or chess.STARTING_FEN)
+            except ValueError:
+                return {
+                    'statusCode': 409,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': 'Stored position is corrupted'})
+                }
+            
+            try:
+                parsed = chess.Move.from_uci(move)
+                if not board.is_legal(parsed):
+                    parsed = None
+            except ValueError:
+                try:
+                    parsed = board.parse_san(move)
+                except ValueError:
+                    parsed = None
+            
+            if parsed is None:
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': 'Illegal move'})
+                }
+            
+            uci = parsed.uci()
+            san = board.san(parsed)
+            board.push(parsed)
+            fen = board.fen()
+            ply = game_row[1] + 1
+            
+            # PGN не переписываем: ход дописывается одной строкой в журнал game_moves.
+            # Запись проходит, только если с момента чтения никто не сходил
             cur.execute('''
                 UPDATE t_p91748136_chess_support_world.games
-                SET fen = %s, pgn = %s, updated_at = NOW()
-                WHERE id = %s
-            ''', (fen, pgn, game_id))
+                SET fen = %s, ply = %s, current_turn = %s, updated_at = NOW(), turn_started_at = NOW()
+                WHERE id = %s AND ply = %s AND status IN ('active', 'waiting')
+            ''', (fen, ply, 'w' if board.turn == chess.WHITE else 'b', game_id, game_row[1]))
+            
+            if cur.rowcount == 0:
+                conn.rollback()
+                return {
+                    'statusCode': 409,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': 'Position has changed'})
+                }
+            
+            cur.execute('''
+                INSERT INTO t_p91748136_chess_support_world.game_moves (game_id, ply, uci, san)
+                VALUES (%s, %s, %s, %s)
+            ''', (game_id, ply, uci, san))
             
             conn.commit()
             
@@ -108,7 +173,8 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'body': json.dumps({
                     'success': True,
                     'gameId': game_id,
-                    'move': move,
+                    'move': uci,
+                    'san': san,
                     'fen': fen,
                     'timestamp': datetime.now().isoformat()
                 })
@@ -127,12 +193,21 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     'body': json.dumps({'error': 'game_id and result required'})
                 }
             
-            cur.execute('''
-                UPDATE t_p91748136_chess_support_world.games
-                SET result = %s, status = 'finished', winner = %s, updated_at = NOW()
-                WHERE id = %s
+            cur.execute(f'''
+                UPDATE t_p91748136_chess_support_world.games g
+                SET result = %s, status = 'finished', winner = %s, updated_at = NOW(),
+                    pgn = CASE WHEN g.status IN {FINISHED_STATUSES_SQL} THEN g.pgn
+                               ELSE t_p91748136_chess_support_world.game_pgn(g.id, g.pgn) END
+                WHERE g.id = %s
             ''', (result, winner, game_id))
-            
+
+            # Результат турнирной партии попадает в пару сразу: по нему триггер считает завершённые партии тура
+            cur.execute('''
+                UPDATE t_p91748136_chess_support_world.tournament_pairings
+                SET result = CASE %s WHEN 'white' THEN '1-0' WHEN 'black' THEN '0-1' ELSE '1/2-1/2' END
+                WHERE game_id = %s AND result IS NULL AND %s IN ('white', 'black', 'draw')
+            ''', (winner, game_id, winner))
+
             conn.commit()
             
             return {
@@ -1,7 +1,7 @@
 import json
 import os
-import psycopg2
 from typing import Dict, Any
+from db import get_connection, pool_stats
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
@@ -41,7 +41,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'body': json.dumps({'success': False, 'error': 'DATABASE_URL не настроен'})
         }
     
-    conn = psycopg2.connect(dsn)
+    conn = get_connection()
     conn.autocommit = True
     cur = conn.cursor()
     
@@ -87,5 +87,5 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         'statusCode': 200,
         'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
         'isBase64Encoded': False,
-        'body': json.dumps({'success': True, 'stats': stats})
+        'body': json.dumps({'success': True, 'stats': stats, 'connections': pool_stats()})
     }
\ No newline at end of file
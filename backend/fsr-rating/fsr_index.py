@@ -0,0 +1,389 @@
+'''
+Локальный индекс рейтинг-листа ФШР (быстрые шахматы): список скачивается по расписанию,
+разбирается в отсортированные массивы и сохраняется одним блоком байтов, поиск идёт по индексу без обращений к сети.
+ID — отсортированный array, поиск бинарный; имена — отсортированный список нормализованных ключей
+для поиска по началу любого слова ФИО и инвертированный индекс триграмм для нечёткого поиска.
+Кириллица и латиница приводятся к одной транслитерации, поэтому «Непомнящий» находится и по «Nepomniachtchi».
+Обновление — условный GET (ETag / If-Modified-Since) с построчным разбором ответа; к индексу применяется
+только разница с прошлым списком.
+Usage: python fsr_index.py --csv fixture.csv [--out /tmp/fsr_rating_index.pickle] [--id 4168119] [--name Иванов]
+       python fsr_index.py --url http://127.0.0.1:8765/smaster_rapid.csv --out /tmp/fsr.pickle
+'''
+
+import argparse
+import csv
+import os
+import pickle
+import re
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+CSV_URL = os.environ.get('FSR_CSV_URL', 'https://ratings.ruchess.ru/api/smaster_rapid.csv')
+INDEX_PATH = os.environ.get('FSR_INDEX_PATH', '/tmp/fsr_rating_index.pickle')
+DOWNLOAD_TIMEOUT = 30
+INDEX_FORMAT = 4
+# Рейтинг вне этого диапазона считается ошибкой в строке списка и не сохраняется
+MAX_RATING = 4000
+
+# Нечёткий поиск: кандидаты набираются по самым редким триграммам запроса, частые (вроде «ов ») не просматриваются
+FUZZY_TRIGRAMS = 6
+FUZZY_MAX_POSTING = 5000
+FUZZY_CANDIDATES = 200
+FUZZY_MIN_SCORE = 0.45
+
+Row = Tuple[int, str, Optional[int], Optional[int]]
+
+
+TRANSLIT = str.maketrans({
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'e', 'ж': 'zh', 'з': 'z', 'и': 'i',
+    'й': 'i', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't',
+    'у': 'u', 'ф': 'f', 'х': 'h', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'shch', 'ъ': '', 'ы': 'i', 'ь': '',
+    'э': 'e', 'ю': 'iu', 'я': 'ia',
+    # Латиница сводится к тем же буквам: разные схемы транслитерации дают близкие строки
+    'y': 'i', 'j': 'i', 'w': 'v', 'x': 'ks', 'q': 'k', '-': ' ',
+})
+
+
+def normalize_name(name: str) -> str:
+    """Ключ для поиска: транслитерация в нижнем регистре, kh/ph упрощены, слова через один пробел"""
+    text = name.lower().translate(TRANSLIT).replace('kh', 'h').replace('ph', 'f')
+    return ' '.join(word for word in re.split(r'[^a-z0-9]+', text) if word)
+
+
+def trigrams(normalized: str) -> set:
+    """Триграммы каждого слова с пробелом по краям, как в pg_trgm"""
+    grams = set()
+    for word in normalized.split(' '):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def decode_line(line: bytes) -> str:
+    """Список отдаётся в cp1251, но UTF-8 тоже принимается; кодировка определяется по строке"""
+    try:
+        return line.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return line.decode('cp1251')
+
+
+def detect_delimiter(sample: str) -> str:
+    if '\t' in sample:
+        return '\t'
+    if ',' in sample and ';' not in sample:
+        return ','
+    return ';'
+
+
+def parse_number(field: str, limit: int) -> Optional[int]:
+    """Целое от 1 до limit; пустое, нечисловое или вне диапазона поле — None"""
+    field = field.strip()
+    if not field.isdigit():
+        return None
+    value = int(field)
+    return value if 0 < value <= limit else None
+
+
+def parse_rows(lines: Iterable[str], delimiter: str) -> Iterator[Row]:
+    """Строки формата ID;ФИО;Год;Рейтинг[;...] без заголовка; строки без числового ID пропускаются.
+    Рейтинг берётся только из четвёртого столбца, остальные столбцы не читаются"""
+    for row in csv.reader(lines, delimiter=delimiter):
+        if len(row) < 2 or not row[0].strip().isdigit():
+            continue
+        yield (
+            int(row[0].strip()),
+            row[1].strip(),
+            parse_number(row[2], 9999) if len(row) > 2 else None,
+            parse_number(row[3], MAX_RATING) if len(row) > 3 else None,
+        )
+
+
+def parse_lines(lines: Iterable[bytes]) -> List[Row]:
+    """Разбор построчно, без декодирования всего ответа целиком; первая строка — заголовок"""
+    lines = iter(lines)
+    header = decode_line(next(lines, b''))
+    decoded = (decode_line(line) for line in lines if line.strip())
+    return list(parse_rows(decoded, detect_delimiter(header)))
+
+
+def parse_csv(content: bytes) -> List[Row]:
+    return parse_lines(content.splitlines())
+
+
+def diff_rows(index: 'FsrIndex', rows: List[Row]) -> Tuple[List[Row], bool]:
+    """Строки нового списка, отличающиеся от индекса, и признак изменений состава или ФИО.
+    Оба списка отсортированы по ID, поэтому сравнение — один проход слиянием"""
+    changed: List[Row] = []
+    structural = len(rows) != len(index)
+    position = 0
+    for row in rows:
+        while position < len(index) and index.ids[position] < row[0]:
+            structural = True
+            position += 1
+        if position >= len(index) or index.ids[position] != row[0]:
+            changed.append(row)
+            structural = True
+            continue
+        if index.names[position] != row[1]:
+            structural = True
+        if (index.names[position] != row[1] or index.birth_years[position] != (row[2] or 0)
+                or index.ratings[position] != (row[3] or 0)):
+            changed.append(row)
+        position += 1
+    return changed, structural or position < len(index)
+
+
+class FsrIndex:
+    """Рейтинг-лист в виде параллельных массивов, отсортированных по ID"""
+
+    def __init__(self, rows: List[Row], built_at: Optional[float] = None):
+        rows = sorted(rows, key=lambda row: row[0])
+        self.built_at = built_at or time.time()
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.ids = array('q', (row[0] for row in rows))
+        self.names = [row[1] for row in rows]
+        self.birth_years = array('i', (row[2] or 0 for row in rows))
+        self.ratings = array('i', (row[3] or 0 for row in rows))
+
+        # Каждый хвост ФИО с начала слова: поиск по фамилии, имени и «имя отчество» — это поиск по префиксу
+        keys = []
+        for position, name in enumerate(self.names):
+            words = normalize_name(name).split(' ')
+            for start in range(len(words)):
+                keys.append((' '.join(words[start:]), position))
+        keys.sort()
+        self.name_keys = [key for key, _ in keys]
+        self.name_rows = array('I', (position for _, position in keys))
+
+        postings: Dict[str, array] = {}
+        for position, name in enumerate(self.names):
+            for gram in trigrams(normalize_name(name)):
+                posting = postings.get(gram)
+                if posting is None:
+                    posting = postings[gram] = array('I')
+                posting.append(position)
+        self.postings = postings
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def player(self, position: int) -> Dict[str, Any]:
+        return {
+            'fsr_id': str(self.ids[position]),
+            'name': self.names[position],
+            'birth_year': self.birth_years[position] or None,
+            'rating_rapid': self.ratings[position] or None,
+        }
+
+    def find_position(self, fsr_id: Any) -> Optional[int]:
+        fsr_id = str(fsr_id).strip()
+        if not fsr_id.isdigit():
+            return None
+        value = int(fsr_id)
+        position = bisect_left(self.ids, value)
+        if position < len(self.ids) and self.ids[position] == value:
+            return position
+        return None
+
+    def get(self, fsr_id: Any) -> Optional[Dict[str, Any]]:
+        position = self.find_position(fsr_id)
+        return self.player(position) if position is not None else None
+
+    def prefix_positions(self, prefix: str, limit: int) -> List[int]:
+        found: List[int] = []
+        for i in range(bisect_left(self.name_keys, prefix), len(self.name_keys)):
+            if len(found) >= limit or not self.name_keys[i].startswith(prefix):
+                break
+            position = self.name_rows[i]
+            if position not in found:
+                found.append(position)
+        return found
+
+    def fuzzy_positions(self, normalized: str) -> Dict[int, float]:
+        """Кандидаты по редким триграммам запроса; оценка — доля триграмм запроса, найденных в ФИО"""
+        query_grams = trigrams(normalized)
+        lists = sorted((self.postings[g] for g in query_grams if g in self.postings), key=len)
+        lists = [posting for posting in lists[:FUZZY_TRIGRAMS] if len(posting) <= FUZZY_MAX_POSTING]
+        if not lists:
+            return {}
+
+        hits: Counter = Counter()
+        for posting in lists:
+            hits.update(posting)
+
+        scores = {}
+        for position, _ in hits.most_common(FUZZY_CANDIDATES):
+            name_grams = trigrams(normalize_name(self.names[position]))
+            score = len(query_grams & name_grams) / len(query_grams)
+            if score >= FUZZY_MIN_SCORE:
+                scores[position] = score
+        return scores
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Лучшие limit игроков: сначала совпадения по началу фамилии, затем по началу другого слова,
+        затем нечёткие по триграммам; при равной оценке выше рейтинг"""
+        normalized = normalize_name(query)
+        if not normalized:
+            return []
+
+        scores: Dict[int, float] = {}
+        for position in self.prefix_positions(normalized, limit * 5):
+            surname_match = normalize_name(self.names[position]).startswith(normalized)
+            scores[position] = 3.0 if surname_match else 2.0
+
+        if len(scores) < limit and len(normalized) >= 3:
+            for position, score in self.fuzzy_positions(normalized).items():
+                scores.setdefault(position, score)
+
+        best = sorted(scores, key=lambda position: (-scores[position], -self.ratings[position], self.ids[position]))[:limit]
+        return [dict(self.player(position), score=round(min(scores[position], 1.0), 2)) for position in best]
+
+    def dumps(self) -> bytes:
+        """Массивы пишутся байтами, а не объектом класса, чтобы индекс читался и из CLI, и из функции"""
+        state = {
+            'format': INDEX_FORMAT,
+            'built_at': self.built_at,
+            'etag': self.etag,
+            'last_modified': self.last_modified,
+            'ids': self.ids.tobytes(),
+            'names': self.names,
+            'birth_years': self.birth_years.tobytes(),
+            'ratings': self.ratings.tobytes(),
+            'name_keys': self.name_keys,
+            'name_rows': self.name_rows.tobytes(),
+            'postings': {gram: posting.tobytes() for gram, posting in self.postings.items()},
+        }
+        return pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def save(self, path: str) -> None:
+        """Запись через временный файл: параллельный вызов не прочитает недописанный индекс"""
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(self.dumps())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional['FsrIndex']:
+        try:
+            with open(path, 'rb') as f:
+                return cls.loads(f.read())
+        except OSError:
+            return None
+
+    @classmethod
+    def loads(cls, data: bytes) -> Optional['FsrIndex']:
+        """Индекс из dumps(); None — данные повреждены или записаны другой версией формата"""
+        try:
+            state = pickle.loads(data)
+        except (EOFError, pickle.UnpicklingError, ValueError):
+            return None
+        if not isinstance(state, dict) or state.get('format') != INDEX_FORMAT:
+            return None
+
+        index = cls.__new__(cls)
+        index.built_at = state['built_at']
+        index.etag = state['etag']
+        index.last_modified = state['last_modified']
+        index.names = state['names']
+        index.name_keys = state['name_keys']
+        for field, typecode in (('ids', 'q'), ('birth_years', 'i'), ('ratings', 'i'), ('name_rows', 'I')):
+            values = array(typecode)
+            values.frombytes(state[field])
+            setattr(index, field, values)
+        index.postings = {}
+        for gram, data in state['postings'].items():
+            posting = array('I')
+            posting.frombytes(data)
+            index.postings[gram] = posting
+        return index
+
+
+def fetch_list(url: str, etag: Optional[str], last_modified: Optional[str]) -> Optional[Tuple[List[Row], Optional[str], Optional[str]]]:
+    """Условный GET списка: None, если он не менялся (304), иначе строки, ETag и Last-Modified"""
+    import requests
+
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+
+    with requests.get(url, headers=headers, timeout=DOWNLOAD_TIMEOUT, stream=True) as response:
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        rows = parse_lines(response.iter_lines())
+        return rows, response.headers.get('ETag'), response.headers.get('Last-Modified')
+
+
+def refresh(current: Optional[FsrIndex] = None, content: Optional[bytes] = None,
+            url: str = CSV_URL) -> Optional[FsrIndex]:
+    """Обновить индекс из CSV (content или условный GET по url); None — список не менялся (304).
+    Сохраняет индекс вызывающий: функция — в БД, CLI — в файл.
+    Если менялись только рейтинги и годы рождения, массивы правятся на месте без переиндексации имён"""
+    started = time.perf_counter()
+    etag = last_modified = None
+
+    if content is not None:
+        rows = parse_csv(content)
+    else:
+        fetched = fetch_list(url, current.etag if current else None, current.last_modified if current else None)
+        if fetched is None:
+            print('[FSR] list not modified')
+            return None
+        rows, etag, last_modified = fetched
+
+    rows.sort(key=lambda row: row[0])
+    if current is None:
+        index, changed = FsrIndex(rows), []
+    else:
+        changed, structural = diff_rows(current, rows)
+        if structural:
+            index = FsrIndex(rows)
+        else:
+            index = current
+            for fsr_id, _, birth_year, rating in changed:
+                position = index.find_position(fsr_id)
+                index.birth_years[position] = birth_year or 0
+                index.ratings[position] = rating or 0
+            index.built_at = time.time()
+
+    index.etag, index.last_modified = etag, last_modified
+    print(f'[FSR] index updated: {len(index)} players, {len(changed)} changed '
+          f'in {(time.perf_counter() - started) * 1000:.0f} ms')
+    return index
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Сборка локального индекса рейтинг-листа ФШР')
+    parser.add_argument('--csv', help='локальный CSV вместо скачивания')
+    parser.add_argument('--url', default=CSV_URL, help='адрес списка, например локальная заглушка scripts/fsr_list_server.py')
+    parser.add_argument('--out', default=INDEX_PATH)
+    parser.add_argument('--id', help='проверить поиск по ID ФШР')
+    parser.add_argument('--name', help='проверить поиск по ФИО')
+    args = parser.parse_args()
+
+    content = None
+    if args.csv:
+        with open(args.csv, 'rb') as f:
+            content = f.read()
+    current = FsrIndex.load(args.out)
+    index = refresh(current, content, url=args.url)
+    if index is None:
+        index = current
+    else:
+        index.save(args.out)
+
+    if args.id:
+        print(index.get(args.id))
+    if args.name:
+        for player in index.search(args.name):
+            print(player)
+
+
+if __name__ == '__main__':
+    main()
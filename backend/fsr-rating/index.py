@@ -1,14 +1,218 @@
 import json
-import requests
-import csv
-from typing import Dict, Any, Optional
-from io import StringIO
+import time
+from typing import Dict, Any, List, Optional
+from psycopg2.extras import execute_values
+from db import get_connection
+from fsr_index import FsrIndex, refresh
+
+MAX_BULK_IDS = 5000
+# Так часто экземпляр сверяет свой индекс с сохранённым в БД (одна строка по первичному ключу)
+INDEX_CHECK_SECONDS = 300
+
+_index: Optional[FsrIndex] = None
+_index_updated_at = None
+_index_checked_at = 0.0
+
+def load_index() -> FsrIndex:
+    '''Индекс из памяти экземпляра; раз в INDEX_CHECK_SECONDS он сверяется с fsr_rating_index и перечитывается,
+    если вызов по расписанию успел его обновить. Поиск ничего не скачивает и не пишет'''
+    global _index, _index_updated_at, _index_checked_at
+    
+    now = time.time()
+    if _index is not None and now - _index_checked_at < INDEX_CHECK_SECONDS:
+        return _index
+    
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute('''
+            SELECT updated_at FROM t_p91748136_chess_support_world.fsr_rating_index WHERE id = 1
+        ''')
+        row = cur.fetchone()
+        updated_at = row[0] if row else None
+        if updated_at is not None and updated_at != _index_updated_at:
+            cur.execute('''
+                SELECT data FROM t_p91748136_chess_support_world.fsr_rating_index WHERE id = 1
+            ''')
+            loaded = FsrIndex.loads(bytes(cur.fetchone()[0]))
+            if loaded is not None:
+                _index, _index_updated_at = loaded, updated_at
+    finally:
+        conn.close()
+    
+    if _index is None:
+        raise RuntimeError('индекс ещё не построен, его строит вызов по расписанию (POST {"action": "refresh"})')
+    _index_checked_at = now
+    return _index
+
+def sync_user_ratings(cur, fsr_index: FsrIndex) -> int:
+    '''users.ms_rating сверяется с индексом напрямую: обновляются все, у кого рейтинг в списке другой.
+    Сравнение с самой таблицей users не зависит от того, что видел прошлый вызов, и подхватывает новые ID ФШР'''
+    cur.execute('''
+        SELECT u.id, TRIM(u.fsr_id), u.ms_rating
+        FROM t_p91748136_chess_support_world.users u
+        WHERE NULLIF(TRIM(u.fsr_id), '') IS NOT NULL
+    ''')
+    changes = []
+    for user_id, user_fsr_id, ms_rating in cur.fetchall():
+        player = fsr_index.get(user_fsr_id)
+        if player and player['rating_rapid'] and player['rating_rapid'] != ms_rating:
+            changes.append((user_id, player['rating_rapid']))
+    
+    if changes:
+        execute_values(cur, '''
+            UPDATE t_p91748136_chess_support_world.users u
+            SET ms_rating = v.rating
+            FROM (VALUES %s) AS v(id, rating)
+            WHERE u.id = v.id
+        ''', changes, template='(%s, %s::integer)', page_size=1000)
+    print(f'[FSR] users updated: {len(changes)}')
+    return len(changes)
+
+def refresh_index() -> Dict[str, Any]:
+    '''
+    Обновление по расписанию (backend/schedules.json): условный GET списка, разница с сохранённым индексом,
+    запись индекса в fsr_rating_index и сверка users.ms_rating с ним одной транзакцией.
+    Сверка идёт и при ответе 304: рейтинг попадает к пользователю, даже если ID ФШР указан после прошлого обновления
+    '''
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        # Строка индекса блокируется до конца транзакции: второе обновление ждёт, поиск читает прежний индекс
+        cur.execute('''
+            SELECT data FROM t_p91748136_chess_support_world.fsr_rating_index WHERE id = 1 FOR UPDATE
+        ''')
+        row = cur.fetchone()
+        current = FsrIndex.loads(bytes(row[0])) if row and row[0] is not None else None
+        
+        fresh = refresh(current)
+        
+        if fresh is None:
+            cur.execute('''
+                UPDATE t_p91748136_chess_support_world.fsr_rating_index SET checked_at = NOW() WHERE id = 1
+            ''')
+        else:
+            cur.execute('''
+                INSERT INTO t_p91748136_chess_support_world.fsr_rating_index
+                    (id, data, etag, last_modified, players, updated_at, checked_at)
+                VALUES (1, %s, %s, %s, %s, NOW(), NOW())
+                ON CONFLICT (id) DO UPDATE SET
+                    data = EXCLUDED.data, etag = EXCLUDED.etag, last_modified = EXCLUDED.last_modified,
+                    players = EXCLUDED.players, updated_at = EXCLUDED.updated_at, checked_at = EXCLUDED.checked_at
+            ''', (fresh.dumps(), fresh.etag, fresh.last_modified, len(fresh)))
+        
+        index = fresh if fresh is not None else current
+        updated = sync_user_ratings(cur, index) if index is not None else 0
+        conn.commit()
+        
+        return json_response(200, {
+            'success': True,
+            'modified': fresh is not None,
+            'players': len(index) if index is not None else 0,
+            'users_updated': updated
+        })
+    finally:
+        conn.close()
+
+def json_response(status: int, payload: Any) -> Dict[str, Any]:
+    return {
+        'statusCode': status,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*'
+        },
+        'isBase64Encoded': False,
+        'body': json.dumps(payload, ensure_ascii=False)
+    }
+
+def bulk_lookup(body: Dict[str, Any]) -> Dict[str, Any]:
+    '''
+    Рейтинги сразу для списка fsr_ids или для всех участников tournament_id за один проход по индексу.
+    С write_back: true найденные рейтинги записываются в users.ms_rating одним UPDATE ... FROM (VALUES ...)
+    '''
+    fsr_ids = body.get('fsr_ids') or []
+    tournament_id = body.get('tournament_id')
+    write_back = bool(body.get('write_back'))
+    
+    if not isinstance(fsr_ids, list) or (not fsr_ids and not tournament_id):
+        return json_response(400, {'error': 'fsr_ids list or tournament_id is required'})
+    
+    if len(fsr_ids) > MAX_BULK_IDS:
+        return json_response(400, {'error': f'Не больше {MAX_BULK_IDS} fsr_ids за запрос'})
+    
+    fsr_index = load_index()
+    conn = None
+    
+    try:
+        users_by_fsr: Dict[str, List[int]] = {}
+        if tournament_id or write_back:
+            conn = get_connection()
+            cur = conn.cursor()
+        
+        if tournament_id:
+            cur.execute('''
+                SELECT u.id, TRIM(u.fsr_id)
+                FROM t_p91748136_chess_support_world.users u
+                WHERE NULLIF(TRIM(u.fsr_id), '') IS NOT NULL AND u.id IN (
+                    SELECT player_id FROM t_p91748136_chess_support_world.tournament_registrations
+                    WHERE tournament_id = %s AND status = 'registered'
+                    UNION
+                    SELECT user_id FROM t_p91748136_chess_support_world.tournament_participants
+                    WHERE tournament_id = %s
+                )
+            ''', (tournament_id, tournament_id))
+            for user_id, user_fsr_id in cur.fetchall():
+                users_by_fsr.setdefault(user_fsr_id, []).append(user_id)
+            fsr_ids = list(fsr_ids) + list(users_by_fsr)
+        
+        players = []
+        not_found = []
+        ratings = []
+        seen = set()
+        for fsr_id in (str(value).strip() for value in fsr_ids):
+            if fsr_id in seen:
+                continue
+            seen.add(fsr_id)
+            player = fsr_index.get(fsr_id)
+            if player is None:
+                not_found.append(fsr_id)
+                continue
+            if fsr_id in users_by_fsr:
+                player['user_ids'] = users_by_fsr[fsr_id]
+            players.append(player)
+            if player['rating_rapid']:
+                # Ключ — ID в том виде, как он записан у пользователя (например, с ведущими нулями)
+                ratings.append((fsr_id, player['rating_rapid']))
+        
+        updated = 0
+        if write_back:
+            if ratings:
+                execute_values(cur, '''
+                    UPDATE t_p91748136_chess_support_world.users u
+                    SET ms_rating = v.rating
+                    FROM (VALUES %s) AS v(fsr_id, rating)
+                    WHERE TRIM(u.fsr_id) = v.fsr_id AND u.ms_rating IS DISTINCT FROM v.rating
+                ''', ratings, template='(%s, %s::integer)', page_size=len(ratings))
+                updated = cur.rowcount
+            conn.commit()
+        
+        return json_response(200, {
+            'players': players,
+            'not_found': not_found,
+            'total': len(players),
+            'updated': updated
+        })
+    finally:
+        if conn is not None:
+            conn.close()
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
     Business: Получает текущий рейтинг игрока из CSV файла ФШР по ID или ФИО
-    Args: event с httpMethod, queryStringParameters (fsr_id или name)
-    Returns: JSON с рейтингом игрока (rapid)
+    Args: event с httpMethod, queryStringParameters (fsr_id, name или q для подсказок, limit);
+          POST body {fsr_ids | tournament_id, write_back} — пакетный поиск;
+          POST body {action: "refresh"} — обновление списка, вызывается по расписанию
+    Returns: JSON с рейтингом игрока (rapid); для q и POST — список players
     '''
     method: str = event.get('httpMethod', 'GET')
     
@@ -18,13 +222,25 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'statusCode': 200,
             'headers': {
                 'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, OPTIONS',
+                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
                 'Access-Control-Allow-Headers': 'Content-Type',
                 'Access-Control-Max-Age': '86400'
             },
             'body': ''
         }
     
+    if method == 'POST':
+        try:
+            body = json.loads(event.get('body') or '{}')
+        except json.JSONDecodeError:
+            return json_response(400, {'error': 'Invalid JSON'})
+        try:
+            if body.get('action') == 'refresh':
+                return refresh_index()
+            return bulk_lookup(body)
+        except Exception as e:
+            return json_response(500, {'error': str(e)})
+    
     if method != 'GET':
         return {
             'statusCode': 405,
@@ -38,100 +254,53 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     params = event.get('queryStringParameters', {})
     fsr_id: str = params.get('fsr_id', '').strip()
     search_name: str = params.get('name', '').strip()
+    suggest_query: str = params.get('q', '').strip()
     
-    if not fsr_id and not search_name:
+    if not fsr_id and not search_name and not suggest_query:
         return {
             'statusCode': 400,
             'headers': {
                 'Content-Type': 'application/json',
                 'Access-Control-Allow-Origin': '*'
             },
-            'body': json.dumps({'error': 'fsr_id or name parameter is required'}, ensure_ascii=False)
+            'body': json.dumps({'error': 'fsr_id, name or q parameter is required'}, ensure_ascii=False)
         }
     
-    # Скачиваем CSV файл с рейтингами
-    csv_url = 'https://ratings.ruchess.ru/api/smaster_rapid.csv'
-    
-    response = requests.get(csv_url, timeout=10)
-    
-    # Пробуем разные кодировки
-    text_content = None
-    for encoding in ['windows-1251', 'cp1251', 'utf-8']:
-        try:
-            text_content = response.content.decode(encoding)
-            break
-        except UnicodeDecodeError:
-            continue
-    
-    if not text_content:
+    # Поиск по индексу в памяти экземпляра; список скачивает только обновление по расписанию
+    try:
+        fsr_index = load_index()
+    except Exception as e:
         return {
-            'statusCode': 500,
+            'statusCode': 503,
             'headers': {
                 'Content-Type': 'application/json',
                 'Access-Control-Allow-Origin': '*'
             },
-            'body': json.dumps({'error': 'Failed to decode CSV file'}, ensure_ascii=False)
+            'body': json.dumps({'error': f'Рейтинг-лист ФШР недоступен: {e}'}, ensure_ascii=False)
         }
     
-    # Парсим CSV - пробуем разные разделители
-    delimiter = ';'
-    if '\t' in text_content[:1000]:
-        delimiter = '\t'
-    elif ',' in text_content[:1000] and ';' not in text_content[:1000]:
-        delimiter = ','
-    
-    csv_reader = csv.reader(StringIO(text_content), delimiter=delimiter)
-    
-    # Пропускаем заголовок
-    header = next(csv_reader, None)
-    
-    found_player = None
+    # Подсказки при вводе: лучшие совпадения по началу слова и по триграммам
+    if suggest_query:
+        try:
+            limit = min(max(int(params.get('limit', 10)), 1), 50)
+        except ValueError:
+            limit = 10
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*',
+                'Cache-Control': 'public, max-age=3600'
+            },
+            'isBase64Encoded': False,
+            'body': json.dumps({'players': fsr_index.search(suggest_query, limit=limit)}, ensure_ascii=False)
+        }
     
-    # Ищем игрока по ID или имени
-    debug_row = None
-    for row in csv_reader:
-        if len(row) < 2:
-            continue
-        
-        # ID может быть в разных позициях
-        player_id = row[0].strip() if len(row) > 0 else ''
-        player_name = row[1].strip() if len(row) > 1 else ''
-        
-        # Сохраняем первую найденную строку для отладки
-        if not debug_row and (fsr_id and player_id == fsr_id) or (search_name and search_name.lower() in player_name.lower()):
-            debug_row = row
-        
-        # Формат: ID;ФИО;Год;Рейтинг
-        birth_year = None
-        rating = None
-        
-        # Обрабатываем все оставшиеся поля
-        remaining_fields = [row[i].strip() for i in range(2, len(row)) if row[i].strip()]
-        
-        # Ищем рейтинг - это самое большое число
-        numbers = [int(f) for f in remaining_fields if f.isdigit()]
-        
-        if numbers:
-            # Самое большое число - это рейтинг
-            rating = max(numbers)
-        
-        # Поиск по ID
-        if fsr_id and player_id == fsr_id:
-            found_player = {
-                'fsr_id': player_id,
-                'name': player_name,
-                'rating_rapid': rating
-            }
-            break
-        
-        # Поиск по имени (частичное совпадение)
-        if search_name and search_name.lower() in player_name.lower():
-            found_player = {
-                'fsr_id': player_id,
-                'name': player_name,
-                'rating_rapid': rating
-            }
-            break
+    if fsr_id:
+        found_player = fsr_index.get(fsr_id)
+    else:
+        matches = fsr_index.search(search_name, limit=1)
+        found_player = matches[0] if matches else None
     
     if not found_player:
         return {
@@ -5,10 +5,9 @@ Returns: HTTP response with game_id and join link
 '''
 
 import json
-import psycopg2
-import os
 import uuid
 from typing import Dict, Any
+from db import get_connection
 
 def parse_time_control(time_control: str) -> int:
     """Парсит строку вида '5+3' и возвращает начальное время в секундах"""
@@ -59,9 +58,9 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     time_control = body_data.get('time_control')  # например "5+3"
     
     initial_time = parse_time_control(time_control) if time_control else None
+    initial_time_ms = initial_time * 1000 if initial_time is not None else None
     
-    dsn = os.environ.get('DATABASE_URL')
-    conn = psycopg2.connect(dsn)
+    conn = get_connection()
     cursor = conn.cursor()
     
     game_id = str(uuid.uuid4())
@@ -73,9 +72,11 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     white_id = int(user_id) if user_exists else None
     
     cursor.execute("""
-        INSERT INTO games (id, fen, pgn, white_player_id, current_turn, status, time_control, white_time, black_time)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-    """, (game_id, initial_fen, '', white_id, 'w', 'waiting', time_control, initial_time, initial_time))
+        INSERT INTO games (id, fen, pgn, white_player_id, current_turn, status, time_control, white_time, black_time,
+                           white_time_ms, black_time_ms)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """, (game_id, initial_fen, '', white_id, 'w', 'waiting', time_control, initial_time, initial_time,
+          initial_time_ms, initial_time_ms))
     
     conn.commit()
     cursor.close()
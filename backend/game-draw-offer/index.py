@@ -5,8 +5,24 @@ action: "offer" — предложить ничью, "accept" — принять
 
 import json
 import os
-import psycopg2
-import pusher
+from db import get_connection
+
+_pusher_client = None
+
+def get_pusher_client():
+    """Клиент Pusher и его HTTPS-сессия создаются один раз на тёплый экземпляр функции;
+    сам модуль pusher (вместе с requests) импортируется только при первой отправке"""
+    global _pusher_client
+    if _pusher_client is None:
+        import pusher
+        _pusher_client = pusher.Pusher(
+            app_id=os.environ['PUSHER_APP_ID'],
+            key=os.environ['PUSHER_KEY'],
+            secret=os.environ['PUSHER_SECRET'],
+            cluster=os.environ['PUSHER_CLUSTER'],
+            ssl=True
+        )
+    return _pusher_client
 
 def handler(event: dict, context) -> dict:
     if event.get('httpMethod') == 'OPTIONS':
@@ -41,8 +57,7 @@ def handler(event: dict, context) -> dict:
             'body': json.dumps({'error': 'Необходимы game_id и action (offer|accept|decline)'})
         }
 
-    dsn = os.environ.get('DATABASE_URL')
-    conn = psycopg2.connect(dsn)
+    conn = get_connection()
     cur = conn.cursor()
 
     cur.execute("""
@@ -81,17 +96,26 @@ def handler(event: dict, context) -> dict:
 
     # Если принято — завершаем партию ничьей
     if action == 'accept':
+        # Партию могли завершить между чтением и записью (флажок, сдача, мат): тогда ничего не меняем
         cur.execute("""
-            UPDATE t_p91748136_chess_support_world.games
-            SET status = 'draw', winner = 'draw', updated_at = NOW()
-            WHERE id = %s
+            UPDATE t_p91748136_chess_support_world.games g
+            SET status = 'draw', winner = 'draw', updated_at = NOW(),
+                pgn = t_p91748136_chess_support_world.game_pgn(g.id, g.pgn)
+            WHERE g.id = %s AND g.status IN ('active', 'waiting')
+            RETURNING g.pgn, g.tournament_id
         """, (game_id,))
+        updated = cur.fetchone()
 
-        cur.execute("""
-            SELECT tournament_id FROM t_p91748136_chess_support_world.games WHERE id = %s
-        """, (game_id,))
-        t_row = cur.fetchone()
-        tournament_id = t_row[0] if t_row else None
+        if not updated:
+            conn.rollback()
+            cur.close(); conn.close()
+            return {
+                'statusCode': 409,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({'error': 'Игра уже завершена'})
+            }
+
+        pgn, tournament_id = updated
 
         if tournament_id:
             cur.execute("""
@@ -104,13 +128,7 @@ def handler(event: dict, context) -> dict:
 
     cur.close(); conn.close()
 
-    pusher_client = pusher.Pusher(
-        app_id=os.environ['PUSHER_APP_ID'],
-        key=os.environ['PUSHER_KEY'],
-        secret=os.environ['PUSHER_SECRET'],
-        cluster=os.environ['PUSHER_CLUSTER'],
-        ssl=True
-    )
+    pusher_client = get_pusher_client()
 
     if action == 'offer':
         pusher_client.trigger(f'game-{game_id}', 'draw-offer', {
@@ -0,0 +1,122 @@
+import json
+from db import get_connection
+import outbox
+
+def handler(event: dict, context) -> dict:
+    """API для завершения по времени всех активных партий с упавшим флажком (запускается по расписанию)"""
+    
+    method = event.get('httpMethod', 'POST')
+    
+    if method == 'OPTIONS':
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+                'Access-Control-Allow-Headers': 'Content-Type'
+            },
+            'body': '',
+            'isBase64Encoded': False
+        }
+    
+    if method not in ('GET', 'POST'):
+        return {
+            'statusCode': 405,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({'success': False, 'error': 'Method not allowed'}),
+            'isBase64Encoded': False
+        }
+    
+    conn = get_connection()
+    cur = conn.cursor()
+    
+    try:
+        # Один проход по индексу games(status, current_turn, turn_started_at):
+        # у стороны, которая ходит, с момента последнего хода прошло больше её остатка
+        cur.execute("""
+            UPDATE t_p91748136_chess_support_world.games g
+            SET status = 'timeout',
+                winner = CASE WHEN g.current_turn = 'w' THEN 'black' ELSE 'white' END,
+                white_time_ms = CASE WHEN g.current_turn = 'w' THEN 0 ELSE g.white_time_ms END,
+                black_time_ms = CASE WHEN g.current_turn = 'b' THEN 0 ELSE g.black_time_ms END,
+                white_time = CASE WHEN g.current_turn = 'w' THEN 0 ELSE g.white_time END,
+                black_time = CASE WHEN g.current_turn = 'b' THEN 0 ELSE g.black_time END,
+                pgn = t_p91748136_chess_support_world.game_pgn(g.id, g.pgn),
+                updated_at = NOW()
+            WHERE g.status = 'active'
+            AND (
+                (g.current_turn = 'w' AND g.turn_started_at <= NOW() - g.white_time_ms * INTERVAL '1 millisecond')
+                OR (g.current_turn = 'b' AND g.turn_started_at <= NOW() - g.black_time_ms * INTERVAL '1 millisecond')
+            )
+            RETURNING g.id, g.tournament_id, g.fen, g.pgn, g.ply, g.current_turn, g.winner,
+                      g.white_time_ms, g.black_time_ms
+        """)
+        
+        expired = cur.fetchall()
+        
+        tournament_ids = set()
+        event_ids = []
+        if expired:
+            cur.execute("""
+                UPDATE t_p91748136_chess_support_world.tournament_pairings tp
+                SET result = CASE WHEN g.winner = 'white' THEN '1-0' ELSE '0-1' END
+                FROM t_p91748136_chess_support_world.games g
+                WHERE tp.game_id = g.id AND g.id = ANY(%s) AND tp.result IS NULL
+            """, ([row[0] for row in expired],))
+            
+            tournament_ids = {row[1] for row in expired if row[1]}
+            
+            # События о завершении партий пишутся в outbox той же транзакцией и отправляются сразу после commit;
+            # outbox-dispatcher повторяет только неотправленные. Проверки туров ставит триггер (V0047)
+            events = []
+            for game_id, _, fen, pgn, ply, current_turn, winner, white_ms, black_ms in expired:
+                events.append(('pusher', f'game-{game_id}', 'move', json.dumps({
+                    'fen': fen,
+                    'ply': ply,
+                    'pgn': pgn,
+                    'current_turn': current_turn,
+                    'status': 'timeout',
+                    'winner': winner,
+                    'white_time': white_ms // 1000,
+                    'black_time': black_ms // 1000,
+                    'white_time_ms': white_ms,
+                    'black_time_ms': black_ms
+                })))
+            
+            event_ids = outbox.enqueue(cur, events)
+        
+        conn.commit()
+        cur.close()
+        outbox.send_now(conn, event_ids)
+        conn.close()
+        
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({
+                'success': True,
+                'finished_games': [row[0] for row in expired],
+                'tournaments_checked': sorted(tournament_ids)
+            }),
+            'isBase64Encoded': False
+        }
+        
+    except Exception as e:
+        conn.rollback()
+        cur.close()
+        conn.close()
+        return {
+            'statusCode': 500,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({'success': False, 'error': str(e)}),
+            'isBase64Encoded': False
+        }
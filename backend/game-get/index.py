@@ -5,9 +5,14 @@ Returns: HTTP response with game state (fen, pgn, players, status, time)
 '''
 
 import json
-import psycopg2
-import os
 from typing import Dict, Any
+from db import get_connection
+
+# Пока партия идёт, PGN собирается из журнала game_moves при чтении
+PGN_SQL = '''CASE
+    WHEN g.status IN ('checkmate', 'stalemate', 'draw', 'resignation', 'timeout', 'finished') THEN g.pgn
+    ELSE t_p91748136_chess_support_world.game_pgn(g.id, g.pgn)
+END'''
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
@@ -43,16 +48,17 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'isBase64Encoded': False
         }
     
-    dsn = os.environ.get('DATABASE_URL')
-    conn = psycopg2.connect(dsn)
+    conn = get_connection()
     cursor = conn.cursor()
     
-    cursor.execute("""
-        SELECT g.id, g.fen, g.pgn, g.white_player_id, g.black_player_id, 
+    cursor.execute(f"""
+        SELECT g.id, g.fen, {PGN_SQL}, g.white_player_id, g.black_player_id, 
                g.current_turn, g.status, g.winner, g.tournament_id,
                w.full_name as white_name, w.last_name as white_last_name, w.ms_rating as white_rating,
                b.full_name as black_name, b.last_name as black_last_name, b.ms_rating as black_rating,
-               g.time_control, g.white_time, g.black_time
+               g.time_control, g.white_time, g.black_time, g.ply,
+               g.white_time_ms, g.black_time_ms,
+               (EXTRACT(EPOCH FROM (NOW() - g.turn_started_at)) * 1000)::BIGINT
         FROM t_p91748136_chess_support_world.games g
         LEFT JOIN t_p91748136_chess_support_world.users w ON g.white_player_id = w.id
         LEFT JOIN t_p91748136_chess_support_world.users b ON g.black_player_id = b.id
@@ -71,6 +77,14 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'isBase64Encoded': False
         }
     
+    # Часы стороны, которая ходит, идут с момента последнего хода (turn_started_at)
+    white_ms, black_ms, elapsed_ms = row[19], row[20], row[21]
+    if row[6] == 'active' and white_ms is not None and black_ms is not None:
+        if row[5] == 'w':
+            white_ms = max(white_ms - elapsed_ms, 0)
+        else:
+            black_ms = max(black_ms - elapsed_ms, 0)
+    
     white_full_name = f"{row[10]} {row[9]}" if row[10] and row[9] else (row[9] or 'Игрок 1')
     black_full_name = f"{row[13]} {row[12]}" if row[13] and row[12] else (row[12] or 'Игрок 2')
     
@@ -89,8 +103,11 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         'white_player_rating': row[11],
         'black_player_rating': row[14],
         'time_control': row[15],
-        'white_time': row[16],
-        'black_time': row[17]
+        'white_time': white_ms // 1000 if white_ms is not None else row[16],
+        'black_time': black_ms // 1000 if black_ms is not None else row[17],
+        'white_time_ms': white_ms,
+        'black_time_ms': black_ms,
+        'ply': row[18]
     }
     
     return {
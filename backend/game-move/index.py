@@ -1,16 +1,86 @@
 '''
-Business: Make a move in online chess game, update time clocks
-Args: event with httpMethod, body (game_id, move, white_time, black_time), headers (X-User-Id)
+Business: Make a move in online chess game, update time clocks on the server
+Args: event with httpMethod, body (game_id, move in UCI/SAN + from_fen, or legacy fen/status, or status='timeout' to claim a flag; optional expected ply), headers (X-User-Id)
 Returns: HTTP response with updated game state
 '''
 
 import json
 import psycopg2
-import os
-from typing import Dict, Any
-import urllib.request
-import chess
-import pusher
+from typing import Dict, Any, Optional, Tuple, TYPE_CHECKING
+from db import get_connection
+import outbox
+
+# python-chess импортируется лениво, только там, где разбирается ход: OPTIONS, отказы
+# авторизации и заявки на просрочку времени обходятся без него
+if TYPE_CHECKING:
+    import chess
+
+TERMINAL_STATUSES = ('checkmate', 'stalemate', 'draw', 'resignation', 'timeout')
+
+def parse_move(board: 'chess.Board', move_text: str) -> Optional['chess.Move']:
+    """Разбирает ход в нотации UCI или SAN, для нелегального хода возвращает None"""
+    import chess
+    try:
+        move = chess.Move.from_uci(move_text)
+    except ValueError:
+        move = None
+    
+    if move is not None:
+        return move if board.is_legal(move) else None
+    
+    try:
+        return board.parse_san(move_text)
+    except ValueError:
+        return None
+
+def same_position(fen_a: str, fen_b: str) -> bool:
+    """Сравнивает расстановку, очередь хода и права на рокировку двух FEN"""
+    return fen_a.split()[:3] == fen_b.split()[:3]
+
+def load_board(cursor, game_id: str, fen: Optional[str], db_ply: int) -> 'chess.Board':
+    """Восстанавливает доску с историей ходов из game_moves, чтобы ловить повторение позиции.
+    Если журнал неполный (партия началась до game_moves), доска строится только по FEN.
+    Для испорченного FEN бросает ValueError"""
+    import chess
+    board = chess.Board(fen or chess.STARTING_FEN)
+    
+    cursor.execute("""
+        SELECT uci FROM t_p91748136_chess_support_world.game_moves
+        WHERE game_id = %s
+        ORDER BY ply
+    """, (game_id,))
+    moves = [r[0] for r in cursor.fetchall()]
+    if not moves or len(moves) != db_ply or None in moves:
+        return board
+    
+    replayed = chess.Board()
+    try:
+        for uci in moves:
+            replayed.push_uci(uci)
+    except ValueError:
+        return board
+    return replayed if same_position(replayed.fen(), board.fen()) else board
+
+def game_outcome(board: 'chess.Board') -> Tuple[str, Optional[str]]:
+    """Определяет статус партии и победителя по позиции после хода"""
+    import chess
+    if board.is_checkmate():
+        return 'checkmate', 'black' if board.turn == chess.WHITE else 'white'
+    if board.is_stalemate():
+        return 'stalemate', 'draw'
+    if board.is_insufficient_material() or board.is_fifty_moves() or board.is_repetition(3):
+        return 'draw', 'draw'
+    return 'active', None
+
+def charge_clock(white_ms: int, black_ms: int, white_to_move: bool,
+                 elapsed_ms: int, increment_ms: int) -> Tuple[int, int, bool]:
+    """Списывает прошедшее время с часов стороны, которая ходит, и добавляет ей инкремент.
+    Возвращает новые остатки белых и чёрных в мс и признак упавшего флажка"""
+    left = (white_ms if white_to_move else black_ms) - elapsed_ms
+    if left <= 0:
+        return (0, black_ms, True) if white_to_move else (white_ms, 0, True)
+    left += increment_ms
+    return (left, black_ms, False) if white_to_move else (white_ms, left, False)
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
@@ -48,28 +118,41 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     
     body_data = json.loads(event.get('body', '{}'))
     game_id = body_data.get('game_id')
+    move_text = (body_data.get('move') or '').strip()
+    from_fen = body_data.get('from_fen')
     new_fen = body_data.get('fen')
-    pgn = body_data.get('pgn')
     current_turn = body_data.get('current_turn')
     status = body_data.get('status', 'active')
     winner = body_data.get('winner')
-    white_time = body_data.get('white_time')  # оставшееся время белых в секундах
-    black_time = body_data.get('black_time')  # оставшееся время чёрных в секундах
+    expected_ply = body_data.get('ply')
+    claim_timeout = not move_text and status == 'timeout'
     
-    if not game_id or not new_fen:
+    if not game_id or not (move_text or new_fen or claim_timeout):
         return {
             'statusCode': 400,
             'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'Не указаны game_id или fen'}),
+            'body': json.dumps({'error': 'Не указаны game_id и move (или fen)'}),
             'isBase64Encoded': False
         }
     
-    dsn = os.environ.get('DATABASE_URL')
-    conn = psycopg2.connect(dsn)
+    if expected_ply is not None:
+        try:
+            expected_ply = int(expected_ply)
+        except (TypeError, ValueError):
+            return {
+                'statusCode': 400,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({'error': 'ply должен быть целым числом'}),
+                'isBase64Encoded': False
+            }
+    
+    conn = get_connection()
     cursor = conn.cursor()
     
     cursor.execute("""
-        SELECT white_player_id, black_player_id, status, fen, current_turn
+        SELECT white_player_id, black_player_id, status, fen, current_turn, ply,
+               white_time_ms, black_time_ms, increment_ms,
+               (EXTRACT(EPOCH FROM (NOW() - turn_started_at)) * 1000)::BIGINT
         FROM t_p91748136_chess_support_world.games
         WHERE id = %s
     """, (game_id,))
@@ -86,7 +169,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'isBase64Encoded': False
         }
     
-    white_id, black_id, game_status, old_fen, db_current_turn = row
+    white_id, black_id, game_status, old_fen, db_current_turn, db_ply, white_ms, black_ms, increment_ms, elapsed_ms = row
     user_id_int = int(user_id)
     
     # ВАЛИДАЦИЯ 1: Игра должна быть активной
@@ -100,8 +183,29 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'isBase64Encoded': False
         }
     
-    # ВАЛИДАЦИЯ 2: Проверка права хода
-    if game_status == 'active':
+    # Клиент может прислать номер полухода, от которого он ходит
+    if expected_ply is not None and expected_ply != db_ply:
+        cursor.close()
+        conn.close()
+        return {
+            'statusCode': 409,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'Позиция уже изменилась, обновите партию', 'fen': old_fen, 'ply': db_ply}),
+            'isBase64Encoded': False
+        }
+    
+    # ВАЛИДАЦИЯ 2: Проверка права хода (о падении флажка может заявить любой из игроков)
+    if claim_timeout:
+        if user_id_int not in (white_id, black_id):
+            cursor.close()
+            conn.close()
+            return {
+                'statusCode': 403,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({'error': 'Вы не участник этой партии'}),
+                'isBase64Encoded': False
+            }
+    elif game_status == 'active':
         if db_current_turn == 'w' and user_id_int != white_id:
             cursor.close()
             conn.close()
@@ -121,11 +225,88 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'isBase64Encoded': False
             }
     
-    # ВАЛИДАЦИЯ 3: Проверка легальности хода через python-chess
-    if game_status == 'active' and old_fen:
+    # Часы ведёт сервер: время стороны, которая ходит, считается от turn_started_at,
+    # присланные клиентом остатки не принимаются
+    flagged = False
+    if game_status == 'active' and white_ms is not None and black_ms is not None:
+        white_ms, black_ms, flagged = charge_clock(
+            white_ms, black_ms, db_current_turn == 'w', elapsed_ms, increment_ms or 0
+        )
+    
+    # ВАЛИДАЦИЯ 3: Ход в UCI/SAN разбирается один раз и проверяется через Board.is_legal,
+    # новая позиция и статус партии вычисляются на сервере
+    uci = None
+    san = None
+    ply = None
+    if flagged:
+        # Флажок упал раньше, чем пришёл ход: ход не засчитывается
+        new_fen = old_fen
+        current_turn = db_current_turn
+        status = 'timeout'
+        winner = 'black' if db_current_turn == 'w' else 'white'
+    
+    elif claim_timeout:
+        cursor.close()
+        conn.close()
+        return {
+            'statusCode': 409,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({
+                'error': 'Время ещё не истекло',
+                'white_time_ms': white_ms,
+                'black_time_ms': black_ms
+            }),
+            'isBase64Encoded': False
+        }
+    
+    elif move_text:
+        import chess
+        try:
+            board = load_board(cursor, game_id, old_fen, db_ply)
+        except ValueError:
+            cursor.close()
+            conn.close()
+            return {
+                'statusCode': 409,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({'error': 'Позиция партии повреждена'}),
+                'isBase64Encoded': False
+            }
+        
+        if from_fen and not same_position(from_fen, board.fen()):
+            cursor.close()
+            conn.close()
+            return {
+                'statusCode': 409,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({'error': 'Позиция устарела', 'fen': board.fen()}),
+                'isBase64Encoded': False
+            }
+        
+        move = parse_move(board, move_text)
+        if move is None:
+            cursor.close()
+            conn.close()
+            return {
+                'statusCode': 400,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({'error': 'Некорректный ход'}),
+                'isBase64Encoded': False
+            }
+        
+        uci = move.uci()
+        san = board.san(move)
+        board.push(move)
+        ply = db_ply + 1
+        new_fen = board.fen()
+        current_turn = 'w' if board.turn == chess.WHITE else 'b'
+        status, winner = game_outcome(board)
+    
+    # Режим совместимости: клиент присылает готовый FEN, ищем ход перебором
+    elif old_fen:
+        import chess
         try:
             old_board = chess.Board(old_fen)
-            new_board = chess.Board(new_fen)
             
             move_found = False
             for legal_move in old_board.legal_moves:
@@ -133,6 +314,9 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 test_board.push(legal_move)
                 if test_board.fen() == new_fen:
                     move_found = True
+                    uci = legal_move.uci()
+                    san = old_board.san(legal_move)
+                    ply = db_ply + 1
                     break
             
             if not move_found:
@@ -162,30 +346,51 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         """, (user_id_int, game_id))
         conn.commit()
     
-    # Обновляем позицию и время
-    if white_time is not None and black_time is not None:
-        cursor.execute("""
-            UPDATE t_p91748136_chess_support_world.games
-            SET fen = %s, pgn = %s, current_turn = %s, status = %s, winner = %s,
-                white_time = %s, black_time = %s, updated_at = NOW()
-            WHERE id = %s
-        """, (new_fen, pgn or '', current_turn, status, winner, int(white_time), int(black_time), game_id))
-    else:
+    # Обновляем позицию и время; PGN целиком не переписываем,
+    # ход дописывается одной строкой в журнал game_moves.
+    # Оптимистичная блокировка: запись проходит, только если ply не изменился с момента чтения,
+    # повторный или устаревший запрос отклоняется без удержания блокировок строки
+    white_time = white_ms // 1000 if white_ms is not None else None
+    black_time = black_ms // 1000 if black_ms is not None else None
+    game_over = status in TERMINAL_STATUSES
+    try:
+        if uci:
+            cursor.execute("""
+                INSERT INTO t_p91748136_chess_support_world.game_moves (game_id, ply, uci, san, clock_ms)
+                VALUES (%s, %s, %s, %s, %s)
+            """, (game_id, ply, uci, san, white_ms if ply % 2 == 1 else black_ms))
+        
+        # По окончании партии тем же запросом собираем полный PGN из журнала ходов
         cursor.execute("""
-            UPDATE t_p91748136_chess_support_world.games
-            SET fen = %s, pgn = %s, current_turn = %s, status = %s, winner = %s, updated_at = NOW()
-            WHERE id = %s
-        """, (new_fen, pgn or '', current_turn, status, winner, game_id))
+            UPDATE t_p91748136_chess_support_world.games g
+            SET fen = %s, ply = COALESCE(%s, g.ply), current_turn = %s, status = %s, winner = %s,
+                white_time_ms = %s, black_time_ms = %s, white_time = %s, black_time = %s, updated_at = NOW(),
+                turn_started_at = CASE WHEN %s IS DISTINCT FROM g.current_turn THEN NOW() ELSE g.turn_started_at END,
+                pgn = CASE WHEN %s THEN t_p91748136_chess_support_world.game_pgn(g.id, g.pgn) ELSE g.pgn END
+            WHERE g.id = %s AND g.ply = %s AND g.status IN ('active', 'waiting')
+            RETURNING g.tournament_id, g.pgn
+        """, (new_fen, ply, current_turn, status, winner, white_ms, black_ms, white_time, black_time,
+              current_turn, game_over, game_id, db_ply))
+        updated = cursor.fetchone()
+    except psycopg2.IntegrityError:
+        updated = None
     
-    cursor.execute("""
-        SELECT tournament_id FROM t_p91748136_chess_support_world.games WHERE id = %s
-    """, (game_id,))
+    if not updated:
+        conn.rollback()
+        cursor.close()
+        conn.close()
+        return {
+            'statusCode': 409,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'Позиция уже изменилась, обновите партию'}),
+            'isBase64Encoded': False
+        }
     
-    tournament_row = cursor.fetchone()
-    tournament_id = tournament_row[0] if tournament_row else None
+    tournament_id = updated[0]
+    pgn = updated[1] if game_over else None
     
     # Обновляем результат в tournament_pairings если игра турнирная и завершена
-    if tournament_id and status in ['checkmate', 'stalemate', 'draw', 'resignation', 'timeout']:
+    if tournament_id and game_over:
         result = None
         if winner == 'white':
             result = '1-0'
@@ -201,64 +406,52 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 WHERE game_id = %s
             """, (result, game_id))
     
+    # Событие о ходе (включая текущее время) пишется в outbox той же транзакцией и отправляется в Pusher сразу
+    # после commit; outbox-dispatcher повторяет только неотправленные. Проверку тура ставит триггер (миграция V0047)
+    pusher_data = {
+        'fen': new_fen,
+        'ply': ply,
+        'move': uci,
+        'san': san,
+        'current_turn': current_turn,
+        'status': status,
+        'winner': winner
+    }
+    if pgn is not None:
+        pusher_data['pgn'] = pgn
+    if white_ms is not None and black_ms is not None:
+        pusher_data['white_time'] = white_time
+        pusher_data['black_time'] = black_time
+        pusher_data['white_time_ms'] = white_ms
+        pusher_data['black_time_ms'] = black_ms
+    
+    events = [('pusher', f'game-{game_id}', 'move', json.dumps(pusher_data))]
+    
+    event_ids = outbox.enqueue(cursor, events)
+    
     conn.commit()
     cursor.close()
+    outbox.send_now(conn, event_ids)
     conn.close()
     
-    # Отправляем событие в Pusher о ходе (включая текущее время)
-    try:
-        print(f'[PUSHER] Начинаю отправку события для игры {game_id}')
-        pusher_client = pusher.Pusher(
-            app_id=os.environ['PUSHER_APP_ID'],
-            key=os.environ['PUSHER_KEY'],
-            secret=os.environ['PUSHER_SECRET'],
-            cluster=os.environ['PUSHER_CLUSTER'],
-            ssl=True
-        )
-        print(f'[PUSHER] Клиент создан, отправляю на канал game-{game_id}')
-        
-        pusher_data = {
-            'fen': new_fen,
-            'pgn': pgn or '',
-            'current_turn': current_turn,
-            'status': status,
-            'winner': winner
-        }
-        if white_time is not None and black_time is not None:
-            pusher_data['white_time'] = int(white_time)
-            pusher_data['black_time'] = int(black_time)
-        
-        result = pusher_client.trigger(f'game-{game_id}', 'move', pusher_data)
-        print(f'[PUSHER] Событие отправлено! Результат: {result}')
-    except Exception as e:
-        print(f'[PUSHER] Ошибка отправки: {e}')
-        import traceback
-        print(f'[PUSHER] Traceback: {traceback.format_exc()}')
-    
-    if tournament_id and status in ['checkmate', 'stalemate', 'draw', 'resignation', 'timeout']:
-        try:
-            check_url = os.environ.get('TOURNAMENT_CHECK_URL', 'https://functions.poehali.dev/cb616011-7fdb-4eb7-8e58-948329b28419')
-            check_data = json.dumps({'tournament_id': tournament_id}).encode('utf-8')
-            check_req = urllib.request.Request(
-                check_url,
-                data=check_data,
-                headers={'Content-Type': 'application/json'},
-                method='POST'
-            )
-            urllib.request.urlopen(check_req, timeout=5)
-        except Exception as e:
-            print(f'[AUTO-CHECK] Ошибка: {e}')
-    
     return {
         'statusCode': 200,
         'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
         'body': json.dumps({
             'success': True,
             'game_id': game_id,
+            'fen': new_fen,
+            'ply': ply,
+            'pgn': pgn,
+            'current_turn': current_turn,
+            'move': uci,
+            'san': san,
             'status': status,
             'winner': winner,
             'white_time': white_time,
-            'black_time': black_time
+            'black_time': black_time,
+            'white_time_ms': white_ms,
+            'black_time_ms': black_ms
         }),
         'isBase64Encoded': False
     }
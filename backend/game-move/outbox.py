@@ -0,0 +1,91 @@
+'''
+События в event_outbox: запись в транзакции изменения и отправка в Pusher сразу после commit.
+Отправка после commit — основной путь доставки; строка, которую не удалось отправить, остаётся в outbox,
+и её повторяет outbox-dispatcher по расписанию. Событие канала не отправляется сразу, если более раннее
+событие того же канала ещё не доставлено: порядок ходов партии сохраняет диспетчер.
+Usage: ids = enqueue(cur, events); conn.commit(); send_now(conn, ids)
+'''
+
+import os
+from typing import Any, List, Sequence, Tuple
+
+from psycopg2.extras import execute_values
+
+PUSHER_BATCH_SIZE = 10
+# Те же значения, что у outbox-dispatcher: аренда строки и число попыток
+MAX_ATTEMPTS = 8
+LEASE_SECONDS = 30
+
+_pusher_client = None
+
+
+def get_pusher_client() -> Any:
+    """Клиент Pusher и его HTTPS-сессия создаются один раз на тёплый экземпляр функции;
+    сам модуль pusher (вместе с requests) импортируется только при первой отправке"""
+    global _pusher_client
+    if _pusher_client is None:
+        import pusher
+        _pusher_client = pusher.Pusher(
+            app_id=os.environ['PUSHER_APP_ID'],
+            key=os.environ['PUSHER_KEY'],
+            secret=os.environ['PUSHER_SECRET'],
+            cluster=os.environ['PUSHER_CLUSTER'],
+            ssl=True
+        )
+    return _pusher_client
+
+
+def enqueue(cur: Any, events: Sequence[Tuple[str, Any, Any, str]]) -> List[int]:
+    """События (kind, channel, event, payload JSON) в outbox; id строк нужны send_now после commit"""
+    rows = execute_values(cur, """
+        INSERT INTO t_p91748136_chess_support_world.event_outbox (kind, channel, event, payload)
+        VALUES %s
+        RETURNING id
+    """, events, page_size=len(events), fetch=True)
+    return [row[0] for row in rows]
+
+
+def send_now(conn: Any, ids: List[int]) -> None:
+    """Отправляет записанные события в Pusher без ожидания диспетчера. Ошибки не поднимаются:
+    изменение уже зафиксировано, а неотправленное событие повторит outbox-dispatcher"""
+    if not ids:
+        return
+    cur = conn.cursor()
+    try:
+        # Аренда как у диспетчера: строку, которую он уже взял, здесь не отправить, и наоборот
+        cur.execute("""
+            UPDATE t_p91748136_chess_support_world.event_outbox o
+            SET attempts = attempts + 1, next_attempt_at = NOW() + %s * INTERVAL '1 second'
+            WHERE o.id = ANY(%s) AND o.kind = 'pusher' AND o.sent_at IS NULL AND o.next_attempt_at <= NOW()
+            AND NOT EXISTS (
+                SELECT 1 FROM t_p91748136_chess_support_world.event_outbox p
+                WHERE p.channel = o.channel AND p.id < o.id AND p.id <> ALL(%s)
+                AND p.sent_at IS NULL AND p.attempts < %s
+            )
+            RETURNING o.id, o.channel, o.event, o.payload
+        """, (LEASE_SECONDS, ids, ids, MAX_ATTEMPTS))
+        rows = sorted(cur.fetchall())
+        conn.commit()
+
+        for start in range(0, len(rows), PUSHER_BATCH_SIZE):
+            chunk = rows[start:start + PUSHER_BATCH_SIZE]
+            chunk_ids = [row[0] for row in chunk]
+            try:
+                get_pusher_client().trigger_batch([
+                    {'channel': channel, 'name': event, 'data': payload}
+                    for _, channel, event, payload in chunk
+                ])
+                cur.execute("""
+                    UPDATE t_p91748136_chess_support_world.event_outbox SET sent_at = NOW(), last_error = NULL WHERE id = ANY(%s)
+                """, (chunk_ids,))
+            except Exception as e:
+                print(f'[PUSHER] Ошибка отправки, событие повторит outbox-dispatcher: {e}')
+                cur.execute("""
+                    UPDATE t_p91748136_chess_support_world.event_outbox SET next_attempt_at = NOW(), last_error = %s WHERE id = ANY(%s)
+                """, (str(e)[:500], chunk_ids))
+            conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f'[OUTBOX] Отправка после commit не удалась, событие повторит outbox-dispatcher: {e}')
+    finally:
+        cur.close()
@@ -6,9 +6,8 @@ Returns: JSON response with success status
 '''
 
 import json
-import os
-import psycopg2
 from typing import Dict, Any
+from db import get_connection
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
@@ -40,8 +39,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'isBase64Encoded': False
         }
     
-    database_url = os.environ.get('DATABASE_URL')
-    conn = psycopg2.connect(database_url)
+    conn = get_connection()
     cur = conn.cursor()
     
     token_escaped = auth_token.replace("'", "''")
@@ -7,8 +7,8 @@ Returns: HTTP response with list of news articles
 
 import json
 import os
-import psycopg2
 from typing import Dict, Any, List
+from db import get_connection
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
@@ -43,7 +43,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'body': json.dumps({'error': 'Database URL not configured'})
         }
     
-    conn = psycopg2.connect(database_url)
+    conn = get_connection()
     cursor = conn.cursor()
     
     cursor.execute('''
@@ -7,9 +7,9 @@ Returns: HTTP response with success/error message
 
 import json
 import os
-import psycopg2
 from typing import Dict, Any
 from datetime import datetime
+from db import get_connection
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
@@ -44,7 +44,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'body': json.dumps({'error': 'Database URL not configured'})
         }
     
-    conn = psycopg2.connect(database_url)
+    conn = get_connection()
     cursor = conn.cursor()
     
     cursor.execute('SELECT is_admin FROM users WHERE id = %s', (user_id,))
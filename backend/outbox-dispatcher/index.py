@@ -0,0 +1,214 @@
+import json
+import os
+import time
+import urllib.request
+from typing import Any, Dict, List, Set, Tuple
+import pusher
+from db import get_connection
+
+BATCH_SIZE = 100
+PUSHER_BATCH_SIZE = 10
+MAX_ATTEMPTS = 8
+LEASE_SECONDS = 30
+# Один вызов разбирает полные пачки подряд, но не дольше этого, чтобы уложиться в таймаут функции
+RUN_BUDGET_SECONDS = float(os.environ.get('OUTBOX_RUN_BUDGET_SECONDS', '20'))
+
+_pusher_client = None
+
+def get_pusher_client() -> pusher.Pusher:
+    """Клиент Pusher создаётся один раз на тёплый экземпляр функции"""
+    global _pusher_client
+    if _pusher_client is None:
+        _pusher_client = pusher.Pusher(
+            app_id=os.environ['PUSHER_APP_ID'],
+            key=os.environ['PUSHER_KEY'],
+            secret=os.environ['PUSHER_SECRET'],
+            cluster=os.environ['PUSHER_CLUSTER'],
+            ssl=True
+        )
+    return _pusher_client
+
+def claim_batch(cur) -> List[Tuple[Any, ...]]:
+    """Забирает пачку готовых к отправке событий; аренда сдвигает next_attempt_at,
+    поэтому параллельный диспетчер эти строки не возьмёт.
+    Событие канала не берётся, пока более раннее событие того же канала ждёт повтора или в аренде:
+    так ходы одной партии уходят в Pusher строго по порядку"""
+    cur.execute("""
+        UPDATE t_p91748136_chess_support_world.event_outbox
+        SET attempts = attempts + 1, next_attempt_at = NOW() + %s * INTERVAL '1 second'
+        WHERE id IN (
+            SELECT o.id FROM t_p91748136_chess_support_world.event_outbox o
+            WHERE o.sent_at IS NULL AND o.attempts < %s AND o.next_attempt_at <= NOW()
+            AND NOT EXISTS (
+                SELECT 1 FROM t_p91748136_chess_support_world.event_outbox p
+                WHERE p.channel = o.channel AND p.id < o.id
+                AND p.sent_at IS NULL AND p.attempts < %s AND p.next_attempt_at > NOW()
+            )
+            ORDER BY o.id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id, kind, channel, event, payload, attempts
+    """, (LEASE_SECONDS, MAX_ATTEMPTS, MAX_ATTEMPTS, BATCH_SIZE))
+    return sorted(cur.fetchall(), key=lambda row: (row[2] or '', row[0]))
+
+def deliver(rows: List[Tuple[Any, ...]]) -> Tuple[List[int], Dict[int, str], List[int]]:
+    """Отправляет события: Pusher пачками через trigger_batch, проверки тура по одной на турнир.
+    После первой неудачи в канале его более поздние события не отправляются, а откладываются.
+    Возвращает id доставленных событий, ошибки недоставленных и id отложенных"""
+    sent: List[int] = []
+    failed: Dict[int, str] = {}
+    held: List[int] = []
+    failed_channels: Set[str] = set()
+    
+    # rows отсортированы по (channel, id): события канала идут подряд и по порядку
+    pusher_rows = [row for row in rows if row[1] == 'pusher']
+    while pusher_rows:
+        chunk = pusher_rows[:PUSHER_BATCH_SIZE]
+        pusher_rows = pusher_rows[PUSHER_BATCH_SIZE:]
+        held.extend(row[0] for row in chunk if row[2] in failed_channels)
+        chunk = [row for row in chunk if row[2] not in failed_channels]
+        if not chunk:
+            continue
+        try:
+            get_pusher_client().trigger_batch([
+                {'channel': channel, 'name': event, 'data': payload}
+                for _, _, channel, event, payload, _ in chunk
+            ])
+            sent.extend(row[0] for row in chunk)
+        except Exception as e:
+            print(f'[PUSHER] Ошибка отправки: {e}')
+            failed.update({row[0]: str(e) for row in chunk})
+            failed_channels.update(row[2] for row in chunk)
+    
+    check_rows: Dict[int, List[int]] = {}
+    for row in rows:
+        if row[1] == 'tournament-check':
+            check_rows.setdefault(row[4]['tournament_id'], []).append(row[0])
+    
+    check_url = os.environ.get('TOURNAMENT_CHECK_URL', 'https://functions.poehali.dev/cb616011-7fdb-4eb7-8e58-948329b28419')
+    for tournament_id, ids in check_rows.items():
+        try:
+            check_req = urllib.request.Request(
+                check_url,
+                data=json.dumps({'tournament_id': tournament_id}).encode('utf-8'),
+                headers={'Content-Type': 'application/json'},
+                method='POST'
+            )
+            urllib.request.urlopen(check_req, timeout=5)
+            sent.extend(ids)
+        except Exception as e:
+            print(f'[AUTO-CHECK] Ошибка: {e}')
+            failed.update({event_id: str(e) for event_id in ids})
+    
+    for row in rows:
+        if row[1] not in ('pusher', 'tournament-check'):
+            failed[row[0]] = f'Неизвестный тип события: {row[1]}'
+    
+    return sent, failed, held
+
+def handler(event: dict, context) -> dict:
+    """API для отправки событий из outbox: Pusher и проверка завершения тура, с повторами и экспоненциальной паузой"""
+    
+    method = event.get('httpMethod', 'POST')
+    
+    if method == 'OPTIONS':
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+                'Access-Control-Allow-Headers': 'Content-Type'
+            },
+            'body': '',
+            'isBase64Encoded': False
+        }
+    
+    if method not in ('GET', 'POST'):
+        return {
+            'statusCode': 405,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({'success': False, 'error': 'Method not allowed'}),
+            'isBase64Encoded': False
+        }
+    
+    conn = get_connection()
+    conn.autocommit = True
+    cur = conn.cursor()
+    
+    try:
+        # Вызов разбирает очередь и завершается; запускается по расписанию (backend/schedules.json)
+        deadline = time.monotonic() + RUN_BUDGET_SECONDS
+        total_sent = 0
+        total_failed = 0
+        
+        while True:
+            rows = claim_batch(cur)
+            if not rows:
+                break
+            
+            sent, failed, held = deliver(rows)
+            
+            if sent:
+                cur.execute("""
+                    UPDATE t_p91748136_chess_support_world.event_outbox
+                    SET sent_at = NOW(), last_error = NULL
+                    WHERE id = ANY(%s)
+                """, (sent,))
+            
+            # Повтор через 2^attempts секунд, но не реже чем раз в 5 минут
+            for event_id, error in failed.items():
+                cur.execute("""
+                    UPDATE t_p91748136_chess_support_world.event_outbox
+                    SET next_attempt_at = NOW() + LEAST(POWER(2, attempts), 300) * INTERVAL '1 second',
+                        last_error = %s
+                    WHERE id = %s
+                """, (error[:500], event_id))
+            
+            # Отложенные события попытку не тратят: их возьмёт следующий проход после более раннего события канала
+            if held:
+                cur.execute("""
+                    UPDATE t_p91748136_chess_support_world.event_outbox
+                    SET attempts = attempts - 1, next_attempt_at = NOW()
+                    WHERE id = ANY(%s)
+                """, (held,))
+            
+            total_sent += len(sent)
+            total_failed += len(failed)
+            
+            if len(rows) < BATCH_SIZE or time.monotonic() >= deadline:
+                break
+        
+        cur.close()
+        conn.close()
+        
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({
+                'success': True,
+                'sent': total_sent,
+                'failed': total_failed
+            }),
+            'isBase64Encoded': False
+        }
+        
+    except Exception as e:
+        conn.rollback()
+        cur.close()
+        conn.close()
+        return {
+            'statusCode': 500,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({'success': False, 'error': str(e)}),
+            'isBase64Encoded': False
+        }
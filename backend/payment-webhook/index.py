@@ -10,6 +10,7 @@ from typing import Dict, Any
 
 try:
     import psycopg2
+    from db import get_connection
 except ImportError:
     psycopg2 = None
 
@@ -83,10 +84,9 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'isBase64Encoded': False
             }
         
-        database_url = os.environ.get('DATABASE_URL')
         schema = os.environ.get('MAIN_DB_SCHEMA', 't_p91748136_chess_support_world')
         
-        conn = psycopg2.connect(database_url)
+        conn = get_connection()
         conn.autocommit = True
         cursor = conn.cursor()
         
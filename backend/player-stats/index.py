@@ -4,8 +4,7 @@
 """
 
 import json
-import os
-import psycopg2
+from db import get_connection
 
 
 def handler(event: dict, context) -> dict:
@@ -30,7 +29,7 @@ def handler(event: dict, context) -> dict:
             'body': json.dumps({'error': 'Не авторизован'})
         }
 
-    conn = psycopg2.connect(os.environ['DATABASE_URL'])
+    conn = get_connection()
     cur = conn.cursor()
 
     cur.execute("""
@@ -0,0 +1,184 @@
+import json
+import os
+import time
+from typing import Any, Callable, Dict, List, Tuple
+from db import get_connection
+from swiss import load_players, pair_round, save_round, DEFAULT_PAIRING_METHOD
+
+BATCH_SIZE = 20
+MAX_ATTEMPTS = 5
+LEASE_SECONDS = 120
+# Один вызов разбирает полные пачки подряд, но не дольше этого, чтобы уложиться в таймаут функции
+RUN_BUDGET_SECONDS = float(os.environ.get('JOBS_RUN_BUDGET_SECONDS', '20'))
+
+def claim_due(cur) -> List[Tuple[Any, ...]]:
+    """Забирает задачи, время которых пришло; аренда сдвигает run_at, поэтому
+    параллельный обработчик эти строки не возьмёт, а упавший отпустит их через LEASE_SECONDS.
+    Задача, чья последняя попытка оборвалась вместе с обработчиком, закрывается с ошибкой, как упавшая"""
+    cur.execute("""
+        UPDATE t_p91748136_chess_support_world.scheduled_jobs
+        SET finished_at = NOW(), last_error = COALESCE(last_error, 'Последняя попытка не завершилась')
+        WHERE finished_at IS NULL AND attempts >= %s AND run_at <= NOW()
+    """, (MAX_ATTEMPTS,))
+    cur.execute("""
+        UPDATE t_p91748136_chess_support_world.scheduled_jobs
+        SET attempts = attempts + 1, run_at = NOW() + %s * INTERVAL '1 second'
+        WHERE id IN (
+            SELECT id FROM t_p91748136_chess_support_world.scheduled_jobs
+            WHERE finished_at IS NULL AND attempts < %s AND run_at <= NOW()
+            ORDER BY run_at
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id, kind, dedupe_key, payload, attempts
+    """, (LEASE_SECONDS, MAX_ATTEMPTS, BATCH_SIZE))
+    return cur.fetchall()
+
+def start_next_round(cur, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Жеребьёвка и создание тура round_number; повторный запуск той же задачи тур не дублирует"""
+    tournament_id = payload['tournament_id']
+    round_number = payload['round_number']
+
+    cur.execute("""
+        SELECT status, rounds FROM t_p91748136_chess_support_world.tournaments WHERE id = %s FOR UPDATE
+    """, (tournament_id,))
+    tournament = cur.fetchone()
+    if not tournament or tournament[0] == 'finished' or round_number > tournament[1]:
+        return {'skipped': 'tournament finished or not found'}
+
+    cur.execute("""
+        SELECT 1 FROM t_p91748136_chess_support_world.tournament_rounds
+        WHERE tournament_id = %s AND round_number = %s
+    """, (tournament_id, round_number))
+    if cur.fetchone():
+        return {'skipped': 'round already exists'}
+
+    players = load_players(cur, tournament_id)
+    pairings = pair_round(players, method=payload.get('method') or DEFAULT_PAIRING_METHOD)
+    round_id, _ = save_round(cur, tournament_id, round_number, pairings)
+
+    cur.execute("""
+        UPDATE t_p91748136_chess_support_world.tournaments SET current_round = %s WHERE id = %s
+    """, (round_number, tournament_id))
+
+    return {'round_id': round_id, 'pairings_count': len(pairings)}
+
+JOB_HANDLERS: Dict[str, Callable[[Any, Dict[str, Any]], Dict[str, Any]]] = {
+    'tournament-next-round': start_next_round,
+}
+
+def run_job(conn, job: Tuple[Any, ...]) -> str:
+    """Каждая задача — отдельная транзакция; при ошибке повтор через 2^attempts * 10 секунд.
+    После MAX_ATTEMPTS неудач задача закрывается с last_error и больше не держит свой dedupe_key.
+    Возвращает итог: done, skipped, failed (будет повтор) или dead (попытки кончились)"""
+    job_id, kind, _, payload, attempts = job
+    cur = conn.cursor()
+    try:
+        job_handler = JOB_HANDLERS.get(kind)
+        if job_handler is None:
+            raise ValueError(f'Неизвестный тип задачи: {kind}')
+        result = job_handler(cur, payload)
+        cur.execute("""
+            UPDATE t_p91748136_chess_support_world.scheduled_jobs
+            SET finished_at = NOW(), last_error = NULL
+            WHERE id = %s
+        """, (job_id,))
+        conn.commit()
+        print(f'[JOBS] {kind} #{job_id}: {result}')
+        return 'skipped' if 'skipped' in result else 'done'
+    except Exception as e:
+        conn.rollback()
+        dead = attempts >= MAX_ATTEMPTS
+        print(f'[JOBS] {kind} #{job_id} attempt {attempts} failed{" for good" if dead else ""}: {e}')
+        cur.execute("""
+            UPDATE t_p91748136_chess_support_world.scheduled_jobs
+            SET run_at = NOW() + LEAST(POWER(2, attempts) * 10, 600) * INTERVAL '1 second',
+                finished_at = CASE WHEN %s THEN NOW() END,
+                last_error = %s
+            WHERE id = %s
+        """, (dead, str(e)[:500], job_id))
+        conn.commit()
+        return 'dead' if dead else 'failed'
+    finally:
+        cur.close()
+
+def handler(event: dict, context) -> dict:
+    """API обработчика отложенных задач: выполняет задачи, время которых пришло, и завершается.
+    Запускается по расписанию (backend/schedules.json), поэтому задача стартует не позже чем через период вызова"""
+
+    method = event.get('httpMethod', 'POST')
+
+    if method == 'OPTIONS':
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+                'Access-Control-Allow-Headers': 'Content-Type'
+            },
+            'body': '',
+            'isBase64Encoded': False
+        }
+
+    if method not in ('GET', 'POST'):
+        return {
+            'statusCode': 405,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({'success': False, 'error': 'Method not allowed'}),
+            'isBase64Encoded': False
+        }
+
+    try:
+        deadline = time.monotonic() + RUN_BUDGET_SECONDS
+
+        conn = get_connection()
+        cur = conn.cursor()
+
+        counts = {'done': 0, 'skipped': 0, 'failed': 0, 'dead': 0}
+        # Итоги задач с dedupe_key: по ним видно, что стало с конкретной задачей
+        jobs_by_key: Dict[str, str] = {}
+
+        while True:
+            jobs = claim_due(cur)
+            conn.commit()
+
+            for job in jobs:
+                outcome = run_job(conn, job)
+                counts[outcome] += 1
+                counts['done'] += outcome == 'skipped'
+                if job[2] is not None:
+                    jobs_by_key[job[2]] = outcome
+
+            if len(jobs) < BATCH_SIZE or time.monotonic() >= deadline:
+                break
+
+        cur.close()
+        conn.close()
+
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({
+                'success': True,
+                **counts,
+                'jobs': jobs_by_key
+            }),
+            'isBase64Encoded': False
+        }
+
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({'success': False, 'error': str(e)}),
+            'isBase64Encoded': False
+        }
@@ -6,8 +6,9 @@ Returns: Success message with created round number
 
 import json
 import os
-import psycopg2
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Dict, Any
+from db import get_connection
+from swiss import load_players, pair_round, save_round, PAIRING_METHODS, DEFAULT_PAIRING_METHOD
 
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -45,7 +46,16 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'body': json.dumps({'error': 'DATABASE_URL not configured', 'env_keys': list(os.environ.keys())}),
             'isBase64Encoded': False
         }
-    conn = psycopg2.connect(dsn)
+    method = params.get('method') or DEFAULT_PAIRING_METHOD
+    if method not in PAIRING_METHODS:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'Unknown pairing method'}),
+            'isBase64Encoded': False
+        }
+    
+    conn = get_connection()
     cur = conn.cursor()
     
     try:
@@ -76,35 +86,9 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'isBase64Encoded': False
             }
         
-        # Get participants with their stats
-        cur.execute(f"""
-            SELECT 
-                tr.player_id,
-                COALESCE(SUM(
-                    CASE 
-                        WHEN g.result = '1-0' AND g.white_player_id = tr.player_id THEN 1
-                        WHEN g.result = '0-1' AND g.black_player_id = tr.player_id THEN 1
-                        WHEN g.result = '1/2-1/2' THEN 0.5
-                        ELSE 0
-                    END
-                ), 0) as points,
-                COALESCE(SUM(
-                    CASE 
-                        WHEN g.white_player_id = tr.player_id THEN 1
-                        ELSE 0
-                    END
-                ), 0) as white_count
-            FROM t_p91748136_chess_support_world.tournament_registrations tr
-            LEFT JOIN t_p91748136_chess_support_world.games g ON (g.white_player_id = tr.player_id OR g.black_player_id = tr.player_id)
-                AND g.tournament_id = {tournament_id}
-            WHERE tr.tournament_id = {tournament_id} AND tr.status = 'registered'
-            GROUP BY tr.player_id
-            ORDER BY points DESC, tr.player_id ASC
-        """)
-        
-        participants = cur.fetchall()
+        players = load_players(cur, tournament_id)
         
-        if len(participants) < 2:
+        if len(players) < 2:
             return {
                 'statusCode': 400,
                 'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
@@ -112,90 +96,8 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'isBase64Encoded': False
             }
         
-        # Get previous pairings
-        cur.execute(f"""
-            SELECT white_player_id, black_player_id
-            FROM t_p91748136_chess_support_world.games
-            WHERE tournament_id = {tournament_id}
-        """)
-        previous_pairings = set((w, b) for w, b in cur.fetchall())
-        
-        # Create pairings
-        pairings = []
-        paired = set()
-        
-        if next_round == 1:
-            # First round: top half vs bottom half
-            half = len(participants) // 2
-            for i in range(half):
-                white_id = participants[i][0]
-                black_id = participants[half + i][0] if half + i < len(participants) else None
-                if black_id:
-                    pairings.append((white_id, black_id))
-                    paired.add(white_id)
-                    paired.add(black_id)
-        else:
-            # Swiss pairing: group by points
-            points_groups: Dict[float, List[Tuple[int, int]]] = {}
-            for user_id, points, white_count in participants:
-                if points not in points_groups:
-                    points_groups[points] = []
-                points_groups[points].append((user_id, white_count))
-            
-            # Pair within each point group
-            for points in sorted(points_groups.keys(), reverse=True):
-                group = points_groups[points]
-                
-                # Sort by color balance (prefer those who played white less)
-                group.sort(key=lambda x: x[1])
-                
-                i = 0
-                while i < len(group) - 1:
-                    p1_id, p1_white = group[i]
-                    p2_id, p2_white = group[i + 1]
-                    
-                    if p1_id in paired or p2_id in paired:
-                        i += 1
-                        continue
-                    
-                    # Check if they already played
-                    if (p1_id, p2_id) in previous_pairings or (p2_id, p1_id) in previous_pairings:
-                        # Try to find another opponent
-                        found = False
-                        for j in range(i + 2, len(group)):
-                            p3_id, p3_white = group[j]
-                            if p3_id not in paired:
-                                if (p1_id, p3_id) not in previous_pairings and (p3_id, p1_id) not in previous_pairings:
-                                    # Assign colors by balance
-                                    if p1_white <= p3_white:
-                                        pairings.append((p1_id, p3_id))
-                                    else:
-                                        pairings.append((p3_id, p1_id))
-                                    paired.add(p1_id)
-                                    paired.add(p3_id)
-                                    group.pop(j)
-                                    found = True
-                                    break
-                        if not found:
-                            i += 1
-                        continue
-                    
-                    # Assign colors by balance
-                    if p1_white <= p2_white:
-                        pairings.append((p1_id, p2_id))
-                    else:
-                        pairings.append((p2_id, p1_id))
-                    
-                    paired.add(p1_id)
-                    paired.add(p2_id)
-                    i += 2
-        
-        # Insert games
-        for white_id, black_id in pairings:
-            cur.execute(f"""
-                INSERT INTO t_p91748136_chess_support_world.games (tournament_id, round, white_player_id, black_player_id, status, result)
-                VALUES ({tournament_id}, {next_round}, {white_id}, {black_id}, 'pending', NULL)
-            """)
+        pairings = pair_round(players, method=method)
+        save_round(cur, tournament_id, next_round, pairings)
         
         # Update tournament current_round
         cur.execute(f"""
@@ -0,0 +1,927 @@
+'''
+Движок жеребьёвки по швейцарской системе: одна модель данных для всех функций, которые делают пары.
+Игрок — очки, рейтинг, история цветов и флоатов, соперники; плюс запрещённые пары.
+Функции деплоятся независимо, поэтому одинаковая копия модуля лежит в каталоге каждой из них.
+Usage: players = load_players(cur, tournament_id); pairs = pair_round(players); save_round(cur, tournament_id, n, pairs)
+'''
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from psycopg2.extras import execute_values
+
+SCHEMA = 't_p91748136_chess_support_world'
+
+# Очки белых и чёрных по результату в tournament_pairings
+RESULT_POINTS = {'1-0': (1.0, 0.0), '0-1': (0.0, 1.0), '1/2-1/2': (0.5, 0.5)}
+BYE_POINTS = 1.0
+
+# Столько откатов перебора допускается, прежде чем разрешить повторные встречи
+MAX_BACKTRACK_STEPS = 100000
+# Столько — прежде чем разрешить пары с одинаковым абсолютным желанием цвета
+MAX_COLOR_BACKTRACK_STEPS = 10000
+
+# auto — паросочетание максимального веса, пока поле не больше BLOSSOM_MAX_PLAYERS, дальше перебор по группам
+PAIRING_METHODS = ('auto', 'blossom', 'greedy')
+DEFAULT_PAIRING_METHOD = 'auto'
+BLOSSOM_MAX_PLAYERS = 600
+
+# Штрафы пары в графе для паросочетания максимального веса. Разница в очках (в полуочках, в квадрате)
+# весит больше всех остальных штрафов вместе, дальше — цвета, повторный флоат и отступ от схемы S1–S2
+SCORE_DIFF_PENALTY = 100000
+COLOR_PENALTY = (20, 300, 5000)        # оба хотят один цвет: слабо / сильно / абсолютно
+REPEAT_FLOAT_PENALTY = 1000
+RANK_PENALTY = 1
+BYE_RANK_PENALTY = 50
+REMATCH_PENALTY = SCORE_DIFF_PENALTY * 1000
+# Соседей по таблице, с которыми строятся рёбра; если кто-то остался без пары, окно расширяется
+PAIRING_WINDOW = 6
+
+Pair = Tuple[int, Optional[int]]
+
+
+@dataclass
+class Player:
+    id: int
+    rating: int = 0
+    seed: int = 0                                      # стартовый номер: 1 — самый высокий рейтинг
+    virtual_points: float = 0.0                        # ускоренная жеребьёвка: прибавка к очкам только для пар
+    score: float = 0.0
+    colors: List[str] = field(default_factory=list)   # 'w' / 'b' по сыгранным турам
+    floats: List[str] = field(default_factory=list)   # 'up' / 'down' / '' по турам
+    opponents: Set[int] = field(default_factory=set)
+    had_bye: bool = False
+
+    @property
+    def pairing_score(self) -> float:
+        return self.score + self.virtual_points
+
+    @property
+    def color_balance(self) -> int:
+        return self.colors.count('w') - self.colors.count('b')
+
+    def color_preference(self) -> Tuple[Optional[str], int]:
+        """Желаемый цвет и сила желания: 2 — абсолютное, 1 — сильное, 0 — слабое"""
+        if not self.colors:
+            return None, 0
+        balance = self.color_balance
+        if balance <= -2 or self.colors[-2:] == ['b', 'b']:
+            return 'w', 2
+        if balance >= 2 or self.colors[-2:] == ['w', 'w']:
+            return 'b', 2
+        if balance != 0:
+            return ('w' if balance < 0 else 'b'), 1
+        return ('b' if self.colors[-1] == 'w' else 'w'), 0
+
+
+def rank_key(player: Player) -> Tuple[float, int]:
+    return (-player.pairing_score, player.seed)
+
+
+def assign_seeds(players: List[Player]) -> None:
+    """Стартовые номера по убыванию рейтинга, при равном — по id. Номер считается один раз,
+    дальше место в таблице сравнивается по паре (очки, номер) без повторного разбора рейтингов"""
+    for seed, player in enumerate(sorted(players, key=lambda p: (-p.rating, p.id)), start=1):
+        player.seed = seed
+
+
+def apply_acceleration(players: List[Player], round_number: int, total_rounds: int) -> None:
+    """Ускоренная жеребьёвка по бакинской системе. Ускоренные туры — первая половина турнира (с округлением вверх);
+    верхняя группа — первые стартовые номера, половина поля с округлением вверх до чётного. В первой половине
+    ускоренных туров ей добавляется виртуальное очко, во второй — пол-очка, потом прибавка снимается.
+    Виртуальные очки влияют только на очковые группы жеребьёвки, в tournament_standings их нет"""
+    accelerated_rounds = (total_rounds + 1) // 2
+    if round_number > accelerated_rounds:
+        points = 0.0
+    else:
+        points = 1.0 if round_number <= (accelerated_rounds + 1) // 2 else 0.5
+    top_group = 2 * ((len(players) + 3) // 4)
+    for player in players:
+        player.virtual_points = points if player.seed <= top_group else 0.0
+
+
+def pair_key(a: int, b: int) -> Tuple[int, int]:
+    return (a, b) if a < b else (b, a)
+
+
+def float_direction(own_score: float, opponent_score: float) -> str:
+    if opponent_score > own_score:
+        return 'up'
+    if opponent_score < own_score:
+        return 'down'
+    return ''
+
+
+def apply_history(players: Dict[int, Player], rows: Iterable[Tuple[int, int, Optional[int], Optional[str]]]) -> None:
+    """Накладывает сыгранные туры (round_number, white_id, black_id, result) на игроков по порядку туров"""
+    by_round: Dict[int, List[Tuple[int, Optional[int], Optional[str]]]] = {}
+    for round_number, white_id, black_id, result in rows:
+        by_round.setdefault(round_number, []).append((white_id, black_id, result))
+
+    for round_number in sorted(by_round):
+        scores_before = {pid: p.score for pid, p in players.items()}
+        seen = set()
+
+        for white_id, black_id, result in by_round[round_number]:
+            white = players.get(white_id)
+            black = players.get(black_id) if black_id is not None else None
+
+            if black_id is None:
+                # Пропуск тура засчитывается как победа и как флоат вниз
+                if white:
+                    white.had_bye = True
+                    white.score += BYE_POINTS
+                    white.floats.append('down')
+                    seen.add(white_id)
+                continue
+
+            white_points, black_points = RESULT_POINTS.get(result, (0.0, 0.0))
+            if white:
+                white.colors.append('w')
+                white.opponents.add(black_id)
+                white.score += white_points
+                white.floats.append(float_direction(scores_before.get(white_id, 0.0), scores_before.get(black_id, 0.0)))
+                seen.add(white_id)
+            if black:
+                black.colors.append('b')
+                black.opponents.add(white_id)
+                black.score += black_points
+                black.floats.append(float_direction(scores_before.get(black_id, 0.0), scores_before.get(white_id, 0.0)))
+                seen.add(black_id)
+
+        for pid, player in players.items():
+            if pid not in seen:
+                player.floats.append('')
+
+
+def load_players(cur, tournament_id: int) -> List[Player]:
+    """Участники турнира с историей из tournament_pairings: записи tournament_registrations и tournament_participants
+    (старая регистрация и тестовые участники), как у строк турнирной таблицы; отменившие участие не входят.
+    Рейтинг — users.ms_rating: у игроков с привязанным fsr_id его обновляет fsr-rating по списку ФШР.
+    Стартовые номера раздаёт сам запрос сортировкой по рейтингу. Для турнира с ускоренной жеребьёвкой
+    игрокам верхней группы добавляются виртуальные очки очередного тура"""
+    cur.execute(f"""
+        SELECT accelerated, rounds FROM {SCHEMA}.tournaments WHERE id = %s
+    """, (tournament_id,))
+    accelerated, total_rounds = cur.fetchone() or (False, 0)
+
+    cur.execute(f"""
+        SELECT tr.player_id, COALESCE(u.ms_rating, 0) AS rating
+        FROM (
+            SELECT player_id FROM {SCHEMA}.tournament_registrations
+            WHERE tournament_id = %s AND status = 'registered'
+            UNION
+            SELECT user_id FROM {SCHEMA}.tournament_participants
+            WHERE tournament_id = %s AND status IN ('registered', 'confirmed')
+        ) tr
+        JOIN {SCHEMA}.users u ON u.id = tr.player_id
+        ORDER BY rating DESC, tr.player_id
+    """, (tournament_id, tournament_id))
+    players = {
+        player_id: Player(id=player_id, rating=rating, seed=seed)
+        for seed, (player_id, rating) in enumerate(cur.fetchall(), start=1)
+    }
+
+    cur.execute(f"""
+        SELECT r.round_number, p.white_player_id, p.black_player_id, p.result
+        FROM {SCHEMA}.tournament_pairings p
+        JOIN {SCHEMA}.tournament_rounds r ON r.id = p.round_id
+        WHERE p.tournament_id = %s
+    """, (tournament_id,))
+    history = cur.fetchall()
+    apply_history(players, history)
+
+    result = list(players.values())
+    if accelerated:
+        next_round = max((row[0] for row in history), default=0) + 1
+        apply_acceleration(result, next_round, total_rounds or 0)
+    return result
+
+
+def choose_bye(ranked: List[Player]) -> Player:
+    """Пропуск тура получает самый низкий в таблице игрок, у которого его ещё не было"""
+    for player in reversed(ranked):
+        if not player.had_bye:
+            return player
+    return ranked[-1]
+
+
+def breaks_color_rules(player: Player, color: str) -> bool:
+    """Третий подряд один и тот же цвет или перекос цветов больше двух"""
+    balance = player.color_balance + (1 if color == 'w' else -1)
+    return abs(balance) > 2 or player.colors[-2:] == [color, color]
+
+
+def allocate_colors(a: Player, b: Player) -> Pair:
+    """Цвета в паре; a стоит в таблице выше b и при равных желаниях получает свой цвет.
+    Если один из двух вариантов нарушает правило цветов (третий подряд или перекос больше двух), выбирается другой"""
+    color_a, strength_a = a.color_preference()
+    color_b, strength_b = b.color_preference()
+
+    a_white_breaks = breaks_color_rules(a, 'w') or breaks_color_rules(b, 'b')
+    b_white_breaks = breaks_color_rules(a, 'b') or breaks_color_rules(b, 'w')
+    if a_white_breaks != b_white_breaks:
+        a_is_white = not a_white_breaks
+    elif color_a is None and color_b is None:
+        a_is_white = True
+    elif color_a is None:
+        a_is_white = color_b == 'b'
+    elif color_b is None or color_a != color_b or strength_a >= strength_b:
+        a_is_white = color_a == 'w'
+    else:
+        a_is_white = color_b == 'b'
+
+    return (a.id, b.id) if a_is_white else (b.id, a.id)
+
+
+def pair_first_round(ranked: List[Player], forbidden: Set[Tuple[int, int]]) -> Optional[List[Tuple[Player, Player]]]:
+    """Первый тур: в каждой очковой группе верхняя половина посева против нижней, цвета чередуются по доскам.
+    Без ускоренной жеребьёвки группа одна; с нечётной группой последний игрок переходит в следующую.
+    Если пара по схеме запрещена, берётся следующий свободный из нижней половины;
+    None — когда так пары не составить и нужен общий подбор"""
+    pairs = []
+    group: List[Player] = []
+    for i, player in enumerate(ranked):
+        group.append(player)
+        if i + 1 < len(ranked) and ranked[i + 1].pairing_score == player.pairing_score:
+            continue
+        half = len(group) // 2
+        bottom = group[half:2 * half]
+        for top in group[:half]:
+            k = next((k for k, b in enumerate(bottom) if pair_key(top.id, b.id) not in forbidden), None)
+            if k is None:
+                return None
+            opponent = bottom.pop(k)
+            pairs.append((top, opponent) if len(pairs) % 2 == 0 else (opponent, top))
+        group = group[2 * half:]
+    return pairs
+
+
+def match_brackets(ranked: List[Player], forbidden: Set[Tuple[int, int]],
+                   allow_rematches: bool, allow_color_clash: bool = True,
+                   max_steps: int = MAX_BACKTRACK_STEPS) -> Optional[List[Tuple[Player, Player]]]:
+    """Подбор соперников сверху вниз по очковым группам с перебором с возвратом.
+    Внутри группы верхняя половина играет с нижней, не нашедший пары уходит флоатом вниз;
+    откат вместо тупика гарантирует, что никто не останется без пары, если расстановка существует.
+    allow_color_clash=False запрещает пары двух игроков с одинаковым абсолютным желанием цвета"""
+    n = len(ranked)
+    groups: List[List[int]] = []
+    group_of = [0] * n
+    for i, player in enumerate(ranked):
+        if not groups or ranked[groups[-1][0]].pairing_score != player.pairing_score:
+            groups.append([])
+        groups[-1].append(i)
+        group_of[i] = len(groups) - 1
+
+    partner = [-1] * n
+    preferences = [p.color_preference() for p in ranked]
+    # Порядок кандидатов на флоат вниз в каждой группе: сперва те, кто в прошлом туре не поднимался
+    came_up = [p.floats[-1:] == ['up'] for p in ranked]
+    float_order = [sorted(group, key=came_up.__getitem__) for group in groups]
+
+    def clash(i: int, j: int) -> bool:
+        return preferences[i][1] == 2 and preferences[j][1] == 2 and preferences[i][0] == preferences[j][0]
+
+    def allowed(i: int, j: int) -> bool:
+        a, b = ranked[i], ranked[j]
+        if not allow_rematches and b.id in a.opponents:
+            return False
+        if not allow_color_clash and clash(i, j):
+            return False
+        return pair_key(a.id, b.id) not in forbidden
+
+    def candidates(i: int) -> Iterator[int]:
+        g = group_of[i]
+        rest = [j for j in groups[g] if j > i and partner[j] < 0]
+        # Соперник по схеме «S1 против S2» — первый игрок нижней половины группы
+        ideal = max(0, (len(rest) + 1) // 2 - 1)
+        ordered = rest[ideal:] + rest[:ideal][::-1]
+        yield from (j for j in ordered if not clash(i, j))
+        yield from (j for j in ordered if clash(i, j))
+
+        for h in range(g + 1, len(groups)):
+            yield from (j for j in float_order[h] if partner[j] < 0)
+
+    stack: List[Tuple[int, Iterator[int]]] = []
+    steps = 0
+    i = 0
+    while True:
+        while i < n and partner[i] >= 0:
+            i += 1
+        if i == n:
+            break
+        stack.append((i, candidates(i)))
+
+        while True:
+            top, options = stack[-1]
+            j = next((j for j in options if allowed(top, j)), None)
+            if j is not None:
+                partner[top] = j
+                partner[j] = top
+                i = top + 1
+                break
+
+            stack.pop()
+            steps += 1
+            if not stack or steps > max_steps:
+                return None
+            previous = stack[-1][0]
+            partner[partner[previous]] = -1
+            partner[previous] = -1
+
+    return [(ranked[i], ranked[partner[i]]) for i in range(n) if i < partner[i]]
+
+
+def has_color_clash(a: Player, b: Player) -> bool:
+    """У обоих игроков абсолютное желание одного и того же цвета"""
+    color_a, strength_a = a.color_preference()
+    color_b, strength_b = b.color_preference()
+    return strength_a == 2 and strength_b == 2 and color_a == color_b
+
+
+def repair_color_clashes(matching: List[Tuple[Player, Player]], forbidden: Set[Tuple[int, int]]) -> List[Tuple[Player, Player]]:
+    """Разбивает пары с одинаковым абсолютным желанием цвета обменом соперниками с ближайшей по очкам парой,
+    если обмен не даёт повторной встречи, запрещённой пары и нового такого же конфликта"""
+    pairs = list(matching)
+
+    def fits(a: Player, b: Player) -> bool:
+        return b.id not in a.opponents and pair_key(a.id, b.id) not in forbidden and not has_color_clash(a, b)
+
+    for k in range(len(pairs)):
+        a, b = pairs[k]
+        if not has_color_clash(a, b):
+            continue
+        score = a.pairing_score + b.pairing_score
+        others = sorted((m for m in range(len(pairs)) if m != k),
+                        key=lambda m: abs(pairs[m][0].pairing_score + pairs[m][1].pairing_score - score))
+        for m in others:
+            c, d = pairs[m]
+            if fits(a, c) and fits(b, d):
+                pairs[k], pairs[m] = (a, c), (b, d)
+                break
+            if fits(a, d) and fits(b, c):
+                pairs[k], pairs[m] = (a, d), (b, c)
+                break
+    return pairs
+
+
+def max_weight_matching(edges: List[Tuple[int, int, int]], maxcardinality: bool = False) -> List[int]:
+    """Паросочетание максимального веса, алгоритм Эдмондса с цветками за O(n³).
+    edges — [(i, j, weight)] с целыми чётными весами, вершины 0..n-1; при maxcardinality
+    среди паросочетаний наибольшей мощности выбирается самое тяжёлое.
+    Возвращает mate: mate[v] — пара вершины v или -1"""
+    if not edges:
+        return []
+
+    nedge = len(edges)
+    nvertex = 1 + max(max(i, j) for i, j, _ in edges)
+    maxweight = max(0, max(w for _, _, w in edges))
+
+    # Концы рёбер: у ребра k концы 2k и 2k+1, endpoint[p] — вершина конца p
+    endpoint = [edges[p // 2][p % 2] for p in range(2 * nedge)]
+    neighbend: List[List[int]] = [[] for _ in range(nvertex)]
+    for k, (i, j, _) in enumerate(edges):
+        neighbend[i].append(2 * k + 1)
+        neighbend[j].append(2 * k)
+
+    mate = nvertex * [-1]
+    # Метки вершин и цветков: 0 — свободна, 1 — S, 2 — T
+    label = (2 * nvertex) * [0]
+    labelend = (2 * nvertex) * [-1]
+    inblossom = list(range(nvertex))
+    blossomparent = (2 * nvertex) * [-1]
+    blossomchilds: List[Optional[List[int]]] = (2 * nvertex) * [None]
+    blossombase = list(range(nvertex)) + nvertex * [-1]
+    blossomendps: List[Optional[List[int]]] = (2 * nvertex) * [None]
+    bestedge = (2 * nvertex) * [-1]
+    blossombestedges: List[Optional[List[int]]] = (2 * nvertex) * [None]
+    unusedblossoms = list(range(nvertex, 2 * nvertex))
+    dualvar = nvertex * [maxweight] + nvertex * [0]
+    allowedge = nedge * [False]
+    queue: List[int] = []
+    double_weight = [2 * wt for _, _, wt in edges]
+
+    def slack(k: int) -> int:
+        return dualvar[endpoint[2 * k]] + dualvar[endpoint[2 * k + 1]] - double_weight[k]
+
+    def blossom_leaves(b: int) -> Iterator[int]:
+        if b < nvertex:
+            yield b
+        else:
+            for t in blossomchilds[b]:
+                if t < nvertex:
+                    yield t
+                else:
+                    yield from blossom_leaves(t)
+
+    def assign_label(w: int, t: int, p: int) -> None:
+        b = inblossom[w]
+        label[w] = label[b] = t
+        labelend[w] = labelend[b] = p
+        bestedge[w] = bestedge[b] = -1
+        if t == 1:
+            queue.extend(blossom_leaves(b))
+        elif t == 2:
+            base = blossombase[b]
+            assign_label(endpoint[mate[base]], 1, mate[base] ^ 1)
+
+    def scan_blossom(v: int, w: int) -> int:
+        """Ищет общего предка v и w в дереве чередующихся путей: база нового цветка или -1"""
+        path = []
+        base = -1
+        while v != -1 or w != -1:
+            b = inblossom[v]
+            if label[b] & 4:
+                base = blossombase[b]
+                break
+            path.append(b)
+            label[b] = 5
+            if labelend[b] == -1:
+                v = -1
+            else:
+                v = endpoint[labelend[b]]
+                b = inblossom[v]
+                v = endpoint[labelend[b]]
+            if w != -1:
+                v, w = w, v
+        for b in path:
+            label[b] = 1
+        return base
+
+    def add_blossom(base: int, k: int) -> None:
+        v, w, _ = edges[k]
+        bb = inblossom[base]
+        bv = inblossom[v]
+        bw = inblossom[w]
+        b = unusedblossoms.pop()
+        blossombase[b] = base
+        blossomparent[b] = -1
+        blossomparent[bb] = b
+        blossomchilds[b] = path = []
+        blossomendps[b] = endps = []
+        while bv != bb:
+            blossomparent[bv] = b
+            path.append(bv)
+            endps.append(labelend[bv])
+            v = endpoint[labelend[bv]]
+            bv = inblossom[v]
+        path.append(bb)
+        path.reverse()
+        endps.reverse()
+        endps.append(2 * k)
+        while bw != bb:
+            blossomparent[bw] = b
+            path.append(bw)
+            endps.append(labelend[bw] ^ 1)
+            w = endpoint[labelend[bw]]
+            bw = inblossom[w]
+        label[b] = 1
+        labelend[b] = labelend[bb]
+        dualvar[b] = 0
+        for v in blossom_leaves(b):
+            if label[inblossom[v]] == 2:
+                queue.append(v)
+            inblossom[v] = b
+
+        bestedgeto = (2 * nvertex) * [-1]
+        for bv in path:
+            if blossombestedges[bv] is None:
+                nblists = [[p // 2 for p in neighbend[v]] for v in blossom_leaves(bv)]
+            else:
+                nblists = [blossombestedges[bv]]
+            for nblist in nblists:
+                for k in nblist:
+                    i, j, _ = edges[k]
+                    if inblossom[j] == b:
+                        i, j = j, i
+                    bj = inblossom[j]
+                    if bj != b and label[bj] == 1 and (bestedgeto[bj] == -1 or slack(k) < slack(bestedgeto[bj])):
+                        bestedgeto[bj] = k
+            blossombestedges[bv] = None
+            bestedge[bv] = -1
+        blossombestedges[b] = [k for k in bestedgeto if k != -1]
+        bestedge[b] = -1
+        for k in blossombestedges[b]:
+            if bestedge[b] == -1 or slack(k) < slack(bestedge[b]):
+                bestedge[b] = k
+
+    def expand_blossom(b: int, endstage: bool) -> None:
+        for s in blossomchilds[b]:
+            blossomparent[s] = -1
+            if s < nvertex:
+                inblossom[s] = s
+            elif endstage and dualvar[s] == 0:
+                expand_blossom(s, endstage)
+            else:
+                for v in blossom_leaves(s):
+                    inblossom[v] = s
+
+        # Раскрытый T-цветок: перемечаем подцветки на чётном пути от входа к базе
+        if not endstage and label[b] == 2:
+            entrychild = inblossom[endpoint[labelend[b] ^ 1]]
+            j = blossomchilds[b].index(entrychild)
+            if j & 1:
+                j -= len(blossomchilds[b])
+                jstep = 1
+                endptrick = 0
+            else:
+                jstep = -1
+                endptrick = 1
+            p = labelend[b]
+            while j != 0:
+                label[endpoint[p ^ 1]] = 0
+                label[endpoint[blossomendps[b][j - endptrick] ^ endptrick ^ 1]] = 0
+                assign_label(endpoint[p ^ 1], 2, p)
+                allowedge[blossomendps[b][j - endptrick] // 2] = True
+                j += jstep
+                p = blossomendps[b][j - endptrick] ^ endptrick
+                allowedge[p // 2] = True
+                j += jstep
+            bv = blossomchilds[b][j]
+            label[endpoint[p ^ 1]] = label[bv] = 2
+            labelend[endpoint[p ^ 1]] = labelend[bv] = p
+            bestedge[bv] = -1
+            j += jstep
+            while blossomchilds[b][j] != entrychild:
+                bv = blossomchilds[b][j]
+                if label[bv] == 1:
+                    j += jstep
+                    continue
+                for v in blossom_leaves(bv):
+                    if label[v] != 0:
+                        break
+                if label[v] != 0:
+                    label[v] = 0
+                    label[endpoint[mate[blossombase[bv]]]] = 0
+                    assign_label(v, 2, labelend[v])
+                j += jstep
+
+        label[b] = labelend[b] = -1
+        blossomchilds[b] = blossomendps[b] = None
+        blossombase[b] = -1
+        blossombestedges[b] = None
+        bestedge[b] = -1
+        unusedblossoms.append(b)
+
+    def augment_blossom(b: int, v: int) -> None:
+        """Поворачивает цветок b так, чтобы его базой стала вершина v"""
+        t = v
+        while blossomparent[t] != b:
+            t = blossomparent[t]
+        if t >= nvertex:
+            augment_blossom(t, v)
+        i = j = blossomchilds[b].index(t)
+        if i & 1:
+            j -= len(blossomchilds[b])
+            jstep = 1
+            endptrick = 0
+        else:
+            jstep = -1
+            endptrick = 1
+        while j != 0:
+            j += jstep
+            t = blossomchilds[b][j]
+            p = blossomendps[b][j - endptrick] ^ endptrick
+            if t >= nvertex:
+                augment_blossom(t, endpoint[p])
+            j += jstep
+            t = blossomchilds[b][j]
+            if t >= nvertex:
+                augment_blossom(t, endpoint[p ^ 1])
+            mate[endpoint[p]] = p ^ 1
+            mate[endpoint[p ^ 1]] = p
+        blossomchilds[b] = blossomchilds[b][i:] + blossomchilds[b][:i]
+        blossomendps[b] = blossomendps[b][i:] + blossomendps[b][:i]
+        blossombase[b] = blossombase[blossomchilds[b][0]]
+
+    def augment_matching(k: int) -> None:
+        v, w, _ = edges[k]
+        for s, p in ((v, 2 * k + 1), (w, 2 * k)):
+            while True:
+                bs = inblossom[s]
+                if bs >= nvertex:
+                    augment_blossom(bs, s)
+                mate[s] = p
+                if labelend[bs] == -1:
+                    break
+                t = endpoint[labelend[bs]]
+                bt = inblossom[t]
+                s = endpoint[labelend[bt]]
+                j = endpoint[labelend[bt] ^ 1]
+                if bt >= nvertex:
+                    augment_blossom(bt, j)
+                mate[j] = labelend[bt]
+                p = labelend[bt] ^ 1
+
+    # Каждая стадия либо увеличивает паросочетание на одно ребро, либо доказывает, что это невозможно
+    for _ in range(nvertex):
+        label[:] = (2 * nvertex) * [0]
+        bestedge[:] = (2 * nvertex) * [-1]
+        blossombestedges[nvertex:] = nvertex * [None]
+        allowedge[:] = nedge * [False]
+        queue[:] = []
+
+        for v in range(nvertex):
+            if mate[v] == -1 and label[inblossom[v]] == 0:
+                assign_label(v, 1, -1)
+
+        augmented = False
+        while True:
+            while queue and not augmented:
+                v = queue.pop()
+                for p in neighbend[v]:
+                    k = p // 2
+                    w = endpoint[p]
+                    if inblossom[v] == inblossom[w]:
+                        continue
+                    if not allowedge[k]:
+                        # slack(k) вручную: самое горячее место алгоритма
+                        kslack = dualvar[v] + dualvar[w] - double_weight[k]
+                        if kslack <= 0:
+                            allowedge[k] = True
+                    if allowedge[k]:
+                        if label[inblossom[w]] == 0:
+                            assign_label(w, 2, p ^ 1)
+                        elif label[inblossom[w]] == 1:
+                            base = scan_blossom(v, w)
+                            if base >= 0:
+                                add_blossom(base, k)
+                            else:
+                                augment_matching(k)
+                                augmented = True
+                                break
+                        elif label[w] == 0:
+                            label[w] = 2
+                            labelend[w] = p ^ 1
+                    elif label[inblossom[w]] == 1:
+                        b = inblossom[v]
+                        if bestedge[b] == -1 or kslack < slack(bestedge[b]):
+                            bestedge[b] = k
+                    elif label[w] == 0:
+                        best = bestedge[w]
+                        if best == -1 or kslack < dualvar[endpoint[2 * best]] + dualvar[endpoint[2 * best + 1]] - double_weight[best]:
+                            bestedge[w] = k
+
+            if augmented:
+                break
+
+            # Шаг по двойственным переменным: наименьшее delta из четырёх типов
+            deltatype = -1
+            delta = deltaedge = deltablossom = None
+            if not maxcardinality:
+                deltatype = 1
+                delta = min(dualvar[:nvertex])
+            for v in range(nvertex):
+                if label[inblossom[v]] == 0 and bestedge[v] != -1:
+                    d = slack(bestedge[v])
+                    if deltatype == -1 or d < delta:
+                        delta = d
+                        deltatype = 2
+                        deltaedge = bestedge[v]
+            for b in range(2 * nvertex):
+                if blossomparent[b] == -1 and label[b] == 1 and bestedge[b] != -1:
+                    d = slack(bestedge[b]) // 2
+                    if deltatype == -1 or d < delta:
+                        delta = d
+                        deltatype = 3
+                        deltaedge = bestedge[b]
+            for b in range(nvertex, 2 * nvertex):
+                if (blossombase[b] >= 0 and blossomparent[b] == -1 and label[b] == 2
+                        and (deltatype == -1 or dualvar[b] < delta)):
+                    delta = dualvar[b]
+                    deltatype = 4
+                    deltablossom = b
+            if deltatype == -1:
+                deltatype = 1
+                delta = max(0, min(dualvar[:nvertex]))
+
+            for v in range(nvertex):
+                if label[inblossom[v]] == 1:
+                    dualvar[v] -= delta
+                elif label[inblossom[v]] == 2:
+                    dualvar[v] += delta
+            for b in range(nvertex, 2 * nvertex):
+                if blossombase[b] >= 0 and blossomparent[b] == -1:
+                    if label[b] == 1:
+                        dualvar[b] += delta
+                    elif label[b] == 2:
+                        dualvar[b] -= delta
+
+            if deltatype == 1:
+                break
+            elif deltatype == 2:
+                allowedge[deltaedge] = True
+                i, j, _ = edges[deltaedge]
+                if label[inblossom[i]] == 0:
+                    i, j = j, i
+                queue.append(i)
+            elif deltatype == 3:
+                allowedge[deltaedge] = True
+                i, j, _ = edges[deltaedge]
+                queue.append(i)
+            elif deltatype == 4:
+                expand_blossom(deltablossom, False)
+
+        if not augmented:
+            break
+
+        for b in range(nvertex, 2 * nvertex):
+            if blossomparent[b] == -1 and blossombase[b] >= 0 and label[b] == 1 and dualvar[b] == 0:
+                expand_blossom(b, True)
+
+    return [endpoint[m] if m >= 0 else -1 for m in mate]
+
+
+def pairing_penalty(a: Player, b: Player, rank_gap: int, ideal_gap: int) -> int:
+    """Штраф пары a–b, где a выше в таблице на rank_gap мест, а по схеме S1–S2 должен быть ideal_gap"""
+    penalty = SCORE_DIFF_PENALTY * int(round((a.pairing_score - b.pairing_score) * 2)) ** 2
+
+    color_a, strength_a = a.color_preference()
+    color_b, strength_b = b.color_preference()
+    if color_a is not None and color_a == color_b:
+        penalty += COLOR_PENALTY[min(strength_a, strength_b)]
+
+    if a.pairing_score != b.pairing_score:
+        if a.floats[-1:] == ['down']:
+            penalty += REPEAT_FLOAT_PENALTY
+        if b.floats[-1:] == ['up']:
+            penalty += REPEAT_FLOAT_PENALTY
+    else:
+        penalty += RANK_PENALTY * abs(rank_gap - ideal_gap)
+
+    if b.id in a.opponents:
+        penalty += REMATCH_PENALTY
+    return penalty
+
+
+def build_pairing_graph(ranked: List[Player], forbidden: Set[Tuple[int, int]], window: Optional[int],
+                        allow_rematches: bool, bye_vertex: bool) -> List[Tuple[int, int, int]]:
+    """Рёбра графа пар: вершины — места в таблице, вершина n — пропуск тура.
+    window=None строит полный граф, иначе рёбра только к ближайшим соседям и к сопернику по схеме S1–S2.
+    Двое с одним и тем же абсолютным желанием цвета не соединяются, пока allow_rematches не разрешает
+    последний, аварийный проход"""
+    n = len(ranked)
+    preferences = [p.color_preference() for p in ranked]
+    group_start = [0] * n
+    group_size = [0] * n
+    start = 0
+    for i in range(1, n + 1):
+        if i == n or ranked[i].pairing_score != ranked[start].pairing_score:
+            for j in range(start, i):
+                group_start[j] = start
+                group_size[j] = i - start
+            start = i
+
+    penalties: List[Tuple[int, int, int]] = []
+    for i, a in enumerate(ranked):
+        half = group_size[i] // 2
+        position = i - group_start[i]
+        ideal = i + half if position < half else i - half
+
+        if window is None:
+            others = range(i + 1, n)
+        else:
+            others = sorted(set(range(i + 1, min(n, i + window + 1)))
+                            | set(range(max(i + 1, ideal - window), min(n, ideal + window + 1))))
+
+        for j in others:
+            b = ranked[j]
+            if pair_key(a.id, b.id) in forbidden or (not allow_rematches and b.id in a.opponents):
+                continue
+            if (not allow_rematches and preferences[i][1] == 2 and preferences[j][1] == 2
+                    and preferences[i][0] == preferences[j][0]):
+                continue
+            penalties.append((i, j, pairing_penalty(a, b, j - i, half)))
+
+    if bye_vertex:
+        # Пропуск тура — самым низким в таблице из тех, у кого его ещё не было
+        eligible = [i for i in range(n) if not ranked[i].had_bye] or list(range(n))
+        if window is not None:
+            eligible = eligible[-window:]
+        for i in eligible:
+            penalties.append((i, n, BYE_RANK_PENALTY * (n - 1 - i)))
+
+    # Веса чётные и положительные: так алгоритм обходится целочисленной арифметикой
+    top = max((p for _, _, p in penalties), default=0) + 1
+    return [(i, j, 2 * (top - p)) for i, j, p in penalties]
+
+
+def match_blossom(ranked: List[Player], forbidden: Set[Tuple[int, int]]) -> Tuple[List[Tuple[Player, Player]], Optional[Player]]:
+    """Пары тура через паросочетание максимального веса наибольшей мощности.
+    Граф расширяется от окна соседей до полного, а повторные встречи и пары с одинаковым
+    абсолютным желанием цвета допускаются только тогда, когда без них кто-то остаётся без пары"""
+    n = len(ranked)
+    bye_vertex = n % 2 == 1
+    attempts = [(PAIRING_WINDOW, False), (PAIRING_WINDOW * 4, False), (None, False), (None, True)]
+
+    mate: List[int] = []
+    for window, allow_rematches in attempts:
+        if window is not None and window * 2 >= n:
+            window = None
+        edges = build_pairing_graph(ranked, forbidden, window, allow_rematches, bye_vertex)
+        mate = max_weight_matching(edges, maxcardinality=True)
+        mate += [-1] * (n + bye_vertex - len(mate))
+        if all(m >= 0 for m in mate):
+            break
+        print(f'[SWISS] Окно {window or "полное"}: без пары {sum(1 for m in mate if m < 0)} из {n}, граф расширяется')
+
+    bye = ranked[mate[n]] if bye_vertex and mate[n] >= 0 else None
+    pairs = [(ranked[i], ranked[mate[i]]) for i in range(n) if i < mate[i] < n]
+    return pairs, bye
+
+
+def pair_round(players: List[Player], forbidden_pairs: Iterable[Tuple[int, int]] = (),
+               method: str = DEFAULT_PAIRING_METHOD) -> List[Pair]:
+    """Пары очередного тура [(white_id, black_id)] в порядке досок; пропуск тура — (id, None) в конце.
+    method: 'blossom' — паросочетание максимального веса, 'greedy' — перебор по группам с возвратом,
+    'auto' — выбор по размеру поля"""
+    if method not in PAIRING_METHODS:
+        raise ValueError(f'Неизвестный способ жеребьёвки: {method}')
+    if method == 'auto':
+        method = 'blossom' if len(players) <= BLOSSOM_MAX_PLAYERS else 'greedy'
+
+    if any(not p.seed for p in players):
+        assign_seeds(players)
+    ranked = sorted(players, key=rank_key)
+    if len(ranked) < 2:
+        return [(p.id, None) for p in ranked]
+
+    forbidden = {pair_key(a, b) for a, b in forbidden_pairs}
+    first_round = not any(p.colors or p.had_bye for p in players)
+
+    bye = None
+    if len(ranked) % 2 and (first_round or method == 'greedy'):
+        bye = choose_bye(ranked)
+        ranked.remove(bye)
+
+    first_pairs = pair_first_round(ranked, forbidden) if first_round else None
+    if first_round and first_pairs is None:
+        print('[SWISS] Первый тур: запрещённые пары не дают схему посева, пары подбираются общим способом')
+
+    if first_pairs is not None:
+        pairs = [(white.id, black.id) for white, black in first_pairs]
+    else:
+        if method == 'blossom':
+            matching, blossom_bye = match_blossom(ranked, forbidden)
+            if blossom_bye:
+                bye = blossom_bye
+                ranked.remove(bye)
+        else:
+            matching = match_brackets(ranked, forbidden, allow_rematches=False, allow_color_clash=False,
+                                      max_steps=MAX_COLOR_BACKTRACK_STEPS)
+            if matching is None:
+                print(f'[SWISS] Без нарушения абсолютного цвета пары не составить ({len(ranked)} игроков)')
+                matching = match_brackets(ranked, forbidden, allow_rematches=False)
+            if matching is None:
+                print(f'[SWISS] Без повторных встреч пары не составить, повторы разрешены ({len(ranked)} игроков)')
+                matching = match_brackets(ranked, forbidden, allow_rematches=True)
+            if matching is None:
+                matching = [(ranked[i], ranked[i + 1]) for i in range(0, len(ranked), 2)]
+        # Пары с одинаковым абсолютным цветом остаются только после запасных проходов; их пробуем разбить обменом
+        matching = repair_color_clashes(matching, forbidden)
+        # Доски по месту старшего в паре
+        position = {p.id: index for index, p in enumerate(ranked)}
+        boards = sorted((min(position[a.id], position[b.id]), allocate_colors(a, b)) for a, b in matching)
+        pairs = [pair for _, pair in boards]
+
+    if bye:
+        pairs.append((bye.id, None))
+    return pairs
+
+
+def save_round(cur, tournament_id: int, round_number: int, pairs: List[Pair]) -> Tuple[int, List[dict]]:
+    """Создаёт тур и все его пары двумя запросами при любом размере поля; номер доски — порядковый номер пары,
+    пропуск тура pair_round ставит последним. Результат пропуска записывает старт тура, поэтому до начала тура
+    очко за него в таблице не появляется. Тур и пары фиксирует commit вызывающего"""
+    cur.execute(f"""
+        INSERT INTO {SCHEMA}.tournament_rounds (tournament_id, round_number, status, created_at)
+        VALUES (%s, %s, 'pending', NOW())
+        RETURNING id
+    """, (tournament_id, round_number))
+    round_id = cur.fetchone()[0]
+
+    if not pairs:
+        return round_id, []
+
+    rows = [
+        (tournament_id, round_id, white_id, black_id, board_number)
+        for board_number, (white_id, black_id) in enumerate(pairs, start=1)
+    ]
+    inserted = execute_values(cur, f"""
+        INSERT INTO {SCHEMA}.tournament_pairings
+        (tournament_id, round_id, white_player_id, black_player_id, board_number, created_at)
+        VALUES %s
+        RETURNING board_number, id
+    """, rows, template='(%s, %s, %s, %s, %s, NOW())', page_size=len(rows), fetch=True)
+    pairing_ids = dict(inserted)
+
+    saved = [
+        {
+            'id': pairing_ids[board_number],
+            'board_number': board_number,
+            'white_player_id': white_id,
+            'black_player_id': black_id
+        }
+        for _, _, white_id, black_id, board_number in rows
+    ]
+    return round_id, saved
@@ -1,19 +1,8 @@
 import json
-import os
-import psycopg2
-import uuid
-from typing import Dict, Any, List, Tuple
-from dataclasses import dataclass
-from collections import defaultdict
+from typing import Dict, Any
+from db import get_connection
+from swiss import load_players, pair_round, save_round, PAIRING_METHODS, DEFAULT_PAIRING_METHOD
 
-@dataclass
-class Player:
-    id: int
-    rating: int
-    points: float
-    color_preference: int
-    opponents: List[int]
-    
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
     Business: Generates Swiss system pairings for the next round
@@ -51,8 +40,15 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'body': json.dumps({'error': 'tournament_id required'})
         }
     
-    database_url = os.environ.get('DATABASE_URL')
-    conn = psycopg2.connect(database_url)
+    method = params.get('method') or DEFAULT_PAIRING_METHOD
+    if method not in PAIRING_METHODS:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'Unknown pairing method'})
+        }
+    
+    conn = get_connection()
     cur = conn.cursor()
     
     tournament_query = f'SELECT current_round, rounds FROM t_p91748136_chess_support_world.tournaments WHERE id = {tournament_id}'
@@ -81,11 +77,9 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'body': json.dumps({'error': 'Tournament finished, all rounds completed'})
         }
     
-    players_query = f'SELECT player_id FROM t_p91748136_chess_support_world.tournament_registrations WHERE tournament_id = {tournament_id} AND status = \'registered\''
-    cur.execute(players_query)
-    players_data = cur.fetchall()
+    players = load_players(cur, tournament_id)
     
-    if len(players_data) < 2:
+    if len(players) < 2:
         cur.close()
         conn.close()
         return {
@@ -94,115 +88,8 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'body': json.dumps({'error': 'Not enough players'})
         }
     
-    games_query = f'SELECT white_player_id, black_player_id, result, round_number FROM t_p91748136_chess_support_world.games WHERE tournament_id = {tournament_id}'
-    cur.execute(games_query)
-    games_data = cur.fetchall()
-    
-    player_stats = {}
-    for row in players_data:
-        player_id = row[0]
-        player_stats[player_id] = {
-            'id': player_id,
-            'rating': 1500,
-            'points': 0.0,
-            'white_count': 0,
-            'black_count': 0,
-            'opponents': []
-        }
-    
-    for white_id, black_id, result, round_num in games_data:
-        if white_id in player_stats:
-            player_stats[white_id]['white_count'] += 1
-            player_stats[white_id]['opponents'].append(black_id)
-            if result == 'white_win':
-                player_stats[white_id]['points'] += 1.0
-            elif result == 'draw':
-                player_stats[white_id]['points'] += 0.5
-        
-        if black_id in player_stats:
-            player_stats[black_id]['black_count'] += 1
-            player_stats[black_id]['opponents'].append(white_id)
-            if result == 'black_win':
-                player_stats[black_id]['points'] += 1.0
-            elif result == 'draw':
-                player_stats[black_id]['points'] += 0.5
-    
-    players = []
-    for pid, stats in player_stats.items():
-        color_pref = stats['white_count'] - stats['black_count']
-        players.append(Player(
-            id=pid,
-            rating=stats['rating'],
-            points=stats['points'],
-            color_preference=color_pref,
-            opponents=stats['opponents']
-        ))
-    
-    pairings = []
-    
-    if next_round == 1:
-        players.sort(key=lambda p: p.rating, reverse=True)
-        mid = len(players) // 2
-        top_half = players[:mid]
-        bottom_half = players[mid:]
-        
-        for i in range(min(len(top_half), len(bottom_half))):
-            pairings.append((top_half[i].id, bottom_half[i].id))
-        
-        if len(players) % 2 == 1:
-            bye_player = players[-1].id
-            pairings.append((bye_player, None))
-    else:
-        players.sort(key=lambda p: (p.points, p.rating), reverse=True)
-        
-        score_groups = defaultdict(list)
-        for player in players:
-            score_groups[player.points].append(player)
-        
-        paired = set()
-        
-        for score in sorted(score_groups.keys(), reverse=True):
-            group = score_groups[score]
-            
-            while len(group) >= 2:
-                p1 = group[0]
-                paired_this_round = False
-                
-                for i in range(1, len(group)):
-                    p2 = group[i]
-                    
-                    if p2.id not in p1.opponents and p1.id not in p2.opponents:
-                        if p1.color_preference <= 0 and p2.color_preference >= 0:
-                            pairings.append((p1.id, p2.id))
-                        elif p1.color_preference >= 0 and p2.color_preference <= 0:
-                            pairings.append((p2.id, p1.id))
-                        else:
-                            if p1.color_preference <= p2.color_preference:
-                                pairings.append((p1.id, p2.id))
-                            else:
-                                pairings.append((p2.id, p1.id))
-                        
-                        paired.add(p1.id)
-                        paired.add(p2.id)
-                        group.remove(p1)
-                        group.remove(p2)
-                        paired_this_round = True
-                        break
-                
-                if not paired_this_round:
-                    group.pop(0)
-        
-        unpaired = [p for p in players if p.id not in paired]
-        if len(unpaired) == 1:
-            pairings.append((unpaired[0].id, None))
-    
-    for white_id, black_id in pairings:
-        game_id = str(uuid.uuid4())
-        if black_id is None:
-            insert_query = f'INSERT INTO t_p91748136_chess_support_world.games (id, tournament_id, round_number, white_player_id, result, status, fen, pgn, current_turn) VALUES (\'{game_id}\', {tournament_id}, {next_round}, {white_id}, \'1-0\', \'completed\', \'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1\', \'\', \'w\')'
-        else:
-            insert_query = f'INSERT INTO t_p91748136_chess_support_world.games (id, tournament_id, round_number, white_player_id, black_player_id, status, fen, pgn, current_turn) VALUES (\'{game_id}\', {tournament_id}, {next_round}, {white_id}, {black_id}, \'pending\', \'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1\', \'\', \'w\')'
-        cur.execute(insert_query)
+    pairings = pair_round(players, method=method)
+    round_id, _ = save_round(cur, tournament_id, next_round, pairings)
     
     update_query = f'UPDATE t_p91748136_chess_support_world.tournaments SET current_round = {next_round} WHERE id = {tournament_id}'
     cur.execute(update_query)
@@ -221,6 +108,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         'body': json.dumps({
             'success': True,
             'round': next_round,
+            'round_id': round_id,
             'pairings_count': len(pairings),
             'message': f'Round {next_round} pairings generated'
         })
@@ -0,0 +1,119 @@
+'''
+Пул подключений к PostgreSQL, переживающий вызовы тёплого экземпляра функции.
+Функции деплоятся независимо, поэтому одинаковая копия модуля лежит в каталоге каждой из них.
+Usage: conn = get_connection(); ...; conn.close() — close() возвращает подключение в пул
+'''
+
+import os
+import threading
+import time
+from typing import Any, Dict
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import ThreadedConnectionPool
+
+# putconn() держит в пуле не больше minconn простаивающих подключений, остальные закрывает
+POOL_MIN_CONNECTIONS = int(os.environ.get('DB_POOL_MIN', '1'))
+POOL_MAX_CONNECTIONS = int(os.environ.get('DB_POOL_MAX', '4'))
+# Подключение, простоявшее дольше этого, перед выдачей проверяется запросом SELECT 1
+HEALTHCHECK_AFTER_SECONDS = float(os.environ.get('DB_HEALTHCHECK_AFTER_SECONDS', '30'))
+
+_pool = None
+_pool_lock = threading.Lock()
+_opened_ids = set()
+_last_used: Dict[int, float] = {}
+_stats = {'opened': 0, 'reused': 0, 'reconnected': 0}
+
+
+class PooledConnection:
+    """Обёртка над подключением из пула: всё делегирует psycopg2, а close() возвращает подключение в пул"""
+
+    def __init__(self, conn, key):
+        object.__setattr__(self, '_conn', conn)
+        object.__setattr__(self, '_key', key)
+        object.__setattr__(self, '_released', False)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._conn, name, value)
+
+    def close(self) -> None:
+        if self._released:
+            return
+        object.__setattr__(self, '_released', True)
+        _release(self._conn, self._key)
+
+
+def _get_pool() -> ThreadedConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadedConnectionPool(
+                    POOL_MIN_CONNECTIONS, POOL_MAX_CONNECTIONS, os.environ['DATABASE_URL']
+                )
+    return _pool
+
+
+def _reset(conn) -> None:
+    """Откатывает незавершённую транзакцию и возвращает режим по умолчанию"""
+    if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+        conn.rollback()
+    if conn.autocommit:
+        conn.autocommit = False
+
+
+def _is_healthy(conn) -> bool:
+    if conn.closed:
+        return False
+    try:
+        _reset(conn)
+        if time.monotonic() - _last_used.get(id(conn), 0) > HEALTHCHECK_AFTER_SECONDS:
+            with conn.cursor() as cur:
+                cur.execute('SELECT 1')
+            conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+def _release(conn, key) -> None:
+    pool = _get_pool()
+    try:
+        if not conn.closed:
+            _reset(conn)
+    except psycopg2.Error:
+        pass
+    if conn.closed:
+        _opened_ids.discard(id(conn))
+    _last_used[id(conn)] = time.monotonic()
+    pool.putconn(conn, key=key, close=bool(conn.closed))
+
+
+def get_connection() -> PooledConnection:
+    """Выдаёт живое подключение: переиспользует подключение тёплого экземпляра,
+    битое закрывает и открывает новое"""
+    pool = _get_pool()
+    key = threading.get_ident()
+    conn = pool.getconn(key)
+
+    if id(conn) in _opened_ids:
+        if _is_healthy(conn):
+            _stats['reused'] += 1
+            return PooledConnection(conn, key)
+        pool.putconn(conn, key=key, close=True)
+        _opened_ids.discard(id(conn))
+        _stats['reconnected'] += 1
+        conn = pool.getconn(key)
+
+    _opened_ids.add(id(conn))
+    _stats['opened'] += 1
+    return PooledConnection(conn, key)
+
+
+def pool_stats() -> Dict[str, int]:
+    """Сколько подключений открыто и сколько раз выдано уже открытое"""
+    return dict(_stats)
@@ -1,6 +1,5 @@
 import json
-import os
-import psycopg2
+from db import get_connection
 
 def handler(event: dict, context) -> dict:
     """API для получения активной партии игрока в турнире"""
@@ -59,8 +58,7 @@ def handler(event: dict, context) -> dict:
                 'isBase64Encoded': False
             }
         
-        dsn = os.environ.get('DATABASE_URL')
-        conn = psycopg2.connect(dsn)
+        conn = get_connection()
         cur = conn.cursor()
         
         cur.execute("""
@@ -1,6 +1,5 @@
 import json
-import os
-import psycopg2
+from db import get_connection
 
 def handler(event: dict, context) -> dict:
     """Добавляет тестовых участников в турнир"""
@@ -27,8 +26,7 @@ def handler(event: dict, context) -> dict:
         else:
             tournament_id = 15
         
-        dsn = os.environ.get('DATABASE_URL')
-        conn = psycopg2.connect(dsn)
+        conn = get_connection()
         cur = conn.cursor()
         
         cur.execute(f"UPDATE tournaments SET status = 'registration_open', rounds = 3, time_control = '5+0', tournament_type = 'swiss' WHERE id = {tournament_id}")
@@ -41,7 +39,15 @@ def handler(event: dict, context) -> dict:
                 VALUES ({tournament_id}, {user_id}, NOW(), 'registered')
                 ON CONFLICT DO NOTHING
             """)
-        
+
+        # Строки турнирной таблицы с нулём: tournament-standings только читает таблицу
+        cur.execute("""
+            INSERT INTO tournament_standings (tournament_id, player_id, version)
+            SELECT %s, user_id, nextval('tournament_standings_version_seq')
+            FROM tournament_participants WHERE tournament_id = %s
+            ON CONFLICT (tournament_id, player_id) DO NOTHING
+        """, (tournament_id, tournament_id))
+
         conn.commit()
         cur.close()
         conn.close()
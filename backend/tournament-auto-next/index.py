@@ -1,11 +1,14 @@
 import json
-import os
-from datetime import datetime
-import psycopg2
-import time
+from db import get_connection
+
+NEXT_ROUND_DELAY_SECONDS = 60
+# Способы жеребьёвки движка swiss.py; сам тур по задаче создаёт scheduled-jobs-worker
+PAIRING_METHODS = ('auto', 'blossom', 'greedy')
+DEFAULT_PAIRING_METHOD = 'auto'
 
 def handler(event: dict, context) -> dict:
-    """API для автоматического перехода к следующему туру с задержкой 60 секунд"""
+    """API для автоматического перехода к следующему туру: ставит в scheduled_jobs задачу
+    создать тур через delay_seconds (по умолчанию 60), выполняет её scheduled-jobs-worker"""
     
     method = event.get('httpMethod', 'POST')
     
@@ -47,8 +50,18 @@ def handler(event: dict, context) -> dict:
                 'isBase64Encoded': False
             }
         
-        dsn = os.environ.get('DATABASE_URL')
-        conn = psycopg2.connect(dsn)
+        method = body.get('method') or DEFAULT_PAIRING_METHOD
+        if method not in PAIRING_METHODS:
+            return {
+                'statusCode': 400,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({'success': False, 'error': 'Unknown pairing method'}),
+                'isBase64Encoded': False
+            }
+        
+        delay_seconds = max(0, int(body.get('delay_seconds', NEXT_ROUND_DELAY_SECONDS)))
+        
+        conn = get_connection()
         cur = conn.cursor()
         
         cur.execute("""
@@ -107,85 +120,27 @@ def handler(event: dict, context) -> dict:
                 'isBase64Encoded': False
             }
         
-        time.sleep(60)
-        
         next_round_number = round_number + 1
         
+        # Задача на тур одна: повторный вызов для того же тура вернёт уже запланированную
         cur.execute("""
-            SELECT tp.user_id, u.ms_rating,
-                   COALESCE(SUM(
-                       CASE 
-                           WHEN tpair.result = '1-0' AND tpair.white_player_id = tp.user_id THEN 1.0
-                           WHEN tpair.result = '0-1' AND tpair.black_player_id = tp.user_id THEN 1.0
-                           WHEN tpair.result = '1/2-1/2' THEN 0.5
-                           ELSE 0
-                       END
-                   ), 0) as score
-            FROM tournament_participants tp
-            JOIN users u ON u.id = tp.user_id
-            LEFT JOIN tournament_pairings tpair ON 
-                (tpair.white_player_id = tp.user_id OR tpair.black_player_id = tp.user_id)
-                AND tpair.tournament_id = tp.tournament_id
-            WHERE tp.tournament_id = %s AND tp.status = 'registered'
-            GROUP BY tp.user_id, u.ms_rating
-            ORDER BY score DESC, u.ms_rating DESC
-        """, (tournament_id,))
-        
-        players = cur.fetchall()
-        
-        cur.execute("""
-            SELECT white_player_id, black_player_id
-            FROM tournament_pairings
-            WHERE tournament_id = %s
-        """, (tournament_id,))
-        
-        played_pairs = set()
-        for white_id, black_id in cur.fetchall():
-            if white_id and black_id:
-                played_pairs.add((min(white_id, black_id), max(white_id, black_id)))
-        
-        cur.execute("""
-            SELECT tpair.white_player_id as player_id, COUNT(*) as white_games
-            FROM tournament_pairings tpair
-            WHERE tpair.tournament_id = %s AND tpair.white_player_id IS NOT NULL
-            GROUP BY tpair.white_player_id
-        """, (tournament_id,))
-        
-        white_counts = {row[0]: row[1] for row in cur.fetchall()}
-        
-        cur.execute("""
-            SELECT tpair.black_player_id as player_id, COUNT(*) as black_games
-            FROM tournament_pairings tpair
-            WHERE tpair.tournament_id = %s AND tpair.black_player_id IS NOT NULL
-            GROUP BY tpair.black_player_id
-        """, (tournament_id,))
-        
-        black_counts = {row[0]: row[1] for row in cur.fetchall()}
-        
-        cur.execute("""
-            INSERT INTO tournament_rounds (tournament_id, round_number, status, created_at)
-            VALUES (%s, %s, 'pending', %s)
-            RETURNING id
-        """, (tournament_id, next_round_number, datetime.now()))
-        
-        new_round_id = cur.fetchone()[0]
-        
-        pairings = create_swiss_pairings(players, played_pairs, white_counts, black_counts)
-        
-        board_number = 1
-        for white_id, black_id in pairings:
+            INSERT INTO t_p91748136_chess_support_world.scheduled_jobs (kind, dedupe_key, payload, run_at)
+            VALUES ('tournament-next-round', %s, %s, NOW() + %s * INTERVAL '1 second')
+            ON CONFLICT (kind, dedupe_key) WHERE finished_at IS NULL AND dedupe_key IS NOT NULL DO NOTHING
+            RETURNING id, run_at
+        """, (
+            f'{tournament_id}:{next_round_number}',
+            json.dumps({'tournament_id': int(tournament_id), 'round_number': next_round_number, 'method': method}),
+            delay_seconds
+        ))
+        job = cur.fetchone()
+        
+        if not job:
             cur.execute("""
-                INSERT INTO tournament_pairings 
-                (tournament_id, round_id, white_player_id, black_player_id, board_number, created_at)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, (tournament_id, new_round_id, white_id, black_id, board_number, datetime.now()))
-            board_number += 1
-        
-        cur.execute("""
-            UPDATE tournaments
-            SET current_round = %s
-            WHERE id = %s
-        """, (next_round_number, tournament_id))
+                SELECT id, run_at FROM t_p91748136_chess_support_world.scheduled_jobs
+                WHERE kind = 'tournament-next-round' AND dedupe_key = %s AND finished_at IS NULL
+            """, (f'{tournament_id}:{next_round_number}',))
+            job = cur.fetchone()
         
         conn.commit()
         cur.close()
@@ -199,10 +154,10 @@ def handler(event: dict, context) -> dict:
             },
             'body': json.dumps({
                 'success': True,
-                'message': 'Next round created',
-                'round_id': new_round_id,
-                'round_number': next_round_number,
-                'pairings_count': len(pairings)
+                'message': 'Next round scheduled',
+                'job_id': job[0] if job else None,
+                'run_at': job[1].isoformat() if job else None,
+                'round_number': next_round_number
             }),
             'isBase64Encoded': False
         }
@@ -217,45 +172,3 @@ def handler(event: dict, context) -> dict:
             'body': json.dumps({'success': False, 'error': str(e)}),
             'isBase64Encoded': False
         }
-
-
-def create_swiss_pairings(players, played_pairs, white_counts, black_counts):
-    """Создание пар по швейцарской системе"""
-    players_list = [(p[0], p[1], p[2]) for p in players]
-    pairings = []
-    used = set()
-    
-    for i in range(len(players_list)):
-        if players_list[i][0] in used:
-            continue
-            
-        player1_id = players_list[i][0]
-        
-        for j in range(i + 1, len(players_list)):
-            if players_list[j][0] in used:
-                continue
-                
-            player2_id = players_list[j][0]
-            pair_key = (min(player1_id, player2_id), max(player1_id, player2_id))
-            
-            if pair_key not in played_pairs:
-                white_count_p1 = white_counts.get(player1_id, 0)
-                black_count_p1 = black_counts.get(player1_id, 0)
-                
-                if white_count_p1 <= black_count_p1:
-                    white_id, black_id = player1_id, player2_id
-                else:
-                    white_id, black_id = player2_id, player1_id
-                
-                pairings.append((white_id, black_id))
-                used.add(player1_id)
-                used.add(player2_id)
-                break
-    
-    if len(players_list) % 2 != 0:
-        for player in players_list:
-            if player[0] not in used:
-                pairings.append((player[0], None))
-                break
-    
-    return pairings
@@ -1,7 +1,6 @@
 import json
-import os
-from datetime import datetime, timedelta
-import psycopg2
+from db import get_connection
+from standings import refresh_standings, standings_stale
 
 def handler(event: dict, context) -> dict:
     """API для проверки завершения тура и автоматического старта следующего"""
@@ -46,117 +45,60 @@ def handler(event: dict, context) -> dict:
                 'isBase64Encoded': False
             }
         
-        dsn = os.environ.get('DATABASE_URL')
-        conn = psycopg2.connect(dsn)
+        conn = get_connection()
         cur = conn.cursor()
         
+        # Тур закрывает триггер на tournament_pairings (миграция V0040) в момент записи последнего результата.
+        # О закрытом туре сообщает только тот вызов, который первым отметил finish_reported_at:
+        # параллельная проверка ждёт блокировку строки тура и после неё уже не проходит условие IS NULL
         cur.execute("""
-            SELECT id, round_number, status
-            FROM tournament_rounds
-            WHERE tournament_id = %s AND status = 'active'
-            ORDER BY round_number DESC
-            LIMIT 1
+            UPDATE tournament_rounds tr
+            SET finish_reported_at = NOW()
+            FROM tournaments t
+            WHERE tr.tournament_id = %s AND t.id = tr.tournament_id
+            AND tr.status = 'finished' AND tr.finish_reported_at IS NULL
+            RETURNING tr.round_number, t.rounds
         """, (tournament_id,))
+        reported = max(cur.fetchall(), default=None)
         
-        active_round = cur.fetchone()
-        
-        if not active_round:
-            cur.close()
-            conn.close()
-            return {
-                'statusCode': 200,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({'success': True, 'message': 'No active round', 'round_finished': False}),
-                'isBase64Encoded': False
-            }
-        
-        round_id, round_number, status = active_round
-        
-        cur.execute("""
-            SELECT COUNT(*) as total,
-                   SUM(CASE WHEN g.status IN ('checkmate', 'stalemate', 'draw', 'resignation', 'timeout') THEN 1 ELSE 0 END) as finished
-            FROM tournament_pairings tp
-            LEFT JOIN games g ON g.id = tp.game_id
-            WHERE tp.round_id = %s AND tp.black_player_id IS NOT NULL
-        """, (round_id,))
-        
-        result = cur.fetchone()
-        total_games, finished_games = result[0], result[1] or 0
-        
-        if total_games == 0 or finished_games < total_games:
-            cur.close()
-            conn.close()
-            return {
-                'statusCode': 200,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({
-                    'success': True,
-                    'round_finished': False,
-                    'total_games': total_games,
-                    'finished_games': finished_games
-                }),
-                'isBase64Encoded': False
-            }
-        
-        cur.execute("""
-            UPDATE tournament_pairings tp
-            SET result = CASE 
-                WHEN g.winner = 'white' THEN '1-0'
-                WHEN g.winner = 'black' THEN '0-1'
-                WHEN g.winner = 'draw' THEN '1/2-1/2'
-                ELSE tp.result
-            END
-            FROM games g
-            WHERE tp.game_id = g.id 
-            AND tp.round_id = %s 
-            AND tp.result IS NULL
-        """, (round_id,))
-        
-        cur.execute("""
-            UPDATE tournament_rounds
-            SET status = 'finished', finished_at = %s
-            WHERE id = %s
-        """, (datetime.now(), round_id))
-        
-        cur.execute("""
-            SELECT rounds FROM tournaments WHERE id = %s
-        """, (tournament_id,))
-        
-        total_rounds = cur.fetchone()[0]
-        
-        conn.commit()
-        
-        if round_number >= total_rounds:
+        tournament_finished = False
+        if reported and reported[0] >= reported[1]:
             cur.execute("""
                 UPDATE tournaments
                 SET status = 'finished'
-                WHERE id = %s
+                WHERE id = %s AND status <> 'finished'
             """, (tournament_id,))
-            
-            conn.commit()
-            cur.close()
-            conn.close()
-            
-            return {
-                'statusCode': 200,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({
-                    'success': True,
-                    'round_finished': True,
-                    'tournament_finished': True,
-                    'round_number': round_number
-                }),
-                'isBase64Encoded': False
+            tournament_finished = True
+        
+        # Места пересчитываются, только если триггер отметил строки таблицы с новыми результатами
+        if standings_stale(cur, tournament_id):
+            refresh_standings(cur, tournament_id)
+        conn.commit()
+        
+        if reported:
+            round_number = reported[0]
+            payload = {
+                'success': True,
+                'round_finished': True,
+                'tournament_finished': tournament_finished,
+                'round_number': round_number
             }
+            if not tournament_finished:
+                payload['next_round_number'] = round_number + 1
+        else:
+            cur.execute("""
+                SELECT games_total, games_finished
+                FROM tournament_rounds
+                WHERE tournament_id = %s AND status = 'active'
+                ORDER BY round_number DESC
+                LIMIT 1
+            """, (tournament_id,))
+            active_round = cur.fetchone()
+            payload = {'success': True, 'round_finished': False}
+            if active_round:
+                payload['total_games'], payload['finished_games'] = active_round
+            else:
+                payload['message'] = 'No active round'
         
         cur.close()
         conn.close()
@@ -167,13 +109,7 @@ def handler(event: dict, context) -> dict:
                 'Content-Type': 'application/json',
                 'Access-Control-Allow-Origin': '*'
             },
-            'body': json.dumps({
-                'success': True,
-                'round_finished': True,
-                'tournament_finished': False,
-                'next_round_number': round_number + 1,
-                'round_number': round_number
-            }),
+            'body': json.dumps(payload),
             'isBase64Encoded': False
         }
         
@@ -0,0 +1,107 @@
+'''
+Пересчёт мест и тай-брейков в tournament_standings.
+Очки, счёт побед/ничьих/поражений и результаты по турам поддерживают триггеры на tournament_pairings
+(миграция V0038): каждое изменение строки получает новый version. Строка с version больше ranked_version
+ждёт пересчёта; его делает tournament-check-round, который вызывается через outbox на каждый записанный
+результат (миграция V0047). Пересчёт, сменивший место или тай-брейки строки, тоже даёт ей новый version,
+поэтому ETag таблицы меняется вместе с местами. Чтение таблицы ничего не пересчитывает.
+Usage: if refresh_standings(cur, tournament_id): conn.commit()
+'''
+
+import json
+from typing import Any
+
+from psycopg2.extras import execute_values
+
+from tiebreak_names import parse_tiebreaks
+
+SCHEMA = 't_p91748136_chess_support_world.'
+
+
+def standings_stale(cur: Any, tournament_id: int) -> bool:
+    """Есть ли строки, которые триггер изменил после последнего пересчёта мест"""
+    cur.execute(f"""
+        SELECT EXISTS (
+            SELECT 1 FROM {SCHEMA}tournament_standings
+            WHERE tournament_id = %s AND version > ranked_version
+        )
+    """, (tournament_id,))
+    return cur.fetchone()[0]
+
+
+def refresh_standings(cur: Any, tournament_id: int) -> bool:
+    """Пересчитывает тай-брейки и места после новых результатов. Затронуты игроки, чьи строки изменил
+    триггер (version > ranked_version), и их соперники; у остальных строк меняется только сдвинувшееся место.
+    True — таблица изменилась, нужен commit"""
+    # Пересчёты одного турнира идут по очереди; триггер результата эту блокировку не берёт
+    cur.execute("SELECT pg_advisory_xact_lock(hashtext('tournament_standings'), %s)", (tournament_id,))
+
+    cur.execute(f"SELECT tiebreaks FROM {SCHEMA}tournaments WHERE id = %s", (tournament_id,))
+    tournament = cur.fetchone()
+    if not tournament:
+        return False
+
+    cur.execute(f"""
+        SELECT player_id, version, ranked_version, rank, tiebreaks
+        FROM {SCHEMA}tournament_standings
+        WHERE tournament_id = %s
+        ORDER BY player_id
+    """, (tournament_id,))
+    rows = cur.fetchall()
+    changed = {row[0] for row in rows if row[1] > row[2]}
+    if not changed:
+        return False
+
+    cur.execute(f"""
+        SELECT tr.round_number, tp.result, tp.white_player_id, tp.black_player_id
+        FROM {SCHEMA}tournament_pairings tp
+        JOIN {SCHEMA}tournament_rounds tr ON tr.id = tp.round_id
+        WHERE tp.tournament_id = %s AND tp.result IS NOT NULL
+    """, (tournament_id,))
+    games = cur.fetchall()
+
+    # Очки игрока входят в тай-брейки его соперников
+    affected = set(changed)
+    for _, _, white_id, black_id in games:
+        if white_id in changed and black_id is not None:
+            affected.add(black_id)
+        if black_id in changed:
+            affected.add(white_id)
+
+    # numpy нужен только здесь: модуль тай-брейков грузится при первом пересчёте
+    from tiebreaks import rank_players
+
+    order = parse_tiebreaks(tournament[0])
+    ranked_ids, values = rank_players([row[0] for row in rows], games, order)
+    stored = {row[0]: row for row in rows}
+    # Строка, у которой сменились место или тай-брейки, получает новый version: по нему строятся ETag таблицы
+    updates = [
+        (int(tournament_id), player_id, rank, json.dumps(values[player_id]), stored[player_id][1],
+         stored[player_id][3] != rank or stored[player_id][4] != values[player_id])
+        for rank, player_id in enumerate(ranked_ids, start=1)
+        if player_id in affected or stored[player_id][3] != rank
+    ]
+
+    # Блокировка по возрастанию player_id — в том же порядке строки блокирует триггер.
+    # Результат, записанный после чтения выше, снова поднимет version строки, и её пересчитает следующая проверка
+    cur.execute(f"""
+        SELECT 1 FROM {SCHEMA}tournament_standings
+        WHERE tournament_id = %s AND player_id = ANY(%s)
+        ORDER BY player_id
+        FOR UPDATE
+    """, (tournament_id, [update[1] for update in updates]))
+
+    # Строка, которую триггер изменил после чтения (version не совпадает с прочитанным), остаётся ждать пересчёта
+    execute_values(cur, f"""
+        UPDATE {SCHEMA}tournament_standings s
+        SET rank = v.rank, tiebreaks = v.tiebreaks::jsonb,
+            version = COALESCE(v.new_version, s.version),
+            ranked_version = CASE WHEN s.version = v.seen_version THEN COALESCE(v.new_version, s.version)
+                                  ELSE GREATEST(s.ranked_version, v.seen_version) END
+        FROM (
+            SELECT v.*, CASE WHEN v.modified THEN nextval('{SCHEMA}tournament_standings_version_seq') END AS new_version
+            FROM (VALUES %s) AS v(tournament_id, player_id, rank, tiebreaks, seen_version, modified)
+        ) v
+        WHERE s.tournament_id = v.tournament_id AND s.player_id = v.player_id
+    """, updates, page_size=1000)
+    return True
@@ -0,0 +1,115 @@
+'''
+Дополнительные показатели (тай-брейки) для турнирной таблицы, считаются сразу для всех игроков.
+Результаты лежат в плотных массивах игроки × туры: соперник и набранные очки в каждом туре.
+Usage: ranked_ids, values = rank_players(player_ids, games, parse_tiebreaks(tournament.tiebreaks))  # parse_tiebreaks — из tiebreak_names
+'''
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Очки белых и чёрных по результату в tournament_pairings
+RESULT_POINTS = {'1-0': (1.0, 0.0), '0-1': (0.0, 1.0), '1/2-1/2': (0.5, 0.5)}
+
+
+def build_matrix(player_ids: List[int], games: Iterable[Tuple[int, Optional[str], int, Optional[int]]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Матрицы игроки × туры по партиям (round_number, result, white_id, black_id):
+    opponents — индекс соперника или -1 (пропуск тура, неявка, соперник выбыл), points — очки за тур"""
+    games = [g for g in games if g[1] in RESULT_POINTS]
+    index = {player_id: i for i, player_id in enumerate(player_ids)}
+    rounds = max((g[0] for g in games), default=0)
+
+    opponents = np.full((len(player_ids), rounds), -1, dtype=np.int64)
+    points = np.zeros((len(player_ids), rounds))
+
+    for round_number, result, white_id, black_id in games:
+        white_points, black_points = RESULT_POINTS[result]
+        white = index.get(white_id)
+        black = index.get(black_id) if black_id is not None else None
+        r = round_number - 1
+        if white is not None:
+            points[white, r] = white_points
+            if black is not None:
+                opponents[white, r] = black
+        if black is not None:
+            points[black, r] = black_points
+            if white is not None:
+                opponents[black, r] = white
+
+    return opponents, points
+
+
+def opponent_scores(opponents: np.ndarray, scores: np.ndarray) -> np.ndarray:
+    """Очки соперника в каждом туре; за несыгранный тур — виртуальный соперник с очками самого игрока"""
+    return np.where(opponents >= 0, scores[np.maximum(opponents, 0)], scores[:, None])
+
+
+def direct_encounter(keys: List[np.ndarray], opponents: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """Очки во встречах между игроками, равными по всем предыдущим показателям.
+    Считается только для групп, где все сыграли друг с другом, иначе показатель не различает"""
+    n = opponents.shape[0]
+    result = np.zeros(n)
+    if n == 0:
+        return result
+
+    order = np.lexsort(tuple(reversed(keys)))
+    stacked = np.stack([key[order] for key in keys], axis=1)
+    boundaries = np.flatnonzero(np.any(stacked[1:] != stacked[:-1], axis=1)) + 1
+
+    for group in np.split(order, boundaries):
+        if len(group) < 2:
+            continue
+        inside = np.isin(opponents[group], group)
+        met = [len(set(opponents[i][row].tolist())) for i, row in zip(group, inside)]
+        if min(met) < len(group) - 1:
+            continue
+        result[group] = (points[group] * inside).sum(axis=1)
+
+    return result
+
+
+def compute_tiebreaks(opponents: np.ndarray, points: np.ndarray, names: Sequence[str]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Очки и показатели из names; direct_encounter зависит от порядка и считается по ходу"""
+    scores = points.sum(axis=1)
+    opp_scores = opponent_scores(opponents, scores)
+    buchholz = opp_scores.sum(axis=1)
+    rounds = opponents.shape[1]
+
+    values: Dict[str, np.ndarray] = {}
+    keys = [-scores]
+    for name in names:
+        if name == 'buchholz':
+            value = buchholz
+        elif name == 'buchholz_cut1':
+            value = buchholz - opp_scores.min(axis=1) if rounds > 1 else buchholz
+        elif name == 'buchholz_median':
+            value = buchholz - opp_scores.min(axis=1) - opp_scores.max(axis=1) if rounds > 2 else buchholz
+        elif name == 'sonneborn_berger':
+            value = (points * opp_scores).sum(axis=1)
+        elif name == 'progressive':
+            value = np.cumsum(points, axis=1).sum(axis=1)
+        elif name == 'direct_encounter':
+            value = direct_encounter(keys, opponents, points)
+        else:
+            raise ValueError(f'Неизвестный тай-брейк: {name}')
+        values[name] = value
+        keys.append(-value)
+
+    return scores, values
+
+
+def rank_players(player_ids: List[int], games: Iterable[Tuple[int, Optional[str], int, Optional[int]]],
+                 names: Sequence[str]) -> Tuple[List[int], Dict[int, Dict[str, float]]]:
+    """Места игроков по очкам и тай-брейкам в порядке names; при полном равенстве — по id"""
+    opponents, points = build_matrix(player_ids, games)
+    scores, values = compute_tiebreaks(opponents, points, names)
+
+    ids = np.array(player_ids, dtype=np.int64)
+    keys = [-scores] + [-values[name] for name in names] + [ids]
+    order = np.lexsort(tuple(reversed(keys)))
+
+    per_player = {
+        player_id: {name: float(values[name][i]) for name in names}
+        for i, player_id in enumerate(player_ids)
+    }
+    return [player_ids[i] for i in order], per_player
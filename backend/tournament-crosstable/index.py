@@ -0,0 +1,201 @@
+import json
+from collections import OrderedDict
+from db import get_connection
+
+# Готовые ответы по турнирам: ключ — версии tournament_standings и число туров, тело пересобирается только после нового результата или пересчёта мест
+CACHE_SIZE = 32
+_cache: 'OrderedDict[str, tuple]' = OrderedDict()
+
+# Символ результата для игрока: очки белых/чёрных
+RESULT_MARKS = {'1-0': ('1', '0'), '0-1': ('0', '1'), '1/2-1/2': ('½', '½')}
+
+def current_version(cur, tournament_id):
+    '''Версия таблицы: максимальные version и ranked_version строк (ranked_version растёт с каждым пересчётом мест),
+    их число и число туров (новый тур добавляет пары без результата)'''
+    cur.execute("""
+        SELECT t.rounds,
+               (SELECT MAX(version) FROM t_p91748136_chess_support_world.tournament_standings WHERE tournament_id = t.id),
+               (SELECT MAX(ranked_version) FROM t_p91748136_chess_support_world.tournament_standings WHERE tournament_id = t.id),
+               (SELECT COUNT(*) FROM t_p91748136_chess_support_world.tournament_standings WHERE tournament_id = t.id),
+               (SELECT COUNT(*) FROM t_p91748136_chess_support_world.tournament_rounds WHERE tournament_id = t.id)
+        FROM t_p91748136_chess_support_world.tournaments t
+        WHERE t.id = %s
+    """, (tournament_id,))
+    return cur.fetchone()
+
+def build_crosstable(cur, tournament_id, rounds_count):
+    '''Матрица игроки × туры за один проход по tournament_pairings; строки идут по местам'''
+    cur.execute("""
+        SELECT s.player_id, u.full_name, u.last_name, s.rank, s.points
+        FROM t_p91748136_chess_support_world.tournament_standings s
+        JOIN t_p91748136_chess_support_world.users u ON u.id = s.player_id
+        WHERE s.tournament_id = %s
+        ORDER BY s.rank NULLS LAST, s.points DESC, s.player_id
+    """, (tournament_id,))
+    players = cur.fetchall()
+
+    cur.execute("""
+        SELECT tr.round_number, tp.white_player_id, tp.black_player_id, tp.result
+        FROM t_p91748136_chess_support_world.tournament_pairings tp
+        JOIN t_p91748136_chess_support_world.tournament_rounds tr ON tr.id = tp.round_id
+        WHERE tp.tournament_id = %s
+    """, (tournament_id,))
+    pairings = cur.fetchall()
+
+    rounds_count = max([rounds_count or 0] + [row[0] for row in pairings])
+    row_of = {player[0]: i for i, player in enumerate(players)}
+    ranks = [player[3] for player in players]
+
+    opponent = [[None] * rounds_count for _ in players]
+    color = [['-'] * rounds_count for _ in players]
+    result = [['-'] * rounds_count for _ in players]
+
+    for round_number, white_id, black_id, game_result in pairings:
+        r = round_number - 1
+        white = row_of.get(white_id)
+        black = row_of.get(black_id) if black_id is not None else None
+
+        if black_id is None:
+            if white is not None:
+                result[white][r] = '+'
+            continue
+
+        marks = RESULT_MARKS.get(game_result, ('*', '*'))
+        for side, other, side_color, mark in ((white, black, 'w', marks[0]), (black, white, 'b', marks[1])):
+            if side is None:
+                continue
+            opponent[side][r] = ranks[other] if other is not None else None
+            color[side][r] = side_color
+            result[side][r] = mark
+
+    return {
+        'tournament_id': int(tournament_id),
+        'rounds': rounds_count,
+        'players': {
+            'id': [player[0] for player in players],
+            'full_name': [player[1] or '' for player in players],
+            'last_name': [player[2] or '' for player in players],
+            'rank': ranks,
+            'points': [float(player[4]) for player in players]
+        },
+        'opponent': opponent,
+        'color': [''.join(row) for row in color],
+        'result': [''.join(row) for row in result]
+    }
+
+def handler(event, context):
+    '''
+    API кросс-таблицы турнира: для каждого игрока и тура — место соперника, цвет и результат.
+    Ответ по столбцам: players — массивы id/full_name/last_name/мест/очков, opponent — места соперников по турам,
+    color и result — строки по символу на тур (w/b/-, 1/½/0, + пропуск тура, * партия идёт)
+    '''
+
+    method = event.get('httpMethod', 'GET')
+
+    if method == 'OPTIONS':
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Allow-Methods': 'GET, OPTIONS',
+                'Access-Control-Allow-Headers': 'Content-Type, If-None-Match'
+            },
+            'body': '',
+            'isBase64Encoded': False
+        }
+
+    if method != 'GET':
+        return {
+            'statusCode': 405,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({'error': 'Method not allowed'}),
+            'isBase64Encoded': False
+        }
+
+    params = event.get('queryStringParameters') or {}
+    tournament_id = params.get('tournament_id')
+
+    if not tournament_id:
+        return {
+            'statusCode': 400,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({'error': 'tournament_id is required'}),
+            'isBase64Encoded': False
+        }
+
+    try:
+        conn = get_connection()
+        cur = conn.cursor()
+
+        version = current_version(cur, tournament_id)
+        if not version:
+            cur.close()
+            conn.close()
+            return {
+                'statusCode': 404,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': 'Tournament not found'}),
+                'isBase64Encoded': False
+            }
+
+        # Чтение ничего не пишет: строки с нулём создают регистрация (триггер V0038), tournament-add-test-participants
+        # и tournament-reset
+        key = version[1:]
+        cached = _cache.get(tournament_id)
+
+        if cached and cached[0] == key:
+            _cache.move_to_end(tournament_id)
+            body = cached[1]
+        else:
+            # Места соперников берутся из tournament_standings: их пересчитывает tournament-check-round после каждого результата
+            body = json.dumps(build_crosstable(cur, tournament_id, version[0]))
+            _cache[tournament_id] = (key, body)
+            if len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+
+        cur.close()
+        conn.close()
+
+        headers = {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Expose-Headers': 'ETag',
+            'Cache-Control': 'no-cache',
+            'ETag': '"%s-%s-%s-%s-%s"' % ((tournament_id,) + tuple(key))
+        }
+
+        request_headers = event.get('headers') or {}
+        if (request_headers.get('If-None-Match') or request_headers.get('if-none-match')) == headers['ETag']:
+            return {
+                'statusCode': 304,
+                'headers': headers,
+                'body': '',
+                'isBase64Encoded': False
+            }
+
+        return {
+            'statusCode': 200,
+            'headers': headers,
+            'isBase64Encoded': False,
+            'body': body
+        }
+
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'isBase64Encoded': False,
+            'body': json.dumps({'error': str(e)})
+        }
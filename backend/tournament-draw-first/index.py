@@ -1,8 +1,6 @@
 import json
-import os
-import random
-from datetime import datetime
-import psycopg2
+from db import get_connection
+from swiss import load_players, pair_round, save_round
 
 def handler(event: dict, context) -> dict:
     """API для проведения жеребьевки первого тура турнира"""
@@ -47,19 +45,10 @@ def handler(event: dict, context) -> dict:
                 'isBase64Encoded': False
             }
         
-        dsn = os.environ.get('DATABASE_URL')
-        conn = psycopg2.connect(dsn)
+        conn = get_connection()
         cur = conn.cursor()
         
-        cur.execute(f"""
-            SELECT tr.player_id, u.ms_rating
-            FROM t_p91748136_chess_support_world.tournament_registrations tr
-            JOIN t_p91748136_chess_support_world.users u ON u.id = tr.player_id
-            WHERE tr.tournament_id = {tournament_id} AND tr.status = 'registered'
-            ORDER BY u.ms_rating DESC
-        """)
-        
-        participants = cur.fetchall()
+        participants = load_players(cur, tournament_id)
         
         if len(participants) < 2:
             cur.close()
@@ -74,47 +63,8 @@ def handler(event: dict, context) -> dict:
                 'isBase64Encoded': False
             }
         
-        created_at = datetime.now().isoformat()
-        cur.execute(f"""
-            INSERT INTO t_p91748136_chess_support_world.tournament_rounds (tournament_id, round_number, status, created_at)
-            VALUES ({tournament_id}, 1, 'pending', '{created_at}')
-            RETURNING id
-        """)
-        
-        round_id = cur.fetchone()[0]
-        
-        player_ids = [p[0] for p in participants]
-        random.shuffle(player_ids)
-        
-        if len(player_ids) % 2 != 0:
-            player_ids.append(None)
-        
-        pairings = []
-        board_number = 1
-        
-        for i in range(0, len(player_ids), 2):
-            white_id = player_ids[i]
-            black_id = player_ids[i + 1] if i + 1 < len(player_ids) else None
-            
-            black_clause = f"{black_id}" if black_id is not None else "NULL"
-            
-            cur.execute(f"""
-                INSERT INTO t_p91748136_chess_support_world.tournament_pairings 
-                (tournament_id, round_id, white_player_id, black_player_id, board_number, created_at)
-                VALUES ({tournament_id}, {round_id}, {white_id}, {black_clause}, {board_number}, '{created_at}')
-                RETURNING id
-            """)
-            
-            pairing_id = cur.fetchone()[0]
-            
-            pairings.append({
-                'id': pairing_id,
-                'board_number': board_number,
-                'white_player_id': white_id,
-                'black_player_id': black_id
-            })
-            
-            board_number += 1
+        # Первый тур: посев по рейтингу, верхняя половина против нижней
+        round_id, pairings = save_round(cur, tournament_id, 1, pair_round(participants))
         
         cur.execute(f"""
             UPDATE t_p91748136_chess_support_world.tournaments
@@ -1,8 +1,6 @@
 import json
-import os
-from datetime import datetime
-from typing import List, Tuple, Dict, Set
-import psycopg2
+from db import get_connection
+from swiss import load_players, pair_round, save_round, PAIRING_METHODS, DEFAULT_PAIRING_METHOD
 
 def handler(event: dict, context) -> dict:
     """API для проведения жеребьевки по швейцарской системе"""
@@ -48,33 +46,19 @@ def handler(event: dict, context) -> dict:
                 'isBase64Encoded': False
             }
         
-        dsn = os.environ.get('DATABASE_URL')
-        conn = psycopg2.connect(dsn)
-        cur = conn.cursor()
+        method = body.get('method') or DEFAULT_PAIRING_METHOD
+        if method not in PAIRING_METHODS:
+            return {
+                'statusCode': 400,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({'success': False, 'error': 'Unknown pairing method'}),
+                'isBase64Encoded': False
+            }
         
-        cur.execute("""
-            SELECT 
-                tp.user_id,
-                u.ms_rating,
-                COALESCE(SUM(
-                    CASE 
-                        WHEN tpair.result = '1-0' AND tpair.white_player_id = tp.user_id THEN 1.0
-                        WHEN tpair.result = '0-1' AND tpair.black_player_id = tp.user_id THEN 1.0
-                        WHEN tpair.result = '1/2-1/2' THEN 0.5
-                        ELSE 0
-                    END
-                ), 0) as score
-            FROM tournament_participants tp
-            JOIN users u ON u.id = tp.user_id
-            LEFT JOIN tournament_pairings tpair ON 
-                (tpair.white_player_id = tp.user_id OR tpair.black_player_id = tp.user_id)
-                AND tpair.tournament_id = tp.tournament_id
-            WHERE tp.tournament_id = %s AND tp.status = 'registered'
-            GROUP BY tp.user_id, u.ms_rating
-            ORDER BY score DESC, u.ms_rating DESC
-        """, (tournament_id,))
+        conn = get_connection()
+        cur = conn.cursor()
         
-        players = cur.fetchall()
+        players = load_players(cur, tournament_id)
         
         if len(players) < 2:
             cur.close()
@@ -89,70 +73,8 @@ def handler(event: dict, context) -> dict:
                 'isBase64Encoded': False
             }
         
-        cur.execute("""
-            SELECT white_player_id, black_player_id
-            FROM tournament_pairings
-            WHERE tournament_id = %s
-        """, (tournament_id,))
-        
-        played_pairs = set()
-        for white_id, black_id in cur.fetchall():
-            if white_id and black_id:
-                played_pairs.add((min(white_id, black_id), max(white_id, black_id)))
-        
-        cur.execute("""
-            SELECT 
-                tpair.white_player_id as player_id,
-                COUNT(*) as white_games
-            FROM tournament_pairings tpair
-            WHERE tpair.tournament_id = %s AND tpair.white_player_id IS NOT NULL
-            GROUP BY tpair.white_player_id
-        """, (tournament_id,))
-        
-        white_counts = {row[0]: row[1] for row in cur.fetchall()}
-        
-        cur.execute("""
-            SELECT 
-                tpair.black_player_id as player_id,
-                COUNT(*) as black_games
-            FROM tournament_pairings tpair
-            WHERE tpair.tournament_id = %s AND tpair.black_player_id IS NOT NULL
-            GROUP BY tpair.black_player_id
-        """, (tournament_id,))
-        
-        black_counts = {row[0]: row[1] for row in cur.fetchall()}
-        
-        cur.execute("""
-            INSERT INTO tournament_rounds (tournament_id, round_number, status, created_at)
-            VALUES (%s, %s, 'pending', %s)
-            RETURNING id
-        """, (tournament_id, round_number, datetime.now()))
-        
-        round_id = cur.fetchone()[0]
-        
-        pairings = create_swiss_pairings(players, played_pairs, white_counts, black_counts)
-        
-        board_number = 1
-        result_pairings = []
-        
-        for white_id, black_id in pairings:
-            cur.execute("""
-                INSERT INTO tournament_pairings 
-                (tournament_id, round_id, white_player_id, black_player_id, board_number, created_at)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                RETURNING id
-            """, (tournament_id, round_id, white_id, black_id, board_number, datetime.now()))
-            
-            pairing_id = cur.fetchone()[0]
-            
-            result_pairings.append({
-                'id': pairing_id,
-                'board_number': board_number,
-                'white_player_id': white_id,
-                'black_player_id': black_id
-            })
-            
-            board_number += 1
+        pairings = pair_round(players, method=method)
+        round_id, result_pairings = save_round(cur, tournament_id, round_number, pairings)
         
         cur.execute("""
             UPDATE tournaments
@@ -188,56 +110,3 @@ def handler(event: dict, context) -> dict:
             'body': json.dumps({'success': False, 'error': str(e)}),
             'isBase64Encoded': False
         }
-
-
-def create_swiss_pairings(
-    players: List[Tuple[int, int, float]], 
-    played_pairs: Set[Tuple[int, int]],
-    white_counts: Dict[int, int],
-    black_counts: Dict[int, int]
-) -> List[Tuple[int, int]]:
-    """Создание пар по швейцарской системе"""
-    
-    players_list = [(p[0], p[1], p[2]) for p in players]
-    pairings = []
-    used = set()
-    
-    for i in range(len(players_list)):
-        if players_list[i][0] in used:
-            continue
-            
-        player1_id = players_list[i][0]
-        player1_rating = players_list[i][1]
-        
-        for j in range(i + 1, len(players_list)):
-            if players_list[j][0] in used:
-                continue
-                
-            player2_id = players_list[j][0]
-            player2_rating = players_list[j][1]
-            
-            pair_key = (min(player1_id, player2_id), max(player1_id, player2_id))
-            
-            if pair_key not in played_pairs:
-                white_count_p1 = white_counts.get(player1_id, 0)
-                black_count_p1 = black_counts.get(player1_id, 0)
-                white_count_p2 = white_counts.get(player2_id, 0)
-                black_count_p2 = black_counts.get(player2_id, 0)
-                
-                if white_count_p1 <= black_count_p1:
-                    white_id, black_id = player1_id, player2_id
-                else:
-                    white_id, black_id = player2_id, player1_id
-                
-                pairings.append((white_id, black_id))
-                used.add(player1_id)
-                used.add(player2_id)
-                break
-    
-    if len(players_list) % 2 != 0:
-        for player in players_list:
-            if player[0] not in used:
-                pairings.append((player[0], None))
-                break
-    
-    return pairings
@@ -5,9 +5,8 @@ Returns: JSON with games list including player details
 """
 
 import json
-import os
-import psycopg2
 from typing import Dict, Any
+from db import get_connection
 
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -45,8 +44,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'isBase64Encoded': False
         }
     
-    database_url = os.environ.get('DATABASE_URL')
-    conn = psycopg2.connect(database_url)
+    conn = get_connection()
     cur = conn.cursor()
     
     try:
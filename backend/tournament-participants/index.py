@@ -6,9 +6,8 @@ Returns: JSON with participants list (first_name, last_name, birth_date)
 '''
 
 import json
-import os
-import psycopg2
 from typing import Dict, Any
+from db import get_connection
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
@@ -48,9 +47,8 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'body': json.dumps({'error': 'tournament_id is required'})
         }
     
-    database_url = os.environ.get('DATABASE_URL')
     
-    conn = psycopg2.connect(database_url)
+    conn = get_connection()
     cur = conn.cursor()
     
     query = f'''
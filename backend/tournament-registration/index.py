@@ -6,14 +6,14 @@ Returns: JSON с результатом регистрации или отмен
 
 import json
 import os
-import psycopg2
 from typing import Dict, Any, Optional
+from db import get_connection
 
 def get_db_connection():
     dsn = os.environ.get('DATABASE_URL')
     if not dsn:
         raise ValueError('DATABASE_URL not set')
-    return psycopg2.connect(dsn)
+    return get_connection()
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
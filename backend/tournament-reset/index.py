@@ -1,6 +1,5 @@
 import json
-import os
-import psycopg2
+from db import get_connection
 
 def handler(event: dict, context) -> dict:
     '''API для сброса турнира в начальное состояние'''
@@ -53,8 +52,7 @@ def handler(event: dict, context) -> dict:
         }
     
     try:
-        dsn = os.environ.get('DATABASE_URL')
-        conn = psycopg2.connect(dsn)
+        conn = get_connection()
         cur = conn.cursor()
         
         cur.execute(f"UPDATE t_p91748136_chess_support_world.tournament_pairings SET game_id = NULL WHERE tournament_id = {tournament_id}")
@@ -62,12 +60,27 @@ def handler(event: dict, context) -> dict:
         cur.execute(f"DELETE FROM t_p91748136_chess_support_world.games WHERE tournament_id = {tournament_id}")
         games_deleted = cur.rowcount
         
+        # Таблица очищается до удаления пар, чтобы триггер не снимал результаты построчно; участники возвращаются с нулём ниже
+        cur.execute("DELETE FROM t_p91748136_chess_support_world.tournament_standings WHERE tournament_id = %s", (tournament_id,))
+        
         cur.execute(f"DELETE FROM t_p91748136_chess_support_world.tournament_pairings WHERE tournament_id = {tournament_id}")
         pairings_deleted = cur.rowcount
         
         cur.execute(f"DELETE FROM t_p91748136_chess_support_world.tournament_rounds WHERE tournament_id = {tournament_id}")
         rounds_deleted = cur.rowcount
         
+        # Места у новых строк проставит tournament-check-round после первого результата, чтение таблицы их не пересчитывает
+        cur.execute("""
+            INSERT INTO t_p91748136_chess_support_world.tournament_standings (tournament_id, player_id, version)
+            SELECT %s, player_id, nextval('t_p91748136_chess_support_world.tournament_standings_version_seq')
+            FROM (
+                SELECT user_id AS player_id FROM t_p91748136_chess_support_world.tournament_participants WHERE tournament_id = %s
+                UNION
+                SELECT player_id FROM t_p91748136_chess_support_world.tournament_registrations WHERE tournament_id = %s AND status = 'registered'
+            ) participants
+            ON CONFLICT (tournament_id, player_id) DO NOTHING
+        """, (tournament_id, tournament_id, tournament_id))
+        
         cur.execute(f"""
             UPDATE t_p91748136_chess_support_world.tournaments 
             SET status = 'registration_open', current_round = 0 
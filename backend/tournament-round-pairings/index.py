@@ -1,6 +1,5 @@
 import json
-import os
-import psycopg2
+from db import get_connection
 
 def handler(event: dict, context) -> dict:
     """API для получения пар конкретного тура"""
@@ -46,8 +45,7 @@ def handler(event: dict, context) -> dict:
                 'isBase64Encoded': False
             }
         
-        dsn = os.environ.get('DATABASE_URL')
-        conn = psycopg2.connect(dsn)
+        conn = get_connection()
         cur = conn.cursor()
         
         cur.execute(f"""
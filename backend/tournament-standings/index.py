@@ -1,6 +1,21 @@
 import json
-import os
-import psycopg2
+from db import get_connection
+from tiebreak_names import parse_tiebreaks
+
+def read_standings(cur, tournament_id):
+    '''Турнир и строки tournament_standings одним чтением по первичному ключу; у турнира без строк player_id = NULL.
+    Места и тай-брейки пересчитывает tournament-check-round после каждого результата, здесь они только читаются'''
+    cur.execute("""
+        SELECT t.rounds, t.tiebreaks, t.accelerated, s.player_id, u.full_name, u.last_name, u.birth_date,
+               s.points, s.wins, s.draws, s.losses, s.games_played, s.round_results, s.tiebreaks,
+               s.rank, s.version
+        FROM t_p91748136_chess_support_world.tournaments t
+        LEFT JOIN t_p91748136_chess_support_world.tournament_standings s ON s.tournament_id = t.id
+        LEFT JOIN t_p91748136_chess_support_world.users u ON u.id = s.player_id
+        WHERE t.id = %s
+        ORDER BY s.rank NULLS LAST, s.points DESC, s.player_id
+    """, (tournament_id,))
+    return cur.fetchall()
 
 def handler(event, context):
     '''API для получения турнирной таблицы'''
@@ -13,7 +28,7 @@ def handler(event, context):
             'headers': {
                 'Access-Control-Allow-Origin': '*',
                 'Access-Control-Allow-Methods': 'GET, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
+                'Access-Control-Allow-Headers': 'Content-Type, If-None-Match'
             },
             'body': '',
             'isBase64Encoded': False
@@ -44,109 +59,67 @@ def handler(event, context):
             'isBase64Encoded': False
         }
     
-    dsn = os.environ.get('DATABASE_URL')
     
     try:
-        conn = psycopg2.connect(dsn)
+        conn = get_connection()
         cur = conn.cursor()
         
-        cur.execute(f"SELECT rounds FROM t_p91748136_chess_support_world.tournaments WHERE id = {tournament_id}")
-        tournament_data = cur.fetchone()
-        rounds_count = tournament_data[0] if tournament_data else 7
+        rows = read_standings(cur, tournament_id)
         
-        cur.execute(f"""
-            SELECT DISTINCT u.id, u.full_name, u.last_name, u.birth_date
-            FROM t_p91748136_chess_support_world.users u
-            WHERE u.id IN (
-                SELECT user_id FROM t_p91748136_chess_support_world.tournament_participants WHERE tournament_id = {tournament_id}
-                UNION
-                SELECT player_id FROM t_p91748136_chess_support_world.tournament_registrations WHERE tournament_id = {tournament_id} AND status = 'registered'
-            )
-        """)
-        rows = cur.fetchall()
+        cur.close()
+        conn.close()
         
-        standings = []
-        for row in rows:
-            user_id = row[0]
-            
-            cur.execute(f"""
-                SELECT tr.round_number, tp.result, tp.white_player_id, tp.black_player_id
-                FROM t_p91748136_chess_support_world.tournament_pairings tp
-                JOIN t_p91748136_chess_support_world.tournament_rounds tr ON tr.id = tp.round_id
-                WHERE tp.tournament_id = {tournament_id}
-                AND (tp.white_player_id = {user_id} OR tp.black_player_id = {user_id})
-                AND tp.result IS NOT NULL
-                ORDER BY tr.round_number
-            """)
-            games = cur.fetchall()
-            
-            wins = 0
-            draws = 0
-            losses = 0
-            points = 0.0
-            round_results = {}
-            
-            for game in games:
-                round_num = game[0]
-                result = game[1]
-                white_id = game[2]
-                is_white = white_id == user_id
-                
-                if result == '1-0':
-                    if is_white:
-                        wins += 1
-                        points += 1.0
-                        round_results[round_num] = '1'
-                    else:
-                        losses += 1
-                        round_results[round_num] = '0'
-                elif result == '0-1':
-                    if is_white:
-                        losses += 1
-                        round_results[round_num] = '0'
-                    else:
-                        wins += 1
-                        points += 1.0
-                        round_results[round_num] = '1'
-                elif result == '1/2-1/2':
-                    draws += 1
-                    points += 0.5
-                    round_results[round_num] = '½'
-            
-            games_played = wins + draws + losses
-            
-            standings.append({
-                'id': user_id,
-                'first_name': row[1] or '',
-                'last_name': row[2] or '',
-                'birth_date': row[3].isoformat() if row[3] else None,
-                'points': points,
-                'wins': wins,
-                'draws': draws,
-                'losses': losses,
-                'games_played': games_played,
-                'round_results': round_results
-            })
+        rounds_count = rows[0][0] if rows else 7
+        tiebreak_order = parse_tiebreaks(rows[0][1] if rows else None)
+        players = [row for row in rows if row[3] is not None]
         
-        standings.sort(key=lambda x: x['points'], reverse=True)
+        etag = '"%s-%s-%s"' % (tournament_id, max((row[15] for row in players), default=0), len(players))
+        headers = {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Expose-Headers': 'ETag',
+            'Cache-Control': 'no-cache',
+            'ETag': etag
+        }
         
-        for i, player in enumerate(standings):
-            player['rank'] = i + 1
+        request_headers = event.get('headers') or {}
+        if_none_match = request_headers.get('If-None-Match') or request_headers.get('if-none-match')
+        if if_none_match == etag:
+            return {
+                'statusCode': 304,
+                'headers': headers,
+                'body': '',
+                'isBase64Encoded': False
+            }
         
-        cur.close()
-        conn.close()
+        standings = []
+        for row in players:
+            standings.append({
+                'rank': row[14],
+                'id': row[3],
+                'first_name': row[4] or '',
+                'last_name': row[5] or '',
+                'birth_date': row[6].isoformat() if row[6] else None,
+                'points': float(row[7]),
+                'wins': row[8],
+                'draws': row[9],
+                'losses': row[10],
+                'games_played': row[11],
+                'round_results': row[12],
+                'tiebreaks': {name: row[13].get(name, 0.0) for name in tiebreak_order}
+            })
         
         return {
             'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
+            'headers': headers,
             'isBase64Encoded': False,
             'body': json.dumps({
                 'standings': standings,
                 'total': len(standings),
-                'rounds': rounds_count
+                'rounds': rounds_count,
+                'tiebreak_order': tiebreak_order,
+                # Очки в таблице — только сыгранные: виртуальные очки ускоренной жеребьёвки учитывает лишь swiss.py при составлении пар
+                'accelerated': bool(rows[0][2]) if rows else False
             })
         }
         
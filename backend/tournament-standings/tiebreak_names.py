@@ -0,0 +1,16 @@
+'''
+Названия тай-брейков и их порядок для турнира, без numpy: таблицу читают и функции, которые места не пересчитывают.
+Usage: order = parse_tiebreaks(tournament.tiebreaks)
+'''
+
+from typing import List, Optional
+
+TIEBREAKS = ('buchholz', 'buchholz_cut1', 'buchholz_median', 'sonneborn_berger', 'progressive', 'direct_encounter')
+DEFAULT_TIEBREAKS = ('buchholz_cut1', 'buchholz', 'sonneborn_berger', 'progressive', 'direct_encounter')
+
+
+def parse_tiebreaks(value: Optional[str]) -> List[str]:
+    """Порядок тай-брейков турнира из строки через запятую; неизвестные названия пропускаются"""
+    names = [name.strip() for name in (value or '').split(',')]
+    names = [name for name in names if name in TIEBREAKS]
+    return names or list(DEFAULT_TIEBREAKS)
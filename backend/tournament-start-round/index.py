@@ -1,9 +1,28 @@
 import json
 import os
-from datetime import datetime
-import psycopg2
 import uuid
-import pusher
+from psycopg2.extras import execute_values
+from db import get_connection
+
+SCHEMA = 't_p91748136_chess_support_world'
+INITIAL_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+_pusher_client = None
+
+def get_pusher_client():
+    """Клиент Pusher и его HTTPS-сессия создаются один раз на тёплый экземпляр функции;
+    сам модуль pusher (вместе с requests) импортируется только при первой отправке"""
+    global _pusher_client
+    if _pusher_client is None:
+        import pusher
+        _pusher_client = pusher.Pusher(
+            app_id=os.environ['PUSHER_APP_ID'],
+            key=os.environ['PUSHER_KEY'],
+            secret=os.environ['PUSHER_SECRET'],
+            cluster=os.environ['PUSHER_CLUSTER'],
+            ssl=True
+        )
+    return _pusher_client
 
 def parse_time_control(time_control: str) -> int:
     """Парсит строку вида '5+3' и возвращает начальное время в секундах"""
@@ -16,6 +35,59 @@ def parse_time_control(time_control: str) -> int:
     except Exception:
         return 0
 
+def create_round_games(cur, tournament_id: int, round_number: int, pairings: list, time_control: str) -> list:
+    """Создаёт партии тура одним INSERT и одним UPDATE привязывает их к парам; пропуск тура
+    (пара без чёрных) получает результат 1-0 в том же UPDATE. Число запросов не зависит от числа досок"""
+    initial_time = parse_time_control(time_control) if time_control else None
+    timed = bool(time_control and initial_time)
+    initial_ms = initial_time * 1000 if timed else None
+
+    links = []
+    games = []
+    created_games = []
+    for pairing_id, white_id, black_id in pairings:
+        if black_id is None:
+            links.append((pairing_id, None))
+            continue
+        game_id = str(uuid.uuid4())
+        links.append((pairing_id, game_id))
+        games.append((
+            game_id, INITIAL_FEN, white_id, black_id, tournament_id, round_number,
+            time_control if timed else None,
+            initial_time if timed else None, initial_time if timed else None,
+            initial_ms, initial_ms
+        ))
+        created_games.append({
+            'game_id': game_id,
+            'white_player_id': white_id,
+            'black_player_id': black_id,
+            'pairing_id': pairing_id
+        })
+
+    # turn_started_at берём из часов БД: от него сервер отсчитывает время белых;
+    # increment_ms по time_control проставляет триггер games_set_increment
+    if games:
+        inserted = execute_values(cur, f"""
+            INSERT INTO {SCHEMA}.games
+            (id, fen, white_player_id, black_player_id, tournament_id, round_number, time_control, white_time, black_time,
+             white_time_ms, black_time_ms, pgn, current_turn, status, created_at, updated_at, turn_started_at)
+            VALUES %s
+            RETURNING id
+        """, games, template="(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, '', 'w', 'active', NOW(), NOW(), NOW())",
+            page_size=len(games), fetch=True)
+        if len(inserted) != len(games):
+            raise RuntimeError(f'Создано {len(inserted)} партий из {len(games)}')
+
+    execute_values(cur, f"""
+        UPDATE {SCHEMA}.tournament_pairings tp
+        SET game_id = v.game_id,
+            result = CASE WHEN v.game_id IS NULL THEN '1-0' ELSE tp.result END
+        FROM (VALUES %s) AS v(pairing_id, game_id)
+        WHERE tp.id = v.pairing_id
+    """, links, template='(%s, %s::text)', page_size=len(links))
+
+    return created_games
+
 def handler(event: dict, context) -> dict:
     """API для автоматического старта тура и создания партий"""
     
@@ -60,28 +132,30 @@ def handler(event: dict, context) -> dict:
                 'isBase64Encoded': False
             }
         
-        dsn = os.environ.get('DATABASE_URL')
-        conn = psycopg2.connect(dsn)
+        conn = get_connection()
         cur = conn.cursor()
         
-        # Получаем time_control из настроек турнира
+        # Настройки турнира и номер тура одним запросом; строка тура блокируется до commit,
+        # поэтому повторный или параллельный старт того же тура ждёт и видит уже начатый тур
         cur.execute(f"""
-            SELECT time_control FROM t_p91748136_chess_support_world.tournaments
-            WHERE id = {tournament_id}
-        """)
-        tournament_row = cur.fetchone()
-        time_control = tournament_row[0] if tournament_row else None
-        initial_time = parse_time_control(time_control) if time_control else None
+            SELECT t.time_control, tr.round_number, tr.status
+            FROM {SCHEMA}.tournament_rounds tr
+            JOIN {SCHEMA}.tournaments t ON t.id = tr.tournament_id
+            WHERE tr.id = %s AND tr.tournament_id = %s
+            FOR UPDATE OF tr
+        """, (round_id, tournament_id))
+        round_row = cur.fetchone()
         
         cur.execute(f"""
-            SELECT id, white_player_id, black_player_id
-            FROM t_p91748136_chess_support_world.tournament_pairings
-            WHERE round_id = {round_id} AND tournament_id = {tournament_id}
-        """)
+            SELECT id, white_player_id, black_player_id, game_id
+            FROM {SCHEMA}.tournament_pairings
+            WHERE round_id = %s AND tournament_id = %s
+            ORDER BY board_number, id
+        """, (round_id, tournament_id))
         
         pairings = cur.fetchall()
         
-        if not pairings:
+        if not round_row or not pairings:
             cur.close()
             conn.close()
             return {
@@ -94,61 +168,31 @@ def handler(event: dict, context) -> dict:
                 'isBase64Encoded': False
             }
         
-        cur.execute(f"""
-            SELECT round_number
-            FROM t_p91748136_chess_support_world.tournament_rounds
-            WHERE id = {round_id}
-        """)
-        
-        round_number = cur.fetchone()[0]
+        time_control, round_number, round_status = round_row
         
-        created_games = []
+        if round_status in ('active', 'finished') or any(pairing[3] for pairing in pairings):
+            cur.close()
+            conn.close()
+            return {
+                'statusCode': 409,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'success': False, 'error': 'Round already started'}),
+                'isBase64Encoded': False
+            }
         
-        for pairing_id, white_id, black_id in pairings:
-            if black_id is None:
-                cur.execute(f"""
-                    UPDATE t_p91748136_chess_support_world.tournament_pairings
-                    SET result = '1-0'
-                    WHERE id = {pairing_id}
-                """)
-                continue
-            
-            game_id = str(uuid.uuid4())
-            initial_fen = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
-            now = datetime.now().isoformat()
-            
-            if time_control and initial_time:
-                cur.execute("""
-                    INSERT INTO t_p91748136_chess_support_world.games 
-                    (id, fen, pgn, white_player_id, black_player_id, current_turn, status, tournament_id, round_number, time_control, white_time, black_time, created_at, updated_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """, (game_id, initial_fen, '', white_id, black_id, 'w', 'active', tournament_id, round_number, time_control, initial_time, initial_time, now, now))
-            else:
-                cur.execute("""
-                    INSERT INTO t_p91748136_chess_support_world.games 
-                    (id, fen, pgn, white_player_id, black_player_id, current_turn, status, tournament_id, round_number, created_at, updated_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """, (game_id, initial_fen, '', white_id, black_id, 'w', 'active', tournament_id, round_number, now, now))
-            
-            cur.execute(f"""
-                UPDATE t_p91748136_chess_support_world.tournament_pairings
-                SET game_id = '{game_id}'
-                WHERE id = {pairing_id}
-            """)
-            
-            created_games.append({
-                'game_id': game_id,
-                'white_player_id': white_id,
-                'black_player_id': black_id,
-                'pairing_id': pairing_id
-            })
+        created_games = create_round_games(cur, tournament_id, round_number, [pairing[:3] for pairing in pairings], time_control)
         
-        now = datetime.now().isoformat()
+        # Тур из одного пропуска (games_total = 0) триггер счётчиков не закроет: в нём нет партий, поэтому он закрывается сразу
         cur.execute(f"""
-            UPDATE t_p91748136_chess_support_world.tournament_rounds
-            SET status = 'active', started_at = '{now}'
-            WHERE id = {round_id}
-        """)
+            UPDATE {SCHEMA}.tournament_rounds
+            SET status = CASE WHEN games_total = 0 THEN 'finished' ELSE 'active' END,
+                started_at = NOW(),
+                finished_at = CASE WHEN games_total = 0 THEN NOW() ELSE finished_at END
+            WHERE id = %s
+        """, (round_id,))
         
         conn.commit()
         cur.close()
@@ -157,15 +201,7 @@ def handler(event: dict, context) -> dict:
         # Отправляем событие в Pusher о начале нового тура
         try:
             print(f'[PUSHER] Отправка события new-round для турнира {tournament_id}')
-            pusher_client = pusher.Pusher(
-                app_id=os.environ['PUSHER_APP_ID'],
-                key=os.environ['PUSHER_KEY'],
-                secret=os.environ['PUSHER_SECRET'],
-                cluster=os.environ['PUSHER_CLUSTER'],
-                ssl=True
-            )
-            
-            pusher_client.trigger(
+            get_pusher_client().trigger(
                 f'tournament-{tournament_id}',
                 'new-round',
                 {
@@ -5,6 +5,19 @@ from decimal import Decimal
 from typing import Dict, Any, Optional
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from db import get_connection
+
+# Названия тай-брейков, которые понимает tournament-standings (tiebreaks.TIEBREAKS)
+TIEBREAKS = ('buchholz', 'buchholz_cut1', 'buchholz_median', 'sonneborn_berger', 'progressive', 'direct_encounter')
+DEFAULT_TIEBREAKS = 'buchholz_cut1,buchholz,sonneborn_berger,progressive,direct_encounter'
+
+def normalize_tiebreaks(value: Any) -> Optional[str]:
+    '''Порядок тай-брейков из списка или строки через запятую; None, если есть неизвестные названия'''
+    names = value if isinstance(value, list) else str(value or '').split(',')
+    names = [str(name).strip() for name in names if str(name).strip()]
+    if not names or any(name not in TIEBREAKS for name in names):
+        return None
+    return ','.join(names)
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
@@ -42,7 +55,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     
     conn = None
     try:
-        conn = psycopg2.connect(database_url)
+        conn = get_connection()
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
         if method == 'GET':
@@ -129,15 +142,24 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             entry_fee = body_data.get('entry_fee', 0)
             rounds = body_data.get('rounds', 7)
             status = body_data.get('status', 'draft')
+            tiebreaks = normalize_tiebreaks(body_data.get('tiebreaks', DEFAULT_TIEBREAKS))
+            accelerated = bool(body_data.get('accelerated', False))
+            
+            if not tiebreaks:
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({'error': f'Unknown tiebreak, allowed: {", ".join(TIEBREAKS)}'})
+                }
             
             cur.execute(
                 """
                 INSERT INTO t_p91748136_chess_support_world.tournaments 
-                (title, description, start_date, start_time, location, max_participants, time_control, tournament_type, entry_fee, rounds, status)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                (title, description, start_date, start_time, location, max_participants, time_control, tournament_type, entry_fee, rounds, status, tiebreaks, accelerated)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                 RETURNING *
                 """,
-                (title, description, start_date, start_time, location, max_participants, time_control, tournament_type, entry_fee, rounds, status)
+                (title, description, start_date, start_time, location, max_participants, time_control, tournament_type, entry_fee, rounds, status, tiebreaks, accelerated)
             )
             
             new_tournament = cur.fetchone()
@@ -208,6 +230,19 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             if 'status' in body_data:
                 update_fields.append('status = %s')
                 params.append(body_data['status'])
+            if 'tiebreaks' in body_data:
+                tiebreaks = normalize_tiebreaks(body_data['tiebreaks'])
+                if not tiebreaks:
+                    return {
+                        'statusCode': 400,
+                        'headers': headers,
+                        'body': json.dumps({'error': f'Unknown tiebreak, allowed: {", ".join(TIEBREAKS)}'})
+                    }
+                update_fields.append('tiebreaks = %s')
+                params.append(tiebreaks)
+            if 'accelerated' in body_data:
+                update_fields.append('accelerated = %s')
+                params.append(bool(body_data['accelerated']))
             
             update_fields.append('updated_at = CURRENT_TIMESTAMP')
             params.append(tournament_id)
@@ -222,6 +257,18 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             cur.execute(query, params)
             updated_tournament = cur.fetchone()
             
+            # Новый порядок тай-брейков: места в tournament_standings устаревают, версия меняет ETag.
+            # Флаг ускоренной жеребьёвки тоже отдаётся вместе с таблицей, поэтому и он меняет версию
+            if updated_tournament and ('tiebreaks' in body_data or 'accelerated' in body_data):
+                cur.execute(
+                    """
+                    UPDATE t_p91748136_chess_support_world.tournament_standings
+                    SET version = nextval('t_p91748136_chess_support_world.tournament_standings_version_seq')
+                    WHERE tournament_id = %s
+                    """,
+                    (tournament_id,)
+                )
+            
             if not updated_tournament:
                 return {
                     'statusCode': 404,
@@ -274,6 +321,11 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 (tournament_id,)
             )
             
+            cur.execute(
+                "DELETE FROM t_p91748136_chess_support_world.tournament_standings WHERE tournament_id = %s",
+                (tournament_id,)
+            )
+            
             cur.execute(
                 "DELETE FROM t_p91748136_chess_support_world.tournaments WHERE id = %s RETURNING id",
                 (tournament_id,)
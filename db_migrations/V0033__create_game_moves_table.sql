@@ -0,0 +1,23 @@
+-- Журнал ходов: один короткий INSERT на ход вместо перезаписи games.pgn
+CREATE TABLE IF NOT EXISTS t_p91748136_chess_support_world.game_moves (
+    game_id TEXT NOT NULL REFERENCES t_p91748136_chess_support_world.games(id) ON DELETE CASCADE,
+    ply INTEGER NOT NULL,
+    uci VARCHAR(5),
+    san VARCHAR(10) NOT NULL,
+    clock_ms INTEGER,
+    ts TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (game_id, ply)
+);
+
+ALTER TABLE t_p91748136_chess_support_world.games
+ADD COLUMN IF NOT EXISTS ply INTEGER NOT NULL DEFAULT 0;
+
+-- Для уже идущих партий восстанавливаем номер полухода по FEN
+UPDATE t_p91748136_chess_support_world.games
+SET ply = (split_part(fen, ' ', 6)::INTEGER - 1) * 2 + CASE WHEN split_part(fen, ' ', 2) = 'b' THEN 1 ELSE 0 END
+WHERE split_part(fen, ' ', 6) ~ '^[0-9]+$';
+
+COMMENT ON TABLE t_p91748136_chess_support_world.game_moves IS 'Журнал ходов партии, по одной строке на полуход';
+COMMENT ON COLUMN t_p91748136_chess_support_world.game_moves.clock_ms IS 'Остаток времени сходившего игрока после хода, мс';
+COMMENT ON COLUMN t_p91748136_chess_support_world.games.ply IS 'Номер последнего сделанного полухода';
+COMMENT ON COLUMN t_p91748136_chess_support_world.games.pgn IS 'Ходы до появления журнала game_moves; по окончании партии — полный PGN';
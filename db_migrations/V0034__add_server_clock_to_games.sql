@@ -0,0 +1,17 @@
+-- Часы партии ведёт сервер: остатки в миллисекундах и инкремент по контролю времени
+ALTER TABLE t_p91748136_chess_support_world.games
+ADD COLUMN IF NOT EXISTS white_time_ms INTEGER,
+ADD COLUMN IF NOT EXISTS black_time_ms INTEGER,
+ADD COLUMN IF NOT EXISTS increment_ms INTEGER NOT NULL DEFAULT 0;
+
+UPDATE t_p91748136_chess_support_world.games
+SET white_time_ms = white_time * 1000,
+    black_time_ms = black_time * 1000,
+    increment_ms = CASE WHEN split_part(time_control, '+', 2) ~ '^[0-9]+$'
+                        THEN split_part(time_control, '+', 2)::INTEGER * 1000
+                        ELSE 0 END
+WHERE white_time IS NOT NULL AND black_time IS NOT NULL;
+
+COMMENT ON COLUMN t_p91748136_chess_support_world.games.white_time_ms IS 'Остаток времени белых на момент updated_at, мс';
+COMMENT ON COLUMN t_p91748136_chess_support_world.games.black_time_ms IS 'Остаток времени чёрных на момент updated_at, мс';
+COMMENT ON COLUMN t_p91748136_chess_support_world.games.increment_ms IS 'Добавка Фишера за ход, мс';
@@ -0,0 +1,3 @@
+-- Индекс для поиска активных партий с упавшим флажком (game-flag-sweeper)
+CREATE INDEX IF NOT EXISTS idx_games_status_turn_updated
+ON t_p91748136_chess_support_world.games(status, current_turn, updated_at);
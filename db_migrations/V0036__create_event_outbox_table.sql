@@ -0,0 +1,21 @@
+-- Outbox: события пишутся в одной транзакции с изменением данных, отправляет их outbox-dispatcher
+CREATE TABLE IF NOT EXISTS t_p91748136_chess_support_world.event_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    kind VARCHAR(30) NOT NULL,
+    channel VARCHAR(100),
+    event VARCHAR(50),
+    payload JSONB NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    last_error TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    sent_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_event_outbox_pending
+ON t_p91748136_chess_support_world.event_outbox(next_attempt_at)
+WHERE sent_at IS NULL;
+
+COMMENT ON TABLE t_p91748136_chess_support_world.event_outbox IS 'Очередь исходящих событий (transactional outbox)';
+COMMENT ON COLUMN t_p91748136_chess_support_world.event_outbox.kind IS 'Тип события: pusher или tournament-check';
+COMMENT ON COLUMN t_p91748136_chess_support_world.event_outbox.next_attempt_at IS 'Не раньше этого времени событие можно отправлять (аренда и пауза между повторами)';
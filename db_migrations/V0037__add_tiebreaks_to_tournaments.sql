@@ -0,0 +1,5 @@
+-- Порядок дополнительных показателей для мест в турнирной таблице при равенстве очков
+ALTER TABLE t_p91748136_chess_support_world.tournaments
+ADD COLUMN IF NOT EXISTS tiebreaks VARCHAR(255) NOT NULL DEFAULT 'buchholz_cut1,buchholz,sonneborn_berger,progressive,direct_encounter';
+
+COMMENT ON COLUMN t_p91748136_chess_support_world.tournaments.tiebreaks IS 'Тай-брейки через запятую: buchholz, buchholz_cut1, buchholz_median, sonneborn_berger, progressive, direct_encounter';
@@ -0,0 +1,189 @@
+-- Турнирная таблица, которая обновляется при каждом изменении результата пары, а не пересчитывается на каждый запрос
+CREATE SEQUENCE IF NOT EXISTS t_p91748136_chess_support_world.tournament_standings_version_seq;
+
+CREATE TABLE IF NOT EXISTS t_p91748136_chess_support_world.tournament_standings (
+    tournament_id INTEGER NOT NULL REFERENCES t_p91748136_chess_support_world.tournaments(id),
+    player_id INTEGER NOT NULL,
+    points NUMERIC(5, 1) NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0,
+    draws INTEGER NOT NULL DEFAULT 0,
+    losses INTEGER NOT NULL DEFAULT 0,
+    games_played INTEGER NOT NULL DEFAULT 0,
+    round_results JSONB NOT NULL DEFAULT '{}',
+    tiebreaks JSONB NOT NULL DEFAULT '{}',
+    rank INTEGER,
+    version BIGINT NOT NULL,
+    ranked_version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (tournament_id, player_id)
+);
+
+COMMENT ON TABLE t_p91748136_chess_support_world.tournament_standings IS 'Турнирная таблица: очки обновляют триггеры, места и тай-брейки пересчитывает tournament-standings';
+COMMENT ON COLUMN t_p91748136_chess_support_world.tournament_standings.version IS 'Номер последнего изменения строки из tournament_standings_version_seq, по максимуму строится ETag';
+COMMENT ON COLUMN t_p91748136_chess_support_world.tournament_standings.ranked_version IS 'Максимальный version турнира на момент расчёта мест и тай-брейков; меньше version — места устарели';
+
+-- Добавить (p_sign = 1) или снять (p_sign = -1) результат одной стороны пары
+CREATE OR REPLACE FUNCTION t_p91748136_chess_support_world.tournament_standings_apply(
+    p_tournament_id INTEGER, p_round_id INTEGER, p_player_id INTEGER, p_points NUMERIC, p_sign INTEGER
+) RETURNS VOID AS $$
+DECLARE
+    v_round TEXT;
+BEGIN
+    IF p_player_id IS NULL THEN
+        RETURN;
+    END IF;
+
+    -- Пара без результата: игрок появляется в таблице с нулём
+    IF p_points IS NULL THEN
+        IF p_sign > 0 THEN
+            INSERT INTO t_p91748136_chess_support_world.tournament_standings (tournament_id, player_id, version)
+            VALUES (p_tournament_id, p_player_id, nextval('t_p91748136_chess_support_world.tournament_standings_version_seq'))
+            ON CONFLICT (tournament_id, player_id) DO NOTHING;
+        END IF;
+        RETURN;
+    END IF;
+
+    SELECT round_number::TEXT INTO v_round
+    FROM t_p91748136_chess_support_world.tournament_rounds
+    WHERE id = p_round_id;
+
+    IF p_sign > 0 THEN
+        INSERT INTO t_p91748136_chess_support_world.tournament_standings AS s
+            (tournament_id, player_id, points, wins, draws, losses, games_played, round_results, version)
+        VALUES (
+            p_tournament_id, p_player_id, p_points,
+            (p_points = 1)::INTEGER, (p_points = 0.5)::INTEGER, (p_points = 0)::INTEGER, 1,
+            jsonb_build_object(v_round, CASE p_points WHEN 1 THEN '1' WHEN 0 THEN '0' ELSE '½' END),
+            nextval('t_p91748136_chess_support_world.tournament_standings_version_seq')
+        )
+        ON CONFLICT (tournament_id, player_id) DO UPDATE SET
+            points = s.points + EXCLUDED.points,
+            wins = s.wins + EXCLUDED.wins,
+            draws = s.draws + EXCLUDED.draws,
+            losses = s.losses + EXCLUDED.losses,
+            games_played = s.games_played + 1,
+            round_results = s.round_results || EXCLUDED.round_results,
+            version = EXCLUDED.version,
+            updated_at = NOW();
+    ELSE
+        UPDATE t_p91748136_chess_support_world.tournament_standings
+        SET points = points - p_points,
+            wins = wins - (p_points = 1)::INTEGER,
+            draws = draws - (p_points = 0.5)::INTEGER,
+            losses = losses - (p_points = 0)::INTEGER,
+            games_played = games_played - 1,
+            round_results = round_results - v_round,
+            version = nextval('t_p91748136_chess_support_world.tournament_standings_version_seq'),
+            updated_at = NOW()
+        WHERE tournament_id = p_tournament_id AND player_id = p_player_id;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Обе стороны пары; строки блокируются по возрастанию player_id, как и при пересчёте мест, чтобы не было взаимных блокировок
+CREATE OR REPLACE FUNCTION t_p91748136_chess_support_world.tournament_standings_apply_pair(
+    p_tournament_id INTEGER, p_round_id INTEGER, p_white_id INTEGER, p_black_id INTEGER, p_result VARCHAR, p_sign INTEGER
+) RETURNS VOID AS $$
+DECLARE
+    v_white NUMERIC;
+BEGIN
+    v_white := CASE p_result WHEN '1-0' THEN 1 WHEN '0-1' THEN 0 WHEN '1/2-1/2' THEN 0.5 END;
+    IF p_sign < 0 AND v_white IS NULL THEN
+        RETURN;
+    END IF;
+
+    IF p_black_id IS NOT NULL AND p_black_id < p_white_id THEN
+        PERFORM t_p91748136_chess_support_world.tournament_standings_apply(p_tournament_id, p_round_id, p_black_id, 1 - v_white, p_sign);
+        PERFORM t_p91748136_chess_support_world.tournament_standings_apply(p_tournament_id, p_round_id, p_white_id, v_white, p_sign);
+    ELSE
+        PERFORM t_p91748136_chess_support_world.tournament_standings_apply(p_tournament_id, p_round_id, p_white_id, v_white, p_sign);
+        PERFORM t_p91748136_chess_support_world.tournament_standings_apply(p_tournament_id, p_round_id, p_black_id, 1 - v_white, p_sign);
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Результат пары меняется: старый снимается, новый добавляется. Пропуск тура (black_player_id NULL) — победа белых
+CREATE OR REPLACE FUNCTION t_p91748136_chess_support_world.tournament_standings_on_pairing() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        PERFORM t_p91748136_chess_support_world.tournament_standings_apply_pair(
+            OLD.tournament_id, OLD.round_id, OLD.white_player_id, OLD.black_player_id, OLD.result, -1);
+    END IF;
+
+    IF TG_OP <> 'DELETE' THEN
+        PERFORM t_p91748136_chess_support_world.tournament_standings_apply_pair(
+            NEW.tournament_id, NEW.round_id, NEW.white_player_id, NEW.black_player_id, NEW.result, 1);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_tournament_standings_pairing_change ON t_p91748136_chess_support_world.tournament_pairings;
+CREATE TRIGGER trg_tournament_standings_pairing_change
+AFTER INSERT OR DELETE ON t_p91748136_chess_support_world.tournament_pairings
+FOR EACH ROW EXECUTE FUNCTION t_p91748136_chess_support_world.tournament_standings_on_pairing();
+
+DROP TRIGGER IF EXISTS trg_tournament_standings_pairing_update ON t_p91748136_chess_support_world.tournament_pairings;
+CREATE TRIGGER trg_tournament_standings_pairing_update
+AFTER UPDATE OF result, white_player_id, black_player_id ON t_p91748136_chess_support_world.tournament_pairings
+FOR EACH ROW
+WHEN (OLD.result IS DISTINCT FROM NEW.result
+      OR OLD.white_player_id IS DISTINCT FROM NEW.white_player_id
+      OR OLD.black_player_id IS DISTINCT FROM NEW.black_player_id)
+EXECUTE FUNCTION t_p91748136_chess_support_world.tournament_standings_on_pairing();
+
+-- Регистрация добавляет участника с нулём, отмена убирает его, пока он не сыграл ни одной партии
+CREATE OR REPLACE FUNCTION t_p91748136_chess_support_world.tournament_standings_on_registration() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP <> 'DELETE' AND NEW.status = 'registered' THEN
+        INSERT INTO t_p91748136_chess_support_world.tournament_standings (tournament_id, player_id, version)
+        VALUES (NEW.tournament_id, NEW.player_id, nextval('t_p91748136_chess_support_world.tournament_standings_version_seq'))
+        ON CONFLICT (tournament_id, player_id) DO NOTHING;
+    ELSIF TG_OP <> 'INSERT' THEN
+        DELETE FROM t_p91748136_chess_support_world.tournament_standings
+        WHERE tournament_id = OLD.tournament_id AND player_id = OLD.player_id AND games_played = 0;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_tournament_standings_registration ON t_p91748136_chess_support_world.tournament_registrations;
+CREATE TRIGGER trg_tournament_standings_registration
+AFTER INSERT OR DELETE OR UPDATE OF status ON t_p91748136_chess_support_world.tournament_registrations
+FOR EACH ROW EXECUTE FUNCTION t_p91748136_chess_support_world.tournament_standings_on_registration();
+
+-- Заполнение по уже сыгранным турам
+WITH sides AS (
+    SELECT tp.tournament_id, tp.white_player_id AS player_id, tr.round_number,
+           CASE tp.result WHEN '1-0' THEN 1 WHEN '0-1' THEN 0 ELSE 0.5 END AS points
+    FROM t_p91748136_chess_support_world.tournament_pairings tp
+    JOIN t_p91748136_chess_support_world.tournament_rounds tr ON tr.id = tp.round_id
+    WHERE tp.result IN ('1-0', '0-1', '1/2-1/2')
+    UNION ALL
+    SELECT tp.tournament_id, tp.black_player_id, tr.round_number,
+           CASE tp.result WHEN '1-0' THEN 0 WHEN '0-1' THEN 1 ELSE 0.5 END
+    FROM t_p91748136_chess_support_world.tournament_pairings tp
+    JOIN t_p91748136_chess_support_world.tournament_rounds tr ON tr.id = tp.round_id
+    WHERE tp.result IN ('1-0', '0-1', '1/2-1/2') AND tp.black_player_id IS NOT NULL
+)
+INSERT INTO t_p91748136_chess_support_world.tournament_standings
+    (tournament_id, player_id, points, wins, draws, losses, games_played, round_results, version)
+SELECT tournament_id, player_id, SUM(points),
+       COUNT(*) FILTER (WHERE points = 1), COUNT(*) FILTER (WHERE points = 0.5), COUNT(*) FILTER (WHERE points = 0),
+       COUNT(*),
+       jsonb_object_agg(round_number::TEXT, CASE points WHEN 1 THEN '1' WHEN 0 THEN '0' ELSE '½' END),
+       nextval('t_p91748136_chess_support_world.tournament_standings_version_seq')
+FROM sides
+GROUP BY tournament_id, player_id
+ON CONFLICT (tournament_id, player_id) DO NOTHING;
+
+INSERT INTO t_p91748136_chess_support_world.tournament_standings (tournament_id, player_id, version)
+SELECT tournament_id, player_id, nextval('t_p91748136_chess_support_world.tournament_standings_version_seq')
+FROM (
+    SELECT tournament_id, player_id FROM t_p91748136_chess_support_world.tournament_registrations WHERE status = 'registered'
+    UNION
+    SELECT tournament_id, user_id FROM t_p91748136_chess_support_world.tournament_participants
+) participants
+ON CONFLICT (tournament_id, player_id) DO NOTHING;
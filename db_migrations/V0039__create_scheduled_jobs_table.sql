@@ -0,0 +1,25 @@
+-- Отложенные задачи (например, старт следующего тура через минуту); выполняет scheduled-jobs-worker
+CREATE TABLE IF NOT EXISTS t_p91748136_chess_support_world.scheduled_jobs (
+    id BIGSERIAL PRIMARY KEY,
+    kind VARCHAR(50) NOT NULL,
+    dedupe_key VARCHAR(100),
+    payload JSONB NOT NULL DEFAULT '{}',
+    run_at TIMESTAMP NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    finished_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_scheduled_jobs_due
+ON t_p91748136_chess_support_world.scheduled_jobs(run_at)
+WHERE finished_at IS NULL;
+
+-- Одна незавершённая задача на ключ: повторный вызов tournament-auto-next не создаёт второй тур
+CREATE UNIQUE INDEX IF NOT EXISTS idx_scheduled_jobs_dedupe
+ON t_p91748136_chess_support_world.scheduled_jobs(kind, dedupe_key)
+WHERE finished_at IS NULL AND dedupe_key IS NOT NULL;
+
+COMMENT ON TABLE t_p91748136_chess_support_world.scheduled_jobs IS 'Очередь отложенных задач с временем запуска';
+COMMENT ON COLUMN t_p91748136_chess_support_world.scheduled_jobs.kind IS 'Тип задачи: tournament-next-round';
+COMMENT ON COLUMN t_p91748136_chess_support_world.scheduled_jobs.run_at IS 'Не раньше этого времени задачу можно выполнять (аренда и пауза между повторами)';
@@ -0,0 +1,102 @@
+-- Счётчики партий тура: завершение тура определяется по ним, без подсчёта по tournament_pairings и games
+ALTER TABLE t_p91748136_chess_support_world.tournament_rounds
+    ADD COLUMN IF NOT EXISTS games_total INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS games_finished INTEGER NOT NULL DEFAULT 0;
+
+COMMENT ON COLUMN t_p91748136_chess_support_world.tournament_rounds.games_total IS 'Число партий тура (пары без пропуска тура), ведёт триггер на tournament_pairings';
+COMMENT ON COLUMN t_p91748136_chess_support_world.tournament_rounds.games_finished IS 'Число партий тура с записанным результатом; равенство с games_total закрывает активный тур';
+
+-- Результаты партий, которые закончились, но не попали в пару (раньше их дописывал tournament-check-round)
+UPDATE t_p91748136_chess_support_world.tournament_pairings tp
+SET result = CASE g.winner WHEN 'white' THEN '1-0' WHEN 'black' THEN '0-1' ELSE '1/2-1/2' END
+FROM t_p91748136_chess_support_world.games g
+WHERE tp.game_id = g.id AND tp.result IS NULL AND g.winner IN ('white', 'black', 'draw');
+
+-- Вклад пары в счётчики тура снимается со старой строки и добавляется с новой.
+-- Активный тур закрывается, как только последняя партия получила результат:
+-- параллельные завершения партий ждут блокировку строки тура и видят уже увеличенный счётчик
+CREATE OR REPLACE FUNCTION t_p91748136_chess_support_world.tournament_rounds_count_games() RETURNS TRIGGER AS $$
+DECLARE
+    v_old_total INTEGER := 0;
+    v_old_finished INTEGER := 0;
+    v_new_total INTEGER := 0;
+    v_new_finished INTEGER := 0;
+    v_round_id INTEGER;
+    v_total INTEGER;
+    v_finished INTEGER;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        v_round_id := OLD.round_id;
+    ELSE
+        v_round_id := NEW.round_id;
+    END IF;
+
+    IF TG_OP <> 'INSERT' AND OLD.black_player_id IS NOT NULL THEN
+        v_old_total := 1;
+        v_old_finished := (OLD.result IS NOT NULL)::INTEGER;
+    END IF;
+
+    IF TG_OP <> 'DELETE' AND NEW.black_player_id IS NOT NULL THEN
+        v_new_total := 1;
+        v_new_finished := (NEW.result IS NOT NULL)::INTEGER;
+    END IF;
+
+    IF TG_OP = 'UPDATE' AND OLD.round_id <> NEW.round_id THEN
+        UPDATE t_p91748136_chess_support_world.tournament_rounds
+        SET games_total = games_total - v_old_total,
+            games_finished = games_finished - v_old_finished
+        WHERE id = OLD.round_id;
+        v_old_total := 0;
+        v_old_finished := 0;
+    END IF;
+
+    IF v_new_total = v_old_total AND v_new_finished = v_old_finished THEN
+        RETURN NULL;
+    END IF;
+
+    UPDATE t_p91748136_chess_support_world.tournament_rounds
+    SET games_total = games_total + v_new_total - v_old_total,
+        games_finished = games_finished + v_new_finished - v_old_finished
+    WHERE id = v_round_id
+    RETURNING games_total, games_finished INTO v_total, v_finished;
+
+    -- Строка тура уже заблокирована этим UPDATE, поэтому закрыть тур может только последняя завершённая партия
+    IF v_total > 0 AND v_finished >= v_total THEN
+        UPDATE t_p91748136_chess_support_world.tournament_rounds
+        SET status = 'finished', finished_at = NOW()
+        WHERE id = v_round_id AND status = 'active';
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_tournament_rounds_count_games_change ON t_p91748136_chess_support_world.tournament_pairings;
+CREATE TRIGGER trg_tournament_rounds_count_games_change
+AFTER INSERT OR DELETE ON t_p91748136_chess_support_world.tournament_pairings
+FOR EACH ROW EXECUTE FUNCTION t_p91748136_chess_support_world.tournament_rounds_count_games();
+
+DROP TRIGGER IF EXISTS trg_tournament_rounds_count_games_update ON t_p91748136_chess_support_world.tournament_pairings;
+CREATE TRIGGER trg_tournament_rounds_count_games_update
+AFTER UPDATE OF result, black_player_id, round_id ON t_p91748136_chess_support_world.tournament_pairings
+FOR EACH ROW
+WHEN ((OLD.result IS NULL) IS DISTINCT FROM (NEW.result IS NULL)
+      OR (OLD.black_player_id IS NULL) IS DISTINCT FROM (NEW.black_player_id IS NULL)
+      OR OLD.round_id IS DISTINCT FROM NEW.round_id)
+EXECUTE FUNCTION t_p91748136_chess_support_world.tournament_rounds_count_games();
+
+-- Заполнение по существующим турам
+UPDATE t_p91748136_chess_support_world.tournament_rounds tr
+SET games_total = c.total, games_finished = c.finished
+FROM (
+    SELECT round_id, COUNT(*) AS total, COUNT(result) AS finished
+    FROM t_p91748136_chess_support_world.tournament_pairings
+    WHERE black_player_id IS NOT NULL
+    GROUP BY round_id
+) c
+WHERE tr.id = c.round_id;
+
+-- Туры, которые уже доиграны, но ещё не закрыты проверкой
+UPDATE t_p91748136_chess_support_world.tournament_rounds
+SET status = 'finished', finished_at = NOW()
+WHERE status = 'active' AND games_total > 0 AND games_finished >= games_total;
@@ -0,0 +1,5 @@
+-- Ускоренная жеребьёвка (бакинская система) для больших открытых турниров
+ALTER TABLE t_p91748136_chess_support_world.tournaments
+ADD COLUMN IF NOT EXISTS accelerated BOOLEAN NOT NULL DEFAULT FALSE;
+
+COMMENT ON COLUMN t_p91748136_chess_support_world.tournaments.accelerated IS 'Ускоренная жеребьёвка: верхней группе в первой половине туров добавляются виртуальные очки, только для составления пар';
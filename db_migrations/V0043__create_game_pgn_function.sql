@@ -0,0 +1,15 @@
+-- PGN партии: ходы до появления журнала (games.pgn) плюс нумерованная запись ходов из game_moves.
+-- Одна функция вместо одинакового string_agg в game-move, game-get, chess-game, game-draw-offer и game-flag-sweeper
+CREATE OR REPLACE FUNCTION t_p91748136_chess_support_world.game_pgn(p_game_id TEXT, p_pgn TEXT)
+RETURNS TEXT
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT CONCAT_WS(' ', NULLIF(p_pgn, ''), (
+        SELECT string_agg(CASE WHEN m.ply % 2 = 1 THEN ((m.ply + 1) / 2) || '. ' || m.san ELSE m.san END, ' ' ORDER BY m.ply)
+        FROM t_p91748136_chess_support_world.game_moves m
+        WHERE m.game_id = p_game_id
+    ))
+$$;
+
+COMMENT ON FUNCTION t_p91748136_chess_support_world.game_pgn(TEXT, TEXT) IS 'Полный PGN партии: games.pgn и ходы из журнала game_moves';
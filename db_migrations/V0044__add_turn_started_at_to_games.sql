@@ -0,0 +1,35 @@
+-- Часы стороны, которая ходит, идут от turn_started_at: его меняет только смена очереди хода,
+-- поэтому посторонние записи в games (подключение соперника, PGN, служебные поля) не дарят время
+ALTER TABLE t_p91748136_chess_support_world.games
+ADD COLUMN IF NOT EXISTS turn_started_at TIMESTAMP NOT NULL DEFAULT NOW();
+
+UPDATE t_p91748136_chess_support_world.games
+SET turn_started_at = updated_at;
+
+DROP INDEX IF EXISTS t_p91748136_chess_support_world.idx_games_status_turn_updated;
+
+CREATE INDEX IF NOT EXISTS idx_games_status_turn_started
+ON t_p91748136_chess_support_world.games(status, current_turn, turn_started_at);
+
+-- Инкремент Фишера выводится из контроля времени при создании партии, а не в каждой функции,
+-- которая создаёт партии (game-create, tournament-start-round)
+CREATE OR REPLACE FUNCTION t_p91748136_chess_support_world.games_set_increment()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.increment_ms := CASE WHEN split_part(NEW.time_control, '+', 2) ~ '^[0-9]+$'
+                             THEN split_part(NEW.time_control, '+', 2)::INTEGER * 1000
+                             ELSE 0 END;
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_games_set_increment ON t_p91748136_chess_support_world.games;
+CREATE TRIGGER trg_games_set_increment
+BEFORE INSERT ON t_p91748136_chess_support_world.games
+FOR EACH ROW EXECUTE FUNCTION t_p91748136_chess_support_world.games_set_increment();
+
+COMMENT ON COLUMN t_p91748136_chess_support_world.games.turn_started_at IS 'Когда у стороны, которая ходит, пошли часы (последняя смена очереди хода)';
+COMMENT ON COLUMN t_p91748136_chess_support_world.games.white_time_ms IS 'Остаток времени белых на момент turn_started_at, мс';
+COMMENT ON COLUMN t_p91748136_chess_support_world.games.black_time_ms IS 'Остаток времени чёрных на момент turn_started_at, мс';
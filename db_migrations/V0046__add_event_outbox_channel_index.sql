@@ -0,0 +1,5 @@
+-- Диспетчер не берёт событие канала, пока более раннее событие того же канала не отправлено:
+-- индекс для этой проверки по неотправленным событиям
+CREATE INDEX IF NOT EXISTS idx_event_outbox_pending_channel
+ON t_p91748136_chess_support_world.event_outbox(channel, id)
+WHERE sent_at IS NULL;
@@ -0,0 +1,33 @@
+-- Проверка тура и пересчёт мест запрашиваются при записи результата, а не при чтении таблицы.
+-- Одно событие tournament-check на турнир за оператор: сколько бы строк ни изменил UPDATE, outbox-dispatcher вызовет
+-- tournament-check-round один раз, и тот пересчитает только игроков с новыми результатами и их соперников
+CREATE OR REPLACE FUNCTION t_p91748136_chess_support_world.tournament_pairings_enqueue_check() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO t_p91748136_chess_support_world.event_outbox (kind, payload)
+        SELECT DISTINCT 'tournament-check', jsonb_build_object('tournament_id', n.tournament_id)
+        FROM new_rows n
+        WHERE n.result IS NOT NULL;
+    ELSE
+        INSERT INTO t_p91748136_chess_support_world.event_outbox (kind, payload)
+        SELECT DISTINCT 'tournament-check', jsonb_build_object('tournament_id', n.tournament_id)
+        FROM new_rows n
+        JOIN old_rows o ON o.id = n.id
+        WHERE o.result IS DISTINCT FROM n.result;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_tournament_pairings_enqueue_check_insert ON t_p91748136_chess_support_world.tournament_pairings;
+CREATE TRIGGER trg_tournament_pairings_enqueue_check_insert
+AFTER INSERT ON t_p91748136_chess_support_world.tournament_pairings
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION t_p91748136_chess_support_world.tournament_pairings_enqueue_check();
+
+DROP TRIGGER IF EXISTS trg_tournament_pairings_enqueue_check_update ON t_p91748136_chess_support_world.tournament_pairings;
+CREATE TRIGGER trg_tournament_pairings_enqueue_check_update
+AFTER UPDATE ON t_p91748136_chess_support_world.tournament_pairings
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION t_p91748136_chess_support_world.tournament_pairings_enqueue_check();
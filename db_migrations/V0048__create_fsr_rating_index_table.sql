@@ -0,0 +1,19 @@
+-- Индекс рейтинг-листа ФШР, общий для всех экземпляров fsr-rating: его строит вызов по расписанию,
+-- поиск только читает и держит в памяти экземпляра до следующего обновления
+CREATE TABLE IF NOT EXISTS t_p91748136_chess_support_world.fsr_rating_index (
+    id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    data BYTEA,
+    etag TEXT,
+    last_modified TEXT,
+    players INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP,
+    checked_at TIMESTAMP
+);
+
+COMMENT ON TABLE t_p91748136_chess_support_world.fsr_rating_index IS 'Индекс рейтинг-листа ФШР (одна строка): FsrIndex.dumps() и заголовки для условного GET';
+COMMENT ON COLUMN t_p91748136_chess_support_world.fsr_rating_index.updated_at IS 'Когда менялся data; экземпляры перечитывают индекс, когда это значение новее загруженного';
+COMMENT ON COLUMN t_p91748136_chess_support_world.fsr_rating_index.checked_at IS 'Последняя проверка списка, в том числе с ответом 304';
+
+-- Строка есть всегда: обновление блокирует её, и два обновления не идут одновременно
+INSERT INTO t_p91748136_chess_support_world.fsr_rating_index (id) VALUES (1)
+ON CONFLICT (id) DO NOTHING;
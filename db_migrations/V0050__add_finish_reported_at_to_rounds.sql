@@ -0,0 +1,10 @@
+-- Завершение тура сообщает ровно один вызов tournament-check-round: тот, что первым отметил закрытый тур
+ALTER TABLE t_p91748136_chess_support_world.tournament_rounds
+    ADD COLUMN IF NOT EXISTS finish_reported_at TIMESTAMP;
+
+COMMENT ON COLUMN t_p91748136_chess_support_world.tournament_rounds.finish_reported_at IS 'Когда tournament-check-round сообщил о завершении тура; NULL у закрытого тура — о нём ещё не сообщали';
+
+-- Уже закрытые туры считаются сообщёнными, чтобы первая проверка после миграции не объявила их заново
+UPDATE t_p91748136_chess_support_world.tournament_rounds
+SET finish_reported_at = COALESCE(finished_at, NOW())
+WHERE status = 'finished' AND finish_reported_at IS NULL;
@@ -0,0 +1,85 @@
+'''
+Замер холодного старта backend-функций: время импорта index.py и задержка первого и повторного запроса.
+Каждый замер идёт в отдельном процессе интерпретатора, как при холодном старте облачной функции.
+Usage: python scripts/bench_cold_start.py [game-move game-draw-offer ...] [--runs 5] [--event '{"httpMethod": "OPTIONS"}']
+'''
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+
+DEFAULT_HANDLERS = ['game-move', 'game-draw-offer', 'tournament-start-round']
+
+# Выполняется в дочернем процессе с cwd = каталог функции
+CHILD_CODE = '''
+import json, sys, time
+sys.path.insert(0, '.')
+event = json.loads(sys.argv[1])
+modules_before = len(sys.modules)
+t0 = time.perf_counter()
+import index
+t1 = time.perf_counter()
+first = index.handler(dict(event), None)
+t2 = time.perf_counter()
+index.handler(dict(event), None)
+t3 = time.perf_counter()
+print(json.dumps({
+    'import_ms': (t1 - t0) * 1000,
+    'first_request_ms': (t2 - t1) * 1000,
+    'warm_request_ms': (t3 - t2) * 1000,
+    'modules_loaded': len(sys.modules) - modules_before,
+    'status': first.get('statusCode'),
+}))
+'''
+
+
+def measure_once(handler_name: str, event: Dict[str, Any]) -> Dict[str, Any]:
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD_CODE, json.dumps(event)],
+        cwd=os.path.join(BACKEND_DIR, handler_name),
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        error_lines = result.stderr.strip().splitlines()
+        return {'error': error_lines[-1] if error_lines else f'exit code {result.returncode}'}
+    # Функции печатают логи в stdout, результат замера — последняя строка
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure(handler_name: str, event: Dict[str, Any], runs: int) -> Dict[str, Any]:
+    samples: List[Dict[str, Any]] = []
+    for _ in range(runs):
+        sample = measure_once(handler_name, event)
+        if 'error' in sample:
+            return {'handler': handler_name, 'error': sample['error']}
+        samples.append(sample)
+
+    report: Dict[str, Any] = {'handler': handler_name, 'runs': runs, 'status': samples[0]['status']}
+    for key in ('import_ms', 'first_request_ms', 'warm_request_ms'):
+        report[key] = round(statistics.median(s[key] for s in samples), 2)
+    report['modules_loaded'] = samples[0]['modules_loaded']
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Замер холодного старта backend-функций')
+    parser.add_argument('handlers', nargs='*', default=DEFAULT_HANDLERS, help='каталоги в backend/')
+    parser.add_argument('--runs', type=int, default=5, help='число холодных запусков, берётся медиана')
+    parser.add_argument('--event', default='{"httpMethod": "OPTIONS"}',
+                        help='событие для handler; по умолчанию preflight, которому не нужна база')
+    args = parser.parse_args()
+
+    event = json.loads(args.event)
+    for handler_name in args.handlers:
+        print(json.dumps(measure(handler_name, event, args.runs), ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+'''
+Замер старта тура: создание партий и привязка их к парам по одной доске за запрос (как было раньше)
+против пакетной записи create_round_games из tournament-start-round.
+Работает на реальной PostgreSQL из DATABASE_URL во временной схеме, которая удаляется после прогона.
+На каждый размер тура и способ — строка JSON: число запросов к БД и медиана времени.
+--latency-ms добавляет задержку к каждому запросу, чтобы локальная база вела себя как удалённая.
+Usage: DATABASE_URL=postgresql://... python scripts/bench_start_round.py [--boards 50,150,300] [--runs 5] [--latency-ms 1]
+'''
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from typing import Any, Dict, List
+
+import psycopg2
+from psycopg2.extensions import cursor as base_cursor
+from psycopg2.extras import execute_values
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend', 'tournament-start-round'))
+
+import index  # noqa: E402
+
+BENCH_SCHEMA = 'bench_start_round'
+DEFAULT_BOARDS = [50, 150, 300]
+TIME_CONTROL = '5+3'
+
+# Только столбцы, которые пишет старт тура
+SCHEMA_SQL = f'''
+CREATE SCHEMA {BENCH_SCHEMA};
+CREATE TABLE {BENCH_SCHEMA}.games (
+    id TEXT PRIMARY KEY, fen TEXT, pgn TEXT, white_player_id INTEGER, black_player_id INTEGER,
+    current_turn VARCHAR(1), status VARCHAR(20), tournament_id INTEGER, round_number INTEGER,
+    time_control VARCHAR(20), white_time INTEGER, black_time INTEGER,
+    white_time_ms INTEGER, black_time_ms INTEGER, increment_ms INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP, updated_at TIMESTAMP, turn_started_at TIMESTAMP
+);
+CREATE TABLE {BENCH_SCHEMA}.tournament_pairings (
+    id SERIAL PRIMARY KEY, tournament_id INTEGER, round_id INTEGER,
+    white_player_id INTEGER, black_player_id INTEGER,
+    game_id TEXT REFERENCES {BENCH_SCHEMA}.games(id), result VARCHAR(10), board_number INTEGER
+);
+'''
+
+
+class CountingCursor(base_cursor):
+    """Считает запросы; при заданной задержке спит перед каждым, как при сетевом обмене"""
+    statements = 0
+    latency = 0.0
+
+    def execute(self, query, vars=None):
+        CountingCursor.statements += 1
+        if CountingCursor.latency:
+            time.sleep(CountingCursor.latency)
+        return super().execute(query, vars)
+
+
+def per_board(cur, tournament_id: int, round_number: int, pairings: List[tuple], time_control: str) -> None:
+    """Прежний способ: INSERT партии и UPDATE пары на каждую доску"""
+    initial_time = index.parse_time_control(time_control)
+    for pairing_id, white_id, black_id in pairings:
+        if black_id is None:
+            cur.execute(f"UPDATE {BENCH_SCHEMA}.tournament_pairings SET result = '1-0' WHERE id = %s", (pairing_id,))
+            continue
+        game_id = str(uuid.uuid4())
+        cur.execute(f"""
+            INSERT INTO {BENCH_SCHEMA}.games
+            (id, fen, pgn, white_player_id, black_player_id, current_turn, status, tournament_id, round_number, time_control,
+             white_time, black_time, white_time_ms, black_time_ms, created_at, updated_at, turn_started_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW(), NOW())
+        """, (game_id, index.INITIAL_FEN, '', white_id, black_id, 'w', 'active', tournament_id, round_number, time_control,
+              initial_time, initial_time, initial_time * 1000, initial_time * 1000))
+        cur.execute(f"UPDATE {BENCH_SCHEMA}.tournament_pairings SET game_id = %s WHERE id = %s", (game_id, pairing_id))
+
+
+def batched(cur, tournament_id: int, round_number: int, pairings: List[tuple], time_control: str) -> None:
+    index.create_round_games(cur, tournament_id, round_number, pairings, time_control)
+
+
+STRATEGIES = {'per_board': per_board, 'batched': batched}
+
+
+def prepare_round(cur, boards: int) -> List[tuple]:
+    """Тур из boards партий и одного пропуска тура"""
+    cur.execute(f"TRUNCATE {BENCH_SCHEMA}.tournament_pairings, {BENCH_SCHEMA}.games")
+    rows = [(1, 1, 2 * board + 1, 2 * board + 2, board + 1) for board in range(boards)]
+    rows.append((1, 1, 2 * boards + 1, None, boards + 1))
+    execute_values(cur, f"""
+        INSERT INTO {BENCH_SCHEMA}.tournament_pairings (tournament_id, round_id, white_player_id, black_player_id, board_number)
+        VALUES %s
+    """, rows, page_size=len(rows))
+    cur.execute(f"SELECT id, white_player_id, black_player_id FROM {BENCH_SCHEMA}.tournament_pairings ORDER BY board_number")
+    return cur.fetchall()
+
+
+def measure(conn, strategy: str, boards: int, runs: int) -> Dict[str, Any]:
+    timings = []
+    statements = 0
+    for _ in range(runs):
+        cur = conn.cursor()
+        pairings = prepare_round(cur, boards)
+        conn.commit()
+
+        CountingCursor.statements = 0
+        t0 = time.perf_counter()
+        STRATEGIES[strategy](cur, 1, 1, pairings, TIME_CONTROL)
+        conn.commit()
+        timings.append((time.perf_counter() - t0) * 1000)
+        statements = CountingCursor.statements
+
+        cur.execute(f"SELECT COUNT(*) FROM {BENCH_SCHEMA}.tournament_pairings WHERE game_id IS NOT NULL OR result = '1-0'")
+        if cur.fetchone()[0] != boards + 1:
+            raise RuntimeError(f'{strategy}: не все пары тура получили партию или результат')
+        cur.close()
+
+    return {
+        'boards': boards,
+        'strategy': strategy,
+        'statements': statements,
+        'median_ms': round(statistics.median(timings), 2),
+        'max_ms': round(max(timings), 2)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--boards', default=','.join(map(str, DEFAULT_BOARDS)))
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    args = parser.parse_args()
+
+    if 'DATABASE_URL' not in os.environ:
+        sys.exit('DATABASE_URL не задан')
+
+    CountingCursor.latency = args.latency_ms / 1000
+    index.SCHEMA = BENCH_SCHEMA
+
+    conn = psycopg2.connect(os.environ['DATABASE_URL'], cursor_factory=CountingCursor)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f'DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE')
+            cur.execute(SCHEMA_SQL)
+        conn.commit()
+
+        for boards in [int(value) for value in args.boards.split(',')]:
+            for strategy in STRATEGIES:
+                print(json.dumps(measure(conn, strategy, boards, args.runs)))
+    finally:
+        conn.rollback()
+        with conn.cursor() as cur:
+            cur.execute(f'DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE')
+        conn.commit()
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+'''
+Локальная заглушка ratings.ruchess.ru для проверки обновления рейтинг-листа ФШР: отдаёт CSV-файл
+с ETag и Last-Modified и отвечает 304 на условный запрос, если файл не менялся.
+Usage: python scripts/fsr_list_server.py scripts/fixtures/fsr_rapid_sample.csv [--port 8765]
+       FSR_CSV_URL=http://127.0.0.1:8765/smaster_rapid.csv python backend/fsr-rating/fsr_index.py --out /tmp/fsr.pickle
+'''
+
+import argparse
+import hashlib
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(path: str):
+    class ListHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            with open(path, 'rb') as f:
+                content = f.read()
+            mtime = int(os.path.getmtime(path))
+            etag = '"%s"' % hashlib.md5(content).hexdigest()
+            last_modified = formatdate(mtime, usegmt=True)
+
+            not_modified = self.headers.get('If-None-Match') == etag
+            since = self.headers.get('If-Modified-Since')
+            if since and not self.headers.get('If-None-Match'):
+                not_modified = parsedate_to_datetime(since).timestamp() >= mtime
+
+            if not_modified:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/csv; charset=windows-1251')
+            self.send_header('Content-Length', str(len(content)))
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', last_modified)
+            self.end_headers()
+            self.wfile.write(content)
+
+    return ListHandler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Локальная заглушка рейтинг-листа ФШР')
+    parser.add_argument('csv', help='CSV-файл, который отдаётся по любому пути')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(os.path.abspath(args.csv)))
+    print(f'serving {args.csv} on http://127.0.0.1:{args.port}/smaster_rapid.csv')
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+'''
+Прогон жеребьёвки на синтетических турнирах: поле от 8 до 5000 игроков, результаты по Эло со случайностью.
+На каждый размер поля и способ жеребьёвки — строка JSON: время тура, пик памяти, игроки без пары,
+повторные встречи, повторные пропуски тура, перекос цветов, нарушения правила цветов (третий подряд
+или перекос больше двух) и средний размер самой большой очковой группы.
+При нарушениях код выхода 1. --accelerated включает ускоренную жеребьёвку (бакинская система).
+Usage: python scripts/pairing_benchmark.py [--sizes 8,64,500] [--methods greedy,blossom] [--rounds 9] [--seed 1] [--accelerated]
+'''
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend', 'swiss-pairing'))
+
+import swiss  # noqa: E402
+
+DEFAULT_SIZES = [8, 16, 64, 256, 1000, 5000]
+DRAW_RATE = 0.25
+
+
+def play(white_rating: int, black_rating: int, rng: random.Random) -> str:
+    """Результат партии: ожидание по Эло, часть ожидаемых очков уходит в ничьи"""
+    expected = 1 / (1 + 10 ** ((black_rating - white_rating) / 400))
+    roll = rng.random()
+    draw_band = DRAW_RATE * min(expected, 1 - expected) * 2
+    if roll < expected - draw_band / 2:
+        return '1-0'
+    if roll < expected + draw_band / 2:
+        return '1/2-1/2'
+    return '0-1'
+
+
+def build_players(ratings: Dict[int, int], history: List[Tuple[int, int, Optional[int], Optional[str]]]) -> List[swiss.Player]:
+    players = {pid: swiss.Player(id=pid, rating=rating) for pid, rating in ratings.items()}
+    swiss.apply_history(players, history)
+    return list(players.values())
+
+
+def breaks_color_rules(colors: List[str]) -> bool:
+    """Был ли у игрока третий подряд один и тот же цвет или перекос цветов больше двух"""
+    balance = 0
+    for i, color in enumerate(colors):
+        balance += 1 if color == 'w' else -1
+        if abs(balance) > 2 or (i >= 2 and colors[i - 2] == colors[i - 1] == color):
+            return True
+    return False
+
+
+def run_event(size: int, rounds: int, method: str, seed: int, accelerated: bool = False) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    ratings = {pid: int(rng.gauss(1700, 300)) for pid in range(1, size + 1)}
+    history: List[Tuple[int, int, Optional[int], Optional[str]]] = []
+
+    round_times = []
+    largest_groups = []
+    unpaired = rematches = repeated_byes = 0
+    last_players: List[swiss.Player] = []
+
+    for round_number in range(1, rounds + 1):
+        players = build_players(ratings, history)
+        by_id = {p.id: p for p in players}
+        if accelerated:
+            swiss.assign_seeds(players)
+            swiss.apply_acceleration(players, round_number, rounds)
+        group_sizes: Dict[float, int] = {}
+        for p in players:
+            group_sizes[p.pairing_score] = group_sizes.get(p.pairing_score, 0) + 1
+        largest_groups.append(max(group_sizes.values()))
+
+        started = time.perf_counter()
+        pairs = swiss.pair_round(players, method=method)
+        round_times.append(time.perf_counter() - started)
+        last_players = players
+
+        seen = [pid for pair in pairs for pid in pair if pid is not None]
+        unpaired += size - len(set(seen))
+
+        for white_id, black_id in pairs:
+            if black_id is None:
+                repeated_byes += by_id[white_id].had_bye
+                history.append((round_number, white_id, None, '1-0'))
+                continue
+            rematches += black_id in by_id[white_id].opponents
+            history.append((round_number, white_id, black_id, play(ratings[white_id], ratings[black_id], rng)))
+
+    # Пик памяти меряется отдельным прогоном последнего тура: tracemalloc заметно замедляет код
+    tracemalloc.start()
+    swiss.pair_round(last_players, method=method)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    final = build_players(ratings, history)
+    balances = [abs(p.color_balance) for p in final]
+    color_rule_breaks = sum(1 for p in final if breaks_color_rules(p.colors))
+
+    return {
+        'players': size,
+        'rounds': rounds,
+        'method': method,
+        'accelerated': accelerated,
+        'seed': seed,
+        'round_ms_mean': round(statistics.mean(round_times) * 1000, 2),
+        'round_ms_max': round(max(round_times) * 1000, 2),
+        'peak_memory_kb': round(peak / 1024, 1),
+        'unpaired': unpaired,
+        'rematches': rematches,
+        'repeated_byes': repeated_byes,
+        'color_imbalance_max': max(balances),
+        'color_imbalance_over_1': sum(1 for b in balances if b > 1),
+        'color_rule_breaks': color_rule_breaks,
+        'largest_group_mean': round(statistics.mean(largest_groups), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Прогон жеребьёвки на синтетических турнирах')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)), help='размеры полей через запятую')
+    parser.add_argument('--methods', default='greedy,blossom,auto', help='способы из swiss.PAIRING_METHODS')
+    parser.add_argument('--rounds', type=int, default=9, help='число туров, не больше n-1')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--blossom-limit', type=int, default=swiss.BLOSSOM_MAX_PLAYERS * 2,
+                        help='blossom на полях больше этого пропускается: O(n³) занимает минуты')
+    parser.add_argument('--accelerated', action='store_true', help='виртуальные очки верхней группе в первых турах')
+    args = parser.parse_args()
+
+    failed = False
+    for size in (int(s) for s in args.sizes.split(',')):
+        rounds = max(1, min(args.rounds, size - 1))
+        for method in args.methods.split(','):
+            if method == 'blossom' and size > args.blossom_limit:
+                print(json.dumps({'players': size, 'rounds': rounds, 'method': method, 'skipped': True}), flush=True)
+                continue
+            report = run_event(size, rounds, method, args.seed, args.accelerated)
+            failed |= bool(report['unpaired'] or report['repeated_byes'])
+            # Правило цветов проверяется там, где туров не больше половины поля: в почти круговом турнире
+            # к последним турам пары без повторной встречи и без нарушения цвета может не остаться
+            failed |= bool(report['color_rule_breaks'] and rounds * 2 <= size)
+            print(json.dumps(report), flush=True)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+'''
+Вызывает по расписанию функции из backend/schedules.json: cron — для таймер-триггера платформы,
+every_seconds — период, с которым их дёргает этот скрипт, если таймер-триггер не настроен.
+Адреса функций берутся из backend/func2url.json (или из переменной FUNC_URL_<ИМЯ_ФУНКЦИИ>).
+Usage: python scripts/run_scheduled.py            # бесконечный цикл, например под systemd
+       python scripts/run_scheduled.py --once     # один проход, например из crontab раз в минуту
+'''
+
+import argparse
+import json
+import os
+import time
+import urllib.request
+from typing import Any, Dict, Optional
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+
+
+def load_json(name: str) -> Dict[str, Any]:
+    with open(os.path.join(BACKEND_DIR, name), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def function_url(name: str, func2url: Dict[str, str]) -> Optional[str]:
+    env_name = 'FUNC_URL_' + name.upper().replace('-', '_')
+    return os.environ.get(env_name) or func2url.get(name)
+
+
+def invoke(name: str, url: str, body: Dict[str, Any]) -> None:
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(body).encode('utf-8'),
+        headers={'Content-Type': 'application/json'},
+        method='POST'
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            print(f'[{name}] {response.status} {response.read().decode("utf-8")[:200]}')
+    except Exception as e:
+        print(f'[{name}] Ошибка вызова: {e}')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--once', action='store_true', help='вызвать каждую функцию один раз и выйти')
+    args = parser.parse_args()
+
+    schedules = load_json('schedules.json')
+    func2url = load_json('func2url.json')
+
+    jobs = {}
+    for name, schedule in schedules.items():
+        url = function_url(name, func2url)
+        if not url:
+            print(f'[{name}] Нет адреса в func2url.json, функция пропущена')
+            continue
+        jobs[name] = (url, schedule.get('body', {}), float(schedule.get('every_seconds', 60)))
+
+    next_run = {name: 0.0 for name in jobs}
+    while jobs:
+        for name, (url, body, every) in jobs.items():
+            if time.monotonic() >= next_run[name]:
+                invoke(name, url, body)
+                next_run[name] = time.monotonic() + every
+        if args.once:
+            break
+        time.sleep(max(0.0, min(next_run.values()) - time.monotonic()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+'''
+Данные для tests.json функций: партии, турниры и задачи, на которые ссылаются тесты.
+В миграциях их нет — скрипт ставит их в базу из DATABASE_URL перед прогоном тестов и убирает после.
+Каждый запуск сначала удаляет прежние данные тестов и создаёт их заново, поэтому тесты, которые меняют
+свои данные (ход в партии, старт тура), можно повторять. Все строки принадлежат отдельным тестовым
+пользователям и турнирам с id от 900001 и не пересекаются с настоящими.
+Usage: DATABASE_URL=postgresql://... python scripts/test_fixtures.py            # пересоздать данные
+       DATABASE_URL=postgresql://... python scripts/test_fixtures.py --clean    # только удалить
+'''
+
+import argparse
+import os
+import sys
+from typing import Any, Callable, Dict, List, Tuple
+
+import psycopg2
+
+SCHEMA = 't_p91748136_chess_support_world'
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+
+# (функция, удаление, создание); удаление идёт в обратном порядке, создание — в прямом
+FIXTURES: List[Tuple[str, str, str]] = [
+    ('users', f'''
+        DELETE FROM {SCHEMA}.users WHERE id BETWEEN 900001 AND 900099;
+    ''', f'''
+        INSERT INTO {SCHEMA}.users (id, email, password_hash, full_name, last_name, is_verified, ms_rating)
+        VALUES
+        (900001, 'fixture-900001@tests.invalid', '-', 'Тест Белый', 'Белый', TRUE, 1800),
+        (900002, 'fixture-900002@tests.invalid', '-', 'Тест Чёрный', 'Чёрный', TRUE, 1700),
+        (900003, 'fixture-900003@tests.invalid', '-', 'Тест Третий', 'Третий', TRUE, 1600),
+        (900004, 'fixture-900004@tests.invalid', '-', 'Тест Четвёртый', 'Четвёртый', TRUE, 1500);
+    '''),
+    # game-move и chess-game: белые — 900001, чёрные — 900002, без часов
+    ('game-move', f'''
+        DELETE FROM {SCHEMA}.games WHERE id LIKE 'test-move-%';
+    ''', f'''
+        INSERT INTO {SCHEMA}.games (id, fen, pgn, white_player_id, black_player_id, current_turn, status, ply)
+        VALUES
+        ('test-move-uci', 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1', '', 900001, 900002, 'w', 'active', 0),
+        ('test-move-san', 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1', '', 900001, 900002, 'w', 'active', 0),
+        ('test-move-illegal', 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1', '', 900001, 900002, 'w', 'active', 0),
+        ('test-move-mate', 'rnbqkbnr/pppp1ppp/8/4p3/6P1/5P2/PPPPP2P/RNBQKBNR b KQkq - 0 2', '1. f3 e5 2. g4', 900001, 900002, 'b', 'active', 3),
+        ('test-move-bad-fen', 'not a fen', '', 900001, 900002, 'w', 'active', 0);
+    '''),
+    # game-flag-sweeper: у белых осталась секунда, ход белых начался час назад
+    ('game-flag-sweeper', f'''
+        DELETE FROM {SCHEMA}.games WHERE id = 'test-flag-expired';
+    ''', f'''
+        INSERT INTO {SCHEMA}.games
+        (id, fen, pgn, white_player_id, black_player_id, current_turn, status, ply, time_control,
+         white_time, black_time, white_time_ms, black_time_ms, turn_started_at)
+        VALUES
+        ('test-flag-expired', 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1', '', 900001, 900002, 'w', 'active', 0, '1+0',
+         1, 60, 1000, 60000, NOW() - INTERVAL '1 hour');
+    '''),
+    # scheduled-jobs-worker: четыре участника, туров ещё нет, и две задачи старта первого тура, время которых пришло —
+    # первая создаёт тур, вторая видит его и пропускается. Третья задача неизвестного типа на последней попытке
+    ('scheduled-jobs-worker', f'''
+        DELETE FROM {SCHEMA}.scheduled_jobs WHERE dedupe_key LIKE 'test-%';
+        DELETE FROM {SCHEMA}.tournament_pairings WHERE tournament_id = 900001;
+        DELETE FROM {SCHEMA}.tournament_rounds WHERE tournament_id = 900001;
+        DELETE FROM {SCHEMA}.tournament_standings WHERE tournament_id = 900001;
+        DELETE FROM {SCHEMA}.tournament_registrations WHERE tournament_id = 900001;
+        DELETE FROM {SCHEMA}.games WHERE tournament_id = 900001;
+        DELETE FROM {SCHEMA}.tournaments WHERE id = 900001;
+    ''', f'''
+        INSERT INTO {SCHEMA}.tournaments (id, title, status, rounds, current_round, time_control)
+        VALUES (900001, 'Тест: отложенный старт тура', 'in_progress', 3, 0, '5+0');
+
+        INSERT INTO {SCHEMA}.tournament_registrations (tournament_id, player_id, status)
+        VALUES (900001, 900001, 'registered'), (900001, 900002, 'registered'),
+               (900001, 900003, 'registered'), (900001, 900004, 'registered');
+
+        INSERT INTO {SCHEMA}.scheduled_jobs (kind, dedupe_key, payload, run_at, attempts)
+        VALUES
+        ('tournament-next-round', 'test-900001-1', '{{"tournament_id": 900001, "round_number": 1}}', NOW() - INTERVAL '2 minutes', 0),
+        ('tournament-next-round', 'test-900001-1-repeat', '{{"tournament_id": 900001, "round_number": 1}}', NOW() - INTERVAL '1 minute', 0),
+        ('test-unknown-kind', 'test-dead-letter', '{{}}', NOW() - INTERVAL '1 minute', 4);
+    '''),
+    # tournament-check-round: первый тур закрыт, о нём ещё не сообщали
+    ('tournament-check-round', f'''
+        DELETE FROM {SCHEMA}.tournament_rounds WHERE tournament_id = 900002;
+        DELETE FROM {SCHEMA}.tournament_standings WHERE tournament_id = 900002;
+        DELETE FROM {SCHEMA}.tournaments WHERE id = 900002;
+    ''', f'''
+        INSERT INTO {SCHEMA}.tournaments (id, title, status, rounds, current_round, time_control)
+        VALUES (900002, 'Тест: проверка завершения тура', 'in_progress', 3, 1, '5+0');
+
+        INSERT INTO {SCHEMA}.tournament_rounds
+            (tournament_id, round_number, status, started_at, finished_at, games_total, games_finished)
+        VALUES (900002, 1, 'finished', NOW() - INTERVAL '10 minutes', NOW(), 1, 1);
+    '''),
+    # tournament-start-round: в турнире 900003 тур 900003 ждёт старта (две пары, партий нет),
+    # в турнире 900004 тур 900004 уже идёт — его повторный старт отклоняется
+    ('tournament-start-round', f'''
+        DELETE FROM {SCHEMA}.tournament_pairings WHERE tournament_id IN (900003, 900004);
+        DELETE FROM {SCHEMA}.games WHERE tournament_id IN (900003, 900004);
+        DELETE FROM {SCHEMA}.tournament_rounds WHERE tournament_id IN (900003, 900004);
+        DELETE FROM {SCHEMA}.tournament_standings WHERE tournament_id IN (900003, 900004);
+        DELETE FROM {SCHEMA}.tournaments WHERE id IN (900003, 900004);
+    ''', f'''
+        INSERT INTO {SCHEMA}.tournaments (id, title, status, rounds, current_round, time_control)
+        VALUES (900003, 'Тест: старт тура', 'in_progress', 3, 1, '5+0'),
+               (900004, 'Тест: повторный старт тура', 'in_progress', 3, 1, '5+0');
+
+        INSERT INTO {SCHEMA}.tournament_rounds (id, tournament_id, round_number, status, started_at)
+        VALUES (900003, 900003, 1, 'pending', NULL),
+               (900004, 900004, 1, 'active', NOW());
+
+        INSERT INTO {SCHEMA}.tournament_pairings (tournament_id, round_id, white_player_id, black_player_id, board_number)
+        VALUES (900003, 900003, 900001, 900002, 1),
+               (900003, 900003, 900003, 900004, 2),
+               (900004, 900004, 900001, 900002, 1);
+    '''),
+    # tournament-standings и tournament-crosstable: у турнира 900005 сыгран тур, места ещё не считались,
+    # ETag до пересчёта — "900005-2-4" и "900005-2-1-4-1". После создания таблицу пересчитывает refresh_standings,
+    # и условный GET с прежним ETag должен получить 200
+    ('tournament-standings', f'''
+        DELETE FROM {SCHEMA}.event_outbox WHERE kind = 'tournament-check' AND payload->>'tournament_id' = '900005';
+        DELETE FROM {SCHEMA}.tournament_pairings WHERE tournament_id = 900005;
+        DELETE FROM {SCHEMA}.tournament_rounds WHERE tournament_id = 900005;
+        DELETE FROM {SCHEMA}.tournament_standings WHERE tournament_id = 900005;
+        DELETE FROM {SCHEMA}.tournament_registrations WHERE tournament_id = 900005;
+        DELETE FROM {SCHEMA}.tournaments WHERE id = 900005;
+    ''', f'''
+        INSERT INTO {SCHEMA}.tournaments (id, title, status, rounds, current_round, time_control)
+        VALUES (900005, 'Тест: пересчёт мест', 'in_progress', 3, 1, '5+0');
+
+        INSERT INTO {SCHEMA}.tournament_registrations (tournament_id, player_id, status)
+        VALUES (900005, 900001, 'registered'), (900005, 900002, 'registered'),
+               (900005, 900003, 'registered'), (900005, 900004, 'registered');
+
+        INSERT INTO {SCHEMA}.tournament_rounds (id, tournament_id, round_number, status, started_at, finished_at)
+        VALUES (900005, 900005, 1, 'finished', NOW() - INTERVAL '10 minutes', NOW());
+
+        INSERT INTO {SCHEMA}.tournament_pairings (tournament_id, round_id, white_player_id, black_player_id, result, board_number)
+        VALUES (900005, 900005, 900004, 900001, '1-0', 1),
+               (900005, 900005, 900002, 900003, '1/2-1/2', 2);
+
+        -- Версии строк фиксированы, чтобы тест знал ETag до пересчёта; проверку тура из outbox тест не ждёт
+        UPDATE {SCHEMA}.tournament_standings SET version = 2, ranked_version = 1, rank = NULL WHERE tournament_id = 900005;
+        DELETE FROM {SCHEMA}.event_outbox WHERE kind = 'tournament-check' AND payload->>'tournament_id' = '900005';
+    '''),
+]
+
+
+def refresh_fixture_standings(cur: Any) -> None:
+    """Пересчёт мест турнира 900005 тем же кодом, что у tournament-check-round"""
+    sys.path.insert(0, os.path.join(BACKEND_DIR, 'tournament-check-round'))
+    from standings import refresh_standings
+    refresh_standings(cur, 900005)
+
+
+# Шаги после SQL создания, которые нельзя выразить одним SQL
+AFTER_SETUP: Dict[str, Callable[[Any], None]] = {
+    'tournament-standings': refresh_fixture_standings,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clean', action='store_true', help='удалить данные тестов и не создавать заново')
+    args = parser.parse_args()
+
+    if 'DATABASE_URL' not in os.environ:
+        sys.exit('DATABASE_URL не задан')
+
+    conn = psycopg2.connect(os.environ['DATABASE_URL'])
+    try:
+        with conn.cursor() as cur:
+            for _, cleanup_sql, _ in reversed(FIXTURES):
+                cur.execute(cleanup_sql)
+            if not args.clean:
+                for name, _, setup_sql in FIXTURES:
+                    cur.execute(setup_sql)
+                    if name in AFTER_SETUP:
+                        AFTER_SETUP[name](cur)
+                    print(f'[{name}] готово')
+        conn.commit()
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -197,14 +197,8 @@ const ChessBoard = ({
         stopTimer();
       }
       
-      // Синхронизируем время только если это ход противника (не наш)
-      // Наше время уже обновлено локально с инкрементом
-      const isOpponentMove = data.current_turn !== undefined && (
-        (playerColorRef.current === 'white' && data.current_turn === 'w') ||
-        (playerColorRef.current === 'black' && data.current_turn === 'b') ||
-        playerColorRef.current === null
-      );
-      if (isOpponentMove && data.white_time !== undefined && data.black_time !== undefined) {
+      // Часы ведёт сервер: его остатки (с инкрементом) принимаем после любого хода
+      if (data.white_time !== undefined && data.black_time !== undefined) {
         setWhiteTime(data.white_time);
         setBlackTime(data.black_time);
         whiteTimeRef.current = data.white_time;
@@ -347,12 +341,7 @@ const ChessBoard = ({
         body: JSON.stringify({
           game_id: gameId,
           fen: currentGame.fen(),
-          pgn: currentGame.pgn(),
-          current_turn: currentGame.turn(),
-          status: 'timeout',
-          winner: winnerColor,
-          white_time: loserColor === 'white' ? 0 : (whiteTimeRef.current ?? 0),
-          black_time: loserColor === 'black' ? 0 : (blackTimeRef.current ?? 0)
+          status: 'timeout'
         })
       });
       if (onGameEnd) onGameEnd(winnerColor === 'white' ? 'white_win' : 'black_win');
@@ -409,7 +398,6 @@ const ChessBoard = ({
       if (move === null) return false;
 
       const newFen = game.fen();
-      const newPgn = game.pgn();
       const newTurn = game.turn() as 'w' | 'b';
       gameRef.current = game;
       
@@ -442,44 +430,29 @@ const ChessBoard = ({
         startTimer(newTurn);
       }
 
-      let status = 'active';
-      let winner = null;
-      
       if (game.isGameOver()) {
         stopTimer();
-        if (game.isCheckmate()) {
-          status = 'checkmate';
-          winner = game.turn() === 'w' ? 'black' : 'white';
-        } else if (game.isDraw()) {
-          status = 'draw';
-          winner = 'draw';
-        } else if (game.isStalemate()) {
-          status = 'stalemate';
-          winner = 'draw';
-        }
       }
 
+      // Сервер сам проверяет ход и вычисляет позицию, PGN и итог партии
       const body: Record<string, unknown> = {
         game_id: gameId,
-        fen: newFen,
-        pgn: newPgn,
-        current_turn: newTurn,
-        status,
-        winner
+        move: move.from + move.to + (move.promotion ?? ''),
+        from_fen: move.before
       };
 
-      // Передаём актуальное время (после хода время переключилось)
-      if (whiteTimeRef.current !== null && blackTimeRef.current !== null) {
-        body.white_time = whiteTimeRef.current;
-        body.black_time = blackTimeRef.current;
-      }
-
-      await fetch('https://functions.poehali.dev/668c7b6f-f978-482a-a965-3f91c86ebea3', {
+      const response = await fetch('https://functions.poehali.dev/668c7b6f-f978-482a-a965-3f91c86ebea3', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json', 'X-User-Id': userId.toString() },
         body: JSON.stringify(body)
       });
 
+      // Позиция на сервере уже изменилась (повторный клик или устаревший ход) — синхронизируемся
+      if (response.status === 409) {
+        await loadGameState();
+        return false;
+      }
+
       return true;
     } catch (error) {
       console.error('Move failed:', error);
@@ -504,9 +477,7 @@ const ChessBoard = ({
           pgn: game.pgn(),
           current_turn: game.turn(),
           status: 'resignation',
-          winner,
-          white_time: whiteTimeRef.current ?? null,
-          black_time: blackTimeRef.current ?? null
+          winner
         })
       });
     } catch (error) {
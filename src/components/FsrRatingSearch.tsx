@@ -1,4 +1,4 @@
-import { useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import { Button } from '@/components/ui/button';
 import { Card } from '@/components/ui/card';
 import { Input } from '@/components/ui/input';
@@ -7,14 +7,55 @@ import Icon from '@/components/ui/icon';
 interface PlayerData {
   fsr_id: string;
   name: string;
+  birth_year?: number | null;
   rating_rapid?: number;
 }
 
+const FSR_RATING_URL = 'https://functions.poehali.dev/ac2aa89d-127b-4263-845d-4185d5db2ac2';
+const SUGGEST_DELAY_MS = 150;
+
 const FsrRatingSearch = () => {
   const [searchQuery, setSearchQuery] = useState('');
   const [loading, setLoading] = useState(false);
   const [playerData, setPlayerData] = useState<PlayerData | null>(null);
   const [error, setError] = useState('');
+  const [suggestions, setSuggestions] = useState<PlayerData[]>([]);
+  const suggestRequest = useRef<AbortController | null>(null);
+
+  // Подсказки при вводе фамилии: запрос после паузы, предыдущий незавершённый отменяется
+  useEffect(() => {
+    const query = searchQuery.trim();
+    if (query.length < 2 || /^\d+$/.test(query)) {
+      setSuggestions([]);
+      return;
+    }
+
+    const timer = setTimeout(async () => {
+      suggestRequest.current?.abort();
+      const controller = new AbortController();
+      suggestRequest.current = controller;
+      try {
+        const response = await fetch(`${FSR_RATING_URL}?q=${encodeURIComponent(query)}&limit=8`, {
+          signal: controller.signal,
+        });
+        if (response.ok) {
+          const data = await response.json();
+          setSuggestions(data.players || []);
+        }
+      } catch {
+        // отменённый или неудачный запрос подсказок не показывает ошибку
+      }
+    }, SUGGEST_DELAY_MS);
+
+    return () => clearTimeout(timer);
+  }, [searchQuery]);
+
+  const selectSuggestion = (player: PlayerData) => {
+    suggestRequest.current?.abort();
+    setSuggestions([]);
+    setError('');
+    setPlayerData(player);
+  };
 
   const searchPlayer = async () => {
     if (!searchQuery.trim()) {
@@ -25,15 +66,14 @@ const FsrRatingSearch = () => {
     setLoading(true);
     setError('');
     setPlayerData(null);
+    setSuggestions([]);
 
     try {
       // Определяем, это ID или имя
       const isId = /^\d+$/.test(searchQuery.trim());
       const param = isId ? `fsr_id=${searchQuery.trim()}` : `name=${encodeURIComponent(searchQuery.trim())}`;
       
-      const response = await fetch(
-        `https://functions.poehali.dev/ac2aa89d-127b-4263-845d-4185d5db2ac2?${param}`
-      );
+      const response = await fetch(`${FSR_RATING_URL}?${param}`);
       
       if (!response.ok) {
         throw new Error('Игрок не найден');
@@ -61,14 +101,33 @@ const FsrRatingSearch = () => {
       </div>
 
       <div className="flex gap-2 mb-4">
-        <Input
-          type="text"
-          placeholder="ID или фамилия (например: Непомнящий)"
-          value={searchQuery}
-          onChange={(e) => setSearchQuery(e.target.value)}
-          onKeyDown={(e) => e.key === 'Enter' && searchPlayer()}
-          className="flex-1"
-        />
+        <div className="relative flex-1">
+          <Input
+            type="text"
+            placeholder="ID или фамилия (например: Непомнящий)"
+            value={searchQuery}
+            onChange={(e) => setSearchQuery(e.target.value)}
+            onKeyDown={(e) => e.key === 'Enter' && searchPlayer()}
+          />
+          {suggestions.length > 0 && (
+            <div className="absolute z-10 mt-1 w-full bg-white border border-gray-200 rounded-lg shadow-lg max-h-72 overflow-y-auto">
+              {suggestions.map((player) => (
+                <button
+                  key={player.fsr_id}
+                  type="button"
+                  onClick={() => selectSuggestion(player)}
+                  className="w-full text-left px-3 py-2 hover:bg-purple-50 flex items-center justify-between gap-2"
+                >
+                  <span className="text-sm text-gray-900">
+                    {player.name}
+                    {player.birth_year && <span className="text-gray-500"> ({player.birth_year})</span>}
+                  </span>
+                  <span className="text-sm font-semibold text-purple-700">{player.rating_rapid || '—'}</span>
+                </button>
+              ))}
+            </div>
+          )}
+        </div>
         <Button
           onClick={searchPlayer}
           disabled={loading}
@@ -13,6 +13,7 @@ interface Standing {
   losses: number;
   games_played: number;
   round_results?: { [key: number]: string };
+  tiebreaks?: { [key: string]: number };
 }
 
 interface Tournament {
@@ -30,7 +31,18 @@ interface StandingsTableProps {
   tournament: Tournament | null;
 }
 
+const TIEBREAK_LABELS: { [key: string]: string } = {
+  buchholz: 'Бх',
+  buchholz_cut1: 'Бх-1',
+  buchholz_median: 'МБх',
+  sonneborn_berger: 'Зб',
+  progressive: 'Прогр.',
+  direct_encounter: 'Личн.',
+};
+
 const StandingsTable = ({ standings, tournament }: StandingsTableProps) => {
+  const tiebreakNames = Object.keys(standings[0]?.tiebreaks || {});
+
   return (
     <Card className="p-6">
       <h2 className="text-2xl font-bold text-gray-900 mb-4">Турнирная таблица</h2>
@@ -51,6 +63,9 @@ const StandingsTable = ({ standings, tournament }: StandingsTableProps) => {
                 {tournament?.rounds && Array.from({ length: tournament.rounds }, (_, i) => i + 1).map((round) => (
                   <th key={round} className="text-center p-2 font-bold text-gray-700 text-xs bg-blue-50">{round}</th>
                 ))}
+                {tiebreakNames.map((name) => (
+                  <th key={name} className="text-center p-2 font-bold text-gray-700 text-xs">{TIEBREAK_LABELS[name] || name}</th>
+                ))}
                 <th className="text-center p-3 font-bold text-gray-700">Партий</th>
                 <th className="text-center p-3 font-bold text-gray-700 bg-green-50">+</th>
                 <th className="text-center p-3 font-bold text-gray-700 bg-gray-100">=</th>
@@ -99,6 +114,11 @@ const StandingsTable = ({ standings, tournament }: StandingsTableProps) => {
                       <span className="text-xs text-gray-600">{player.round_results?.[round] || '-'}</span>
                     </td>
                   ))}
+                  {tiebreakNames.map((name) => (
+                    <td key={name} className="p-2 text-center text-xs text-gray-600">
+                      {player.tiebreaks?.[name] ?? '-'}
+                    </td>
+                  ))}
                   <td className="p-3 text-center text-gray-700">
                     {player.games_played}
                   </td>